@@ -0,0 +1,155 @@
+#python
+
+import os
+import shutil
+import tempfile
+
+from fsutil import file_digest, remove_file
+from reports import SyncReport
+
+# Bytes handed to the kernel per copy_file_range/sendfile call.
+COPY_CHUNK = 1 << 30
+
+
+def find_assets(static_dir: str) -> dict[str, os.stat_result]:
+    """Return {relative path: stat} for every file under static_dir."""
+    assets = {}
+    if not os.path.isdir(static_dir):
+        return assets
+    for directory, dirnames, filenames in os.walk(static_dir):
+        dirnames.sort()
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            relative = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            assets[relative] = os.stat(path)
+    return assets
+
+
+def sync_assets(
+    static_dir: str,
+    output_dir: str,
+    previous: dict[str, list[int]],
+    threads: int = 8,
+    hardlink: bool = False,
+) -> tuple[dict[str, list[int]], SyncReport]:
+    """Mirror static_dir into output_dir, copying only what changed.
+
+    previous is the record returned by the last sync, {path: [size,
+    mtime_ns]}. A file is skipped when its copy has the same size and mtime
+    (copies keep the source mtime). When only the mtime differs, hashes are
+    compared before copying. Files from the previous sync that are no longer
+    in static_dir are removed from output_dir. Copies run in a thread pool
+    and go through copy_file() (or a hard link, when hardlink is set).
+
+    Returns the new record and a report.
+    """
+    report = SyncReport()
+    record = {}
+    pending = []
+    for relative, stat in find_assets(static_dir).items():
+        source = os.path.join(static_dir, relative)
+        target = os.path.join(output_dir, relative)
+        record[relative] = [stat.st_size, stat.st_mtime_ns]
+        if _unchanged(source, target, stat):
+            report.unchanged.append(relative)
+            continue
+        pending.append(relative)
+
+    copy = link_or_copy if hardlink else copy_file
+
+    def copy_asset(relative: str) -> str:
+        copy(os.path.join(static_dir, relative), os.path.join(output_dir, relative))
+        return relative
+
+    if pending:
+        # Imported only when there is work: it pulls in logging and
+        # threading, which a no-change build can do without.
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            report.copied.extend(pool.map(copy_asset, pending))
+
+    for relative in sorted(previous):
+        if relative not in record:
+            remove_file(os.path.join(output_dir, relative), output_dir)
+            report.removed.append(relative)
+    return record, report
+
+
+def _unchanged(source: str, target: str, stat: os.stat_result) -> bool:
+    try:
+        target_stat = os.stat(target)
+    except FileNotFoundError:
+        return False
+    if target_stat.st_size != stat.st_size:
+        return False
+    if target_stat.st_mtime_ns == stat.st_mtime_ns:
+        return True
+    # Same size but a new mtime, e.g. after a fresh checkout: compare
+    # contents and only refresh the copy's mtime if they match.
+    if file_digest(source) != file_digest(target):
+        return False
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return True
+
+
+def copy_file(source: str, target: str) -> None:
+    """Copy source to target atomically, keeping its mode and mtime.
+
+    The data is moved by the kernel with copy_file_range (which can share
+    extents on filesystems that support reflinks), falling back to sendfile
+    and then to a userspace copy.
+    """
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with open(source, 'rb') as fin, os.fdopen(fd, 'wb') as fout:
+            _kernel_copy(fin, fout, os.fstat(fin.fileno()).st_size)
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """Hard link source at target, copying instead if linking is not possible."""
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f'.tmp-link-{os.getpid()}-{os.path.basename(target)}')
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        copy_file(source, target)
+        return
+    os.replace(tmp_path, target)
+
+
+def _kernel_copy(fin, fout, size: int) -> None:
+    in_fd, out_fd = fin.fileno(), fout.fileno()
+    offset = 0
+    for method in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, method):
+            continue
+        try:
+            while offset < size:
+                if method == 'copy_file_range':
+                    sent = os.copy_file_range(in_fd, out_fd, min(COPY_CHUNK, size - offset), offset, offset)
+                else:
+                    # sendfile writes at the output's file position, which
+                    # copy_file_range with explicit offsets leaves alone.
+                    os.lseek(out_fd, offset, os.SEEK_SET)
+                    sent = os.sendfile(out_fd, in_fd, offset, min(COPY_CHUNK, size - offset))
+                if sent == 0:
+                    break
+                offset += sent
+            if offset >= size:
+                return
+        except OSError:
+            # Unsupported for this pair of files (e.g. across filesystems
+            # on older kernels); carry on from where it stopped.
+            pass
+    fin.seek(offset)
+    fout.seek(offset)
+    shutil.copyfileobj(fin, fout)
@@ -0,0 +1,103 @@
+#python
+
+# Regression benchmark for block_to_block_type and markdown_to_html_node.
+#
+#   python3 src/bench_block_markdown.py
+#
+# Times the classifier on ordinary blocks and on adversarial ones: a 1 MB
+# quote, quotes and lists that only fail on their last line, and ordered
+# lists whose numbering breaks early. Then times markdown_to_html_node on
+# 1 MB blocks of each type and on large generated documents of each corpus
+# kind, printing throughput. Exits non-zero if any case takes longer than
+# its budget, which is generous enough to only catch backtracking or
+# quadratic behaviour.
+
+import sys
+import timeit
+
+from block_markdown import BlockType, block_to_block_type, markdown_to_html_node
+from corpus import KINDS, generate_document
+
+MB = 1 << 20
+
+# Budget in milliseconds per MiB of input.
+BUDGET_MS_PER_MB = 50.0
+
+# Budget for markdown_to_html_node, which also parses inline markup and
+# builds a node per piece of it.
+RENDER_BUDGET_MS_PER_MB = 2000.0
+
+# Size of each generated document for the throughput cases.
+DOCUMENT_SIZE = 2 * MB
+
+
+def repeat_lines(line: str, size: int) -> list[str]:
+    return [line] * (size // (len(line) + 1))
+
+
+def cases() -> list[tuple[str, str, BlockType]]:
+    quote = repeat_lines('> quoted line of text that goes on for a while', MB)
+    unordered = repeat_lines('- list item with some text', MB)
+    ordered = [f'{i}. list item with some text' for i in range(1, 40_000)]
+    return [
+        ('heading', '## A short heading', BlockType.HEADING),
+        ('paragraph', 'Plain text ' * 20, BlockType.PARAGRAPH),
+        ('1 MB quote', '\n'.join(quote), BlockType.QUOTE),
+        ('1 MB quote, last line unquoted', '\n'.join(quote + ['not quoted']), BlockType.PARAGRAPH),
+        ('1 MB quote, trailing newlines', '\n'.join(quote) + '\n\n', BlockType.PARAGRAPH),
+        ('1 MB list', '\n'.join(unordered), BlockType.UNORDERED_LIST),
+        ('1 MB list, last item no space', '\n'.join(unordered + ['-x']), BlockType.PARAGRAPH),
+        ('long ordered list', '\n'.join(ordered), BlockType.ORDERED_LIST),
+        ('long ordered list, breaks at 2', '\n'.join(['1. a', '3. b'] + ordered[2:]), BlockType.PARAGRAPH),
+        ('long ordered list, breaks at end', '\n'.join(ordered + ['1. restart']), BlockType.PARAGRAPH),
+        ('1 MB code block', '```\n' + 'x = 1\n' * (MB // 6) + '```', BlockType.CODE),
+        ('1 MB heading-like', '# ' + 'a' * MB + '\nb', BlockType.PARAGRAPH),
+    ]
+
+
+def render_cases() -> list[tuple[str, str]]:
+    words = 'text with **bold** and `code` in it'
+    return [
+        ('1 MB paragraph', '\n'.join(repeat_lines(words, MB))),
+        ('1 MB quote', '\n'.join(repeat_lines('> ' + words, MB))),
+        ('1 MB list', '\n'.join(repeat_lines('- ' + words, MB))),
+        ('1 MB ordered list', '\n'.join(f'{i}. {words}' for i in range(1, MB // (len(words) + 6)))),
+        ('1 MB code block', '```\n' + 'x = 1\n' * (MB // 6) + '```'),
+    ] + [(f'{DOCUMENT_SIZE // MB} MB {kind} document', generate_document(kind, DOCUMENT_SIZE)) for kind in KINDS]
+
+
+def timed(case) -> float:
+    # Fastest of three runs, in milliseconds.
+    timer = timeit.Timer(case)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=loops)) / loops * 1e3
+
+
+def main():
+    failed = False
+    print(f'{"case":<36} {"size":>9} {"ms":>9} {"budget":>9}')
+    for name, block, expected in cases():
+        result = block_to_block_type(block)
+        if result != expected:
+            print(f'{name}: expected {expected}, got {result}')
+            failed = True
+            continue
+        ms = timed(lambda: block_to_block_type(block))
+        budget = max(1.0, BUDGET_MS_PER_MB * len(block) / MB)
+        marker = '' if ms <= budget else '  OVER BUDGET'
+        failed = failed or ms > budget
+        print(f'{name:<36} {len(block):>9} {ms:>9.3f} {budget:>9.1f}{marker}')
+
+    print()
+    print(f'{"markdown_to_html_node":<36} {"size":>9} {"ms":>9} {"budget":>9} {"MB/s":>7}')
+    for name, markdown in render_cases():
+        ms = timed(lambda: markdown_to_html_node(markdown))
+        budget = RENDER_BUDGET_MS_PER_MB * len(markdown) / MB
+        marker = '' if ms <= budget else '  OVER BUDGET'
+        failed = failed or ms > budget
+        print(f'{name:<36} {len(markdown):>9} {ms:>9.1f} {budget:>9.1f} {len(markdown) / MB / ms * 1e3:>7.2f}{marker}')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#python
+
+# Benchmark for HTML escaping.
+#
+#   python3 src/bench_escape.py [size]
+#
+# Times to_html() over the same node trees with escaping off and on, for a
+# generated document with nothing to escape and for one where many text
+# runs contain &, < or >. A second table compares escape_text() with
+# html.escape on single strings.
+
+import html
+import sys
+import timeit
+
+from block_markdown import markdown_to_html_node
+from corpus import generate_document
+from htmlnode import escape_text, set_escaping
+
+
+def dirty(markdown: str) -> str:
+    # Mid-line only, so no block changes type.
+    return markdown.replace(' and ', ' & ').replace(' the ', ' <the> ')
+
+
+def best_of(func) -> float:
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=loops)) / loops
+
+
+def best_of_modes(func, rounds: int = 15) -> tuple[float, float]:
+    # Alternate the two modes so drift in machine load hits both alike.
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    best = {False: float('inf'), True: float('inf')}
+    for _ in range(rounds):
+        for mode in best:
+            set_escaping(mode)
+            best[mode] = min(best[mode], timer.timeit(loops) / loops)
+    set_escaping(False)
+    return best[False], best[True]
+
+
+def report_pages(size: int) -> None:
+    clean = generate_document('mixed', size, seed=1)
+    documents = {'clean': clean, 'dirty': dirty(clean)}
+    print(f'{"document":>10} {"raw ms":>9} {"escaped ms":>11} {"overhead":>9}')
+    for name, markdown in documents.items():
+        raw, escaped = best_of_modes(markdown_to_html_node(markdown).to_html)
+        print(f'{name:>10} {raw * 1e3:>9.3f} {escaped * 1e3:>11.3f} {escaped / raw - 1:>8.1%}')
+    print()
+
+
+def report_strings() -> None:
+    strings = {
+        'clean': 'plain words with nothing that needs escaping at all',
+        'dirty': 'if a < b && c > d then <em>print</em> "done"',
+    }
+    print(f'{"string":>10} {"escape_text us":>15} {"html.escape us":>15}')
+    for name, text in strings.items():
+        ours = best_of(lambda: escape_text(text))
+        stdlib = best_of(lambda: html.escape(text, quote=False))
+        print(f'{name:>10} {ours * 1e6:>15.3f} {stdlib * 1e6:>15.3f}')
+    print()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    report_pages(size)
+    report_strings()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#python
+
+# Scaling benchmark for split_nodes_image and split_nodes_link.
+#
+#   python3 src/bench_inline_markdown.py
+#
+# Each row doubles the number of links (or images) in a single paragraph.
+# With linear splitting the per-item time stays flat as the paragraph grows.
+
+import timeit
+
+from textnode import TextNode, TextType
+from inline_markdown import split_nodes_image, split_nodes_link
+
+SIZES = [250, 500, 1000, 2000, 4000, 8000]
+
+
+def link_paragraph(count: int) -> str:
+    return ' and '.join(f'[link {i}](https://example.com/{i})' for i in range(count))
+
+
+def image_paragraph(count: int) -> str:
+    return ' and '.join(f'![image {i}](https://example.com/{i}.png)' for i in range(count))
+
+
+def time_split(split, text: str) -> float:
+    nodes = [TextNode(text, TextType.TEXT)]
+    timer = timeit.Timer(lambda: split(nodes))
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=loops)) / loops
+
+
+def report(name: str, split, make_text) -> None:
+    print(f'{name}')
+    print(f'{"items":>8} {"total ms":>10} {"us/item":>9} {"vs first":>9}')
+    baseline = None
+    for count in SIZES:
+        seconds = time_split(split, make_text(count))
+        per_item = seconds / count * 1e6
+        if baseline is None:
+            baseline = per_item
+        print(f'{count:>8} {seconds * 1e3:>10.3f} {per_item:>9.3f} {per_item / baseline:>8.2f}x')
+    print()
+
+
+def main():
+    report('split_nodes_link', split_nodes_link, link_paragraph)
+    report('split_nodes_image', split_nodes_image, image_paragraph)
+
+
+if __name__ == '__main__':
+    main()
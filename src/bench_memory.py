@@ -0,0 +1,121 @@
+#python
+
+# Memory benchmark for the node classes.
+#
+#   python3 src/bench_memory.py [paragraphs]
+#
+# Reports the bytes held by each node instance on its own (sharing the same
+# strings) and the retained and peak memory for building a synthetic page
+# from markdown through TextNodes to an HTMLNode tree. Then compares the peak
+# for rendering the same page from a file with render_page and stream_page,
+# and for a streamed build of it with search off and on.
+
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from build import build_site
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from page import render_page, stream_page
+from textnode import TextNode, TextType, text_node_to_html_node
+
+INSTANCES = 100_000
+
+PARAGRAPH = (
+    'This is **bold text** with an _italic_ word, some `inline code`, '
+    'a [link](https://example.com/page) and an ![image](https://example.com/a.png) '
+    'followed by plain text to finish the sentence.'
+)
+
+
+def bytes_per_instance(make) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    nodes = [make() for _ in range(INSTANCES)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The list itself holds one pointer per node.
+    return (after - before - sys.getsizeof(nodes)) / len(nodes)
+
+
+def build_page(paragraphs: int) -> tuple[ParentNode, int]:
+    blocks = []
+    count = 0
+    for i in range(paragraphs):
+        text_nodes = text_to_textnodes(f'{i}: {PARAGRAPH}')
+        children = [text_node_to_html_node(node) for node in text_nodes]
+        blocks.append(ParentNode('p', children))
+        count += len(children) + 1
+    return ParentNode('div', blocks), count + 1
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    print('bytes per instance')
+    print(f'  TextNode    {bytes_per_instance(lambda: TextNode("text", TextType.LINK, "url")):8.1f}')
+    print(f'  LeafNode    {bytes_per_instance(lambda: LeafNode("b", "text")):8.1f}')
+    print(f'  ParentNode  {bytes_per_instance(lambda: ParentNode("p", [])):8.1f}')
+    print()
+
+    tracemalloc.start()
+    page, nodes = build_page(paragraphs)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'synthetic page: {paragraphs} paragraphs, {nodes} nodes')
+    print(f'  retained    {retained / 2**20:8.1f} MiB ({retained / nodes:.1f} bytes/node incl. strings)')
+    print(f'  peak        {peak / 2**20:8.1f} MiB')
+    del page
+    print()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'content', 'page.md')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(f'{i}: {PARAGRAPH}' for i in range(paragraphs)))
+        size = os.path.getsize(path)
+        print(f'page file: {size / 2**20:.1f} MiB, peak while rendering')
+        for name, render in (('render_page', whole_file), ('stream_page', streamed)):
+            tracemalloc.start()
+            render(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'  {name} {peak / 2**20:8.1f} MiB')
+
+        # Without the numbers, so that the index itself stays small and
+        # the peak is that of reading the page.
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join([PARAGRAPH] * paragraphs))
+        print('streamed build of the page without numbers, peak')
+        template = os.path.join(directory, 'template.html')
+        with open(template, 'w', encoding='utf-8') as f:
+            f.write('{{ Content }}')
+        output = os.path.join(directory, 'public')
+        # A threshold of 0 streams the page as if it were too large to
+        # render in memory. The first build, untraced, takes the one-off
+        # costs of imports and compiled patterns.
+        build_site(os.path.dirname(path), output, template, stream_threshold=0, search=True)
+        for search in (False, True):
+            shutil.rmtree(output)
+            tracemalloc.start()
+            build_site(os.path.dirname(path), output, template, stream_threshold=0, search=search)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'  search {"on " if search else "off"}  {peak / 2**20:8.1f} MiB')
+
+
+def whole_file(path: str) -> None:
+    with open(path, encoding='utf-8') as f:
+        render_page(f.read(), '{{ Content }}', path).encode('utf-8')
+
+
+def streamed(path: str) -> None:
+    with open(os.devnull, 'w', encoding='utf-8') as out:
+        stream_page(path, out.write, '{{ Content }}')
+
+
+if __name__ == '__main__':
+    main()
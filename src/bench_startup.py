@@ -0,0 +1,115 @@
+#python
+
+# Startup benchmark for the CLI.
+#
+#   python3 src/bench_startup.py [--runs N] [--budget MS] [--top N]
+#
+# Runs each command in a fresh interpreter and reports the median wall time
+# next to that of a bare `python -c pass`, then breaks the difference down
+# with -X importtime. Exits with status 1 if any command takes longer than
+# the budget, so it can run in CI. Tooling may call render-one once per
+# file, so startup cost is paid on every call.
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+def wall_ms(command: list[str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(times)
+
+
+def import_times(command: list[str]) -> dict[str, tuple[int, int]]:
+    """Return {module: (depth, cumulative us)} from one -X importtime run."""
+    result = subprocess.run(
+        [command[0], '-X', 'importtime'] + command[1:],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (depth, int(cumulative))
+    return modules
+
+
+def make_site(root: str) -> tuple[str, str, str]:
+    content = os.path.join(root, 'content')
+    os.makedirs(content)
+    source = os.path.join(content, 'index.md')
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write('# Home\n\nA paragraph with **bold** and a [link](https://example.com).\n')
+    template = os.path.join(root, 'template.html')
+    with open(template, 'w', encoding='utf-8') as f:
+        f.write('<title>{{ Title }}</title>{{ Content }}')
+    return content, source, template
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Time CLI startup in fresh interpreters.')
+    parser.add_argument('--runs', type=int, default=20, help='runs per command; the median is kept')
+    parser.add_argument('--budget', type=float, default=100.0, metavar='MS',
+                        help='slowest acceptable median per command, interpreter start included')
+    parser.add_argument('--top', type=int, default=8, help='imports to list per command')
+    args = parser.parse_args(argv)
+
+    # Installed, the modules load from cached bytecode. Without it, as with
+    # PYTHONDONTWRITEBYTECODE set or after an edit, every run would time
+    # compiling them instead.
+    compileall.compile_dir(os.path.dirname(MAIN), quiet=1)
+
+    with tempfile.TemporaryDirectory() as root:
+        content, source, template = make_site(root)
+        output = os.path.join(root, 'public')
+        commands = {
+            'help': ['--help'],
+            'render-one': ['render-one', source, '--template', template],
+            'build (no changes)': ['build', '--content', content, '--output', output, '--template', template,
+                                   '--static', os.path.join(root, 'static')],
+        }
+        subprocess.run([sys.executable, MAIN] + commands['build (no changes)'], check=True, stdout=subprocess.DEVNULL)
+
+        baseline_command = [sys.executable, '-c', 'pass']
+        baseline = wall_ms(baseline_command, args.runs)
+        baseline_modules = import_times(baseline_command)
+        print(f'{"command":<20} {"median ms":>10} {"over bare":>10}')
+        print(f'{"python -c pass":<20} {baseline:>10.1f}')
+        results = {}
+        for name, command_args in commands.items():
+            command = [sys.executable, MAIN] + command_args
+            results[name] = (wall_ms(command, args.runs), import_times(command))
+            marker = '  OVER BUDGET' if results[name][0] > args.budget else ''
+            print(f'{name:<20} {results[name][0]:>10.1f} {results[name][0] - baseline:>10.1f}{marker}')
+
+    for name, (_, modules) in results.items():
+        # Top-level imports beyond what the bare interpreter loads.
+        own = [(cumulative, module) for module, (depth, cumulative) in modules.items()
+               if depth == 0 and module not in baseline_modules]
+        own.sort(reverse=True)
+        print(f'\n{name}: {sum(c for c, _ in own) / 1e3:.1f} ms of imports')
+        for cumulative, module in own[:args.top]:
+            print(f'  {module:<30} {cumulative / 1e3:>7.1f} ms')
+
+    over = [name for name, (ms, _) in results.items() if ms > args.budget]
+    if over:
+        print(f'\nover the {args.budget:.0f} ms budget: {", ".join(over)}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#python
+
+# Per-stage benchmark runner.
+#
+#   python3 src/benchmark.py --output bench.json
+#   python3 src/benchmark.py --compare bench.json
+#
+# Generates a synthetic corpus (see corpus.py) and times each pipeline stage
+# on its own: markdown_to_blocks, block_to_block_type, text_to_textnodes,
+# text_node_to_html_node and to_html, plus markdown_to_html_node end to end.
+# Inputs for each stage are prepared up front so a stage's time does not
+# include the stages before it. Results are written as JSON; --compare reads
+# an earlier result and exits non-zero if any stage got slower than
+# --threshold.
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from corpus import KINDS, generate_corpus
+from inline_markdown import text_to_textnodes
+from textnode import text_node_to_html_node
+
+FORMAT = 1
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f'unknown corpus kind {kind!r}, expected one of {", ".join(KINDS)}')
+        mix[kind] = int(weight) if weight else 1
+    return mix
+
+
+def best_of(repeat: int, stage) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_stages(corpus: list[str], repeat: int) -> dict[str, dict]:
+    blocks = [block for document in corpus for block in markdown_to_blocks(document)]
+    # The text each block builder hands to text_to_textnodes, give or take
+    # the block markers, which never contain inline markup.
+    inline_texts = [' '.join(block.split('\n')) for block in blocks if block_to_block_type(block) != BlockType.CODE]
+    text_nodes = [node for text in inline_texts for node in text_to_textnodes(text)]
+    trees = [markdown_to_html_node(document) for document in corpus]
+    html_size = sum(len(tree.to_html()) for tree in trees)
+
+    stages = {
+        'markdown_to_blocks': (len(corpus), lambda: [markdown_to_blocks(document) for document in corpus]),
+        'block_to_block_type': (len(blocks), lambda: [block_to_block_type(block) for block in blocks]),
+        'text_to_textnodes': (len(inline_texts), lambda: [text_to_textnodes(text) for text in inline_texts]),
+        'text_node_to_html_node': (len(text_nodes), lambda: [text_node_to_html_node(node) for node in text_nodes]),
+        'to_html': (len(trees), lambda: [tree.to_html() for tree in trees]),
+        'markdown_to_html_node': (len(corpus), lambda: [markdown_to_html_node(document) for document in corpus]),
+    }
+    results = {}
+    for name, (items, stage) in stages.items():
+        seconds = best_of(repeat, stage)
+        results[name] = {
+            'seconds': seconds,
+            'items': items,
+            'us_per_item': seconds / items * 1e6 if items else 0.0,
+        }
+    results['to_html']['bytes'] = html_size
+    return results
+
+
+def git_revision() -> str | None:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(previous: dict, current: dict, threshold: float) -> bool:
+    """Print stage-by-stage ratios; return True if any stage regressed."""
+    regressed = False
+    print(f'{"stage":<24} {"before ms":>10} {"after ms":>10} {"ratio":>7}')
+    for name, result in current['stages'].items():
+        before = previous.get('stages', {}).get(name)
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  REGRESSION'
+            regressed = True
+        print(f'{name:<24} {before["seconds"] * 1e3:>10.2f} {result["seconds"] * 1e3:>10.2f} {ratio:>6.2f}x{marker}')
+    return regressed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Time each stage of the markdown pipeline.')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('mixed=4,links=1,code=1,lists=1,quotes=1'),
+                        help='corpus kinds and weights, e.g. "mixed=4,links=1"')
+    parser.add_argument('--documents', type=int, default=40, help='documents in the corpus')
+    parser.add_argument('--size', type=int, default=20_000, help='approximate characters per document')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per stage; the fastest is kept')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', metavar='JSON', help='compare against an earlier result')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='slowdown ratio above which --compare reports a regression')
+    args = parser.parse_args(argv)
+
+    corpus = generate_corpus(args.mix, args.documents, args.size, args.seed)
+    result = {
+        'format': FORMAT,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': {
+            'mix': args.mix,
+            'documents': len(corpus),
+            'size': args.size,
+            'seed': args.seed,
+            'characters': sum(len(document) for document in corpus),
+        },
+        'stages': run_stages(corpus, args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=1)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous.get('corpus') != result['corpus']:
+            print('warning: corpus settings differ from the compared run', file=sys.stderr)
+        return 1 if compare(previous, result, args.threshold) else 0
+
+    print(f'{"stage":<24} {"items":>8} {"ms":>10} {"us/item":>10}')
+    for name, stage in result['stages'].items():
+        print(f'{name:<24} {stage["items"]:>8} {stage["seconds"] * 1e3:>10.2f} {stage["us_per_item"]:>10.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#python
+
+import hashlib
+import os
+from collections import OrderedDict
+
+from fsutil import write_atomic
+
+
+class BlockCache:
+    """Memoize rendered HTML fragments keyed by a hash of the block text.
+
+    Holds at most max_entries fragments in memory and evicts the least
+    recently used one when full. With a directory, fragments are also stored
+    on disk, one file per block, so later builds (or other processes) can
+    reuse them. version is mixed into every key; pass the renderer version so
+    fragments from an older renderer are never served.
+    """
+
+    def __init__(self, max_entries: int = 4096, directory: str | None = None, version: str = '') -> None:
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        self.max_entries = max_entries
+        self.directory = directory
+        self.version = version
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, block: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(block.encode('utf-8'))
+        return digest.hexdigest()
+
+    def render(self, block: str, render_block) -> str:
+        """Return the cached fragment for block, calling render_block(block) on a miss."""
+        key = self.key(block)
+        html = self._entries.get(key)
+        if html is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+        html = self._load(key)
+        if html is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            html = render_block(block)
+            self._store(key, html)
+
+        self._entries[key] = html
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return html
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + '.html')
+
+    def _load(self, key: str) -> str | None:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key: str, html: str) -> None:
+        if self.directory is not None:
+            write_atomic(self._path(key), html.encode('utf-8'))
@@ -1,8 +1,16 @@
 #python
 
+from collections.abc import Iterable, Iterator
 from enum import Enum
 import re
 
+# The pipeline stages of other modules are called through those modules,
+# so that instrument.enable() can swap them for timed wrappers.
+import inline_markdown
+import textnode
+from htmlnode import HTMLNode, ParentNode
+from textnode import TextNode, TextType
+
 def markdown_to_blocks(markdown: str) -> list[str]:
     blocks = markdown.split('\n\n')
     markdown_blocks = []
@@ -14,6 +22,36 @@ def markdown_to_blocks(markdown: str) -> list[str]:
 
     return markdown_blocks
 
+def iter_markdown_blocks(chunks: Iterable[str]) -> Iterator[str]:
+    """Yield the blocks markdown_to_blocks would return for ''.join(chunks).
+
+    Only the text of the block being read is held, so the whole document
+    never has to be in memory at once.
+    """
+    parts = []
+    for chunk in chunks:
+        start = 0
+        if parts and parts[-1].endswith('\n') and chunk.startswith('\n'):
+            # A separator split between two chunks.
+            parts[-1] = parts[-1][:-1]
+            block = ''.join(parts).strip()
+            if block:
+                yield block
+            parts = []
+            start = 1
+        while (end := chunk.find('\n\n', start)) != -1:
+            parts.append(chunk[start:end])
+            block = ''.join(parts).strip()
+            if block:
+                yield block
+            parts = []
+            start = end + 2
+        if start < len(chunk):
+            parts.append(chunk[start:])
+    block = ''.join(parts).strip()
+    if block:
+        yield block
+
 class BlockType(Enum):
     PARAGRAPH = 'paragraph'
     HEADING = 'heading'
@@ -23,29 +61,203 @@ class BlockType(Enum):
     ORDERED_LIST = 'ordered_list'
 
 def block_to_block_type(markdown_block: str) -> BlockType:
-    if re.match(r'^[#]{1,6}\s[^\n]+$', markdown_block):
-        return BlockType.HEADING
-    if re.match(r'(?s)^```.*```$', markdown_block):
-        return BlockType.CODE
-    if re.fullmatch(r'(?:>.*(?:\n|$))+', markdown_block):
-        return BlockType.QUOTE
-    if re.fullmatch(r'(?:- .*(?:\n|$))+', markdown_block):
-        return BlockType.UNORDERED_LIST
-    if is_ordered_numbered_list(markdown_block):
+    # Every block type starts with its own marker character, so a single
+    # check for the matching type decides between it and a paragraph.
+    if not markdown_block:
+        return BlockType.PARAGRAPH
+    first = markdown_block[0]
+    if first in _BLOCK_CHECKS:
+        check, block_type = _BLOCK_CHECKS[first]
+        if check(markdown_block):
+            return block_type
+    elif first.isdecimal() and is_ordered_numbered_list(markdown_block):
         return BlockType.ORDERED_LIST
 
     return BlockType.PARAGRAPH
 
 
+def _is_heading(block: str) -> bool:
+    # 1-6 '#', one whitespace character, then a single non-empty line.
+    prefix = block[:7]
+    level = len(prefix) - len(prefix.lstrip('#'))
+    if level > 6 or level == len(block) or not block[level].isspace():
+        return False
+    end = len(block) - 1 if block.endswith('\n') else len(block)
+    return end > level + 1 and block.find('\n', level + 1, end) == -1
+
+
+def _is_code(block: str) -> bool:
+    end = len(block) - 1 if block.endswith('\n') else len(block)
+    return end >= 6 and block.startswith('```') and block.endswith('```', 0, end)
+
+
+def _every_line_starts_with(block: str, marker: str) -> bool:
+    # Each newline, apart from a single trailing one, must be followed by the
+    # marker. Counting in C avoids both splitting the block into lines and
+    # the backtracking of a line-by-line fullmatch.
+    if not block.startswith(marker):
+        return False
+    newlines = block.count('\n')
+    if block.endswith('\n'):
+        newlines -= 1
+    return newlines == block.count('\n' + marker)
+
+
+def _is_quote(block: str) -> bool:
+    return _every_line_starts_with(block, '>')
+
+
+def _is_unordered_list(block: str) -> bool:
+    return _every_line_starts_with(block, '- ')
+
+
+_BLOCK_CHECKS = {
+    '#': (_is_heading, BlockType.HEADING),
+    '`': (_is_code, BlockType.CODE),
+    '>': (_is_quote, BlockType.QUOTE),
+    '-': (_is_unordered_list, BlockType.UNORDERED_LIST),
+}
+
+_ORDERED_ITEM = re.compile(r'(\d+)\.\s')
+
+
 def is_ordered_numbered_list(s: str) -> bool:
-    lines = s.splitlines()
-    if not lines:
+    # Most blocks that start with a digit are paragraphs that fail on the
+    # first line, so check that before splitting the whole block.
+    m = _ORDERED_ITEM.match(s)
+    if m is None or int(m.group(1)) != 1:
         return False
-    pat = re.compile(r'^(\d+)\.\s')
-    for i, line in enumerate(lines, start=1):
-        m = pat.match(line)
+    for i, line in enumerate(s.splitlines(), start=1):
+        # 'N. ' is by far the most common item prefix; only fall back to the
+        # regex for other whitespace or zero-padded numbers.
+        if line.startswith(f'{i}. '):
+            continue
+        m = _ORDERED_ITEM.match(line)
         if not m:
             return False
         if int(m.group(1)) != i:
             return False
-    return True
\ No newline at end of file
+    return True
+
+
+def markdown_to_html_node(markdown: str) -> ParentNode:
+    children = [block_to_html_node(block) for block in markdown_to_blocks(markdown)]
+    return ParentNode('div', children)
+
+
+def block_to_html_node(block: str) -> HTMLNode:
+    return _BLOCK_BUILDERS[block_to_block_type(block)](block)
+
+
+def block_inline_texts(block: str, block_type: BlockType | None = None) -> list[str]:
+    """Return the inline markdown of block that block_to_html_node renders.
+
+    That is the text with block markers cut off: one string for a heading,
+    quote or paragraph, one per item for a list, and none for code, whose
+    text is not parsed. block_type, if known, saves classifying block again.
+    """
+    if block_type is None:
+        block_type = block_to_block_type(block)
+    return _INLINE_TEXTS[block_type](block)
+
+
+# The functions below take a block already classified as their type, so its
+# markers are known to be where block_to_block_type found them and can be
+# cut off by offset instead of being matched again.
+
+def _heading_level(block: str) -> int:
+    return len(block) - len(block.lstrip('#'))
+
+
+def _heading_texts(block: str) -> list[str]:
+    return [block[_heading_level(block) + 1:]]
+
+
+def _quote_texts(block: str) -> list[str]:
+    return [' '.join([line.lstrip('>').strip() for line in block.split('\n')])]
+
+
+def _unordered_list_texts(block: str) -> list[str]:
+    if _only_newlines(block):
+        # Every line starts with '- ', so splitting on the marker that
+        # follows each newline leaves the items and nothing else.
+        return block.removesuffix('\n')[2:].split('\n- ')
+    return [line[2:] for line in block.splitlines()]
+
+
+def _ordered_list_texts(block: str) -> list[str]:
+    lines = block.removesuffix('\n').split('\n') if _only_newlines(block) else block.splitlines()
+    items = []
+    for number, line in enumerate(lines, start=1):
+        # Line N starts with N, then '.' and one whitespace character,
+        # unless N is zero-padded.
+        width = len(str(number))
+        if line[width] == '.':
+            items.append(line[width + 2:])
+        else:
+            items.append(line[_ORDERED_ITEM.match(line).end():])
+    return items
+
+
+def _paragraph_texts(block: str) -> list[str]:
+    return [block.replace('\n', ' ')]
+
+
+def _code_texts(block: str) -> list[str]:
+    return []
+
+
+def _heading_node(block: str) -> HTMLNode:
+    return ParentNode(f'h{_heading_level(block)}', text_to_children(_heading_texts(block)[0]))
+
+
+def _code_node(block: str) -> HTMLNode:
+    code = block[3:-3].removeprefix('\n')
+    return ParentNode('pre', [textnode.text_node_to_html_node(TextNode(code, TextType.CODE))])
+
+
+def _quote_node(block: str) -> HTMLNode:
+    return ParentNode('blockquote', text_to_children(_quote_texts(block)[0]))
+
+
+def _unordered_list_node(block: str) -> HTMLNode:
+    return ParentNode('ul', [ParentNode('li', text_to_children(item)) for item in _unordered_list_texts(block)])
+
+
+def _ordered_list_node(block: str) -> HTMLNode:
+    return ParentNode('ol', [ParentNode('li', text_to_children(item)) for item in _ordered_list_texts(block)])
+
+
+def _paragraph_node(block: str) -> HTMLNode:
+    return ParentNode('p', text_to_children(_paragraph_texts(block)[0]))
+
+
+_INLINE_TEXTS = {
+    BlockType.HEADING: _heading_texts,
+    BlockType.CODE: _code_texts,
+    BlockType.QUOTE: _quote_texts,
+    BlockType.UNORDERED_LIST: _unordered_list_texts,
+    BlockType.ORDERED_LIST: _ordered_list_texts,
+    BlockType.PARAGRAPH: _paragraph_texts,
+}
+
+_BLOCK_BUILDERS = {
+    BlockType.HEADING: _heading_node,
+    BlockType.CODE: _code_node,
+    BlockType.QUOTE: _quote_node,
+    BlockType.UNORDERED_LIST: _unordered_list_node,
+    BlockType.ORDERED_LIST: _ordered_list_node,
+    BlockType.PARAGRAPH: _paragraph_node,
+}
+
+
+def _only_newlines(block: str) -> bool:
+    # Whether '\n' is the only line break str.splitlines() would find in
+    # block. isascii() is a flag check, and the rest are single scans in C;
+    # anything else goes through splitlines() so lists split the same way.
+    return (block.isascii() and '\r' not in block and '\x0b' not in block and '\x0c' not in block
+            and '\x1c' not in block and '\x1d' not in block and '\x1e' not in block)
+
+
+def text_to_children(text: str) -> list[HTMLNode]:
+    return [textnode.text_node_to_html_node(node) for node in inline_markdown.text_to_textnodes(text)]
@@ -0,0 +1,758 @@
+#python
+
+# Only what a build with nothing to do needs is imported at the top. The
+# modules of optional steps, like search, sitemaps, gzip, static files and
+# sharding, are imported where build_site() runs them: the CLI pays for
+# every import on each run, and bench_startup.py keeps that in check.
+
+import json
+import os
+import time
+
+import instrument
+from block_cache import BlockCache
+from deps import DependencyGraph, load_deps, save_deps
+from fsutil import atomic_writer, bytes_digest, file_digest, remove_file, write_atomic
+from htmlnode import set_escaping
+from page import render_page_with_title, stream_page, stream_title
+from render_cache import RenderCache
+from reports import CompressReport, Report, SearchReport, SitemapReport, SyncReport
+from template import Template, load_template
+
+# Bump whenever a change to the renderer alters the HTML it produces, so
+# existing manifests stop matching and every page is rebuilt once.
+RENDERER_VERSION = '1'
+
+MANIFEST_NAME = '.manifest.json'
+MANIFEST_FORMAT = 5
+
+# Sources at least this many bytes are streamed from disk to their output
+# by stream_source() instead of being rendered whole in memory.
+STREAM_THRESHOLD = 16 << 20
+
+# Every page of the site, written next to the pages once all of them are
+# known: by build_site() for a whole-site build, by merge_shards() otherwise.
+PAGE_LIST_NAME = 'pages.json'
+
+# Upper bound on pages per worker task. Batches are otherwise sized to give
+# each worker a few of them, so a slow page cannot leave the others idle.
+MAX_BATCH_SIZE = 64
+
+
+def renderer_version(escape_html: bool = False) -> str:
+    """Return the version that manifests and block caches are keyed by.
+
+    Escaped and unescaped output differ, so each mode has its own version.
+    """
+    return RENDERER_VERSION + '+escape' if escape_html else RENDERER_VERSION
+
+
+class BuildReport(Report):
+    __slots__ = ('rendered', 'cached', 'unchanged', 'removed', 'errors',
+                 'assets', 'compressed', 'search', 'sitemap', 'reasons')
+
+    def __init__(self) -> None:
+        self.rendered: list[str] = []
+        self.cached: list[str] = []
+        self.unchanged: list[str] = []
+        self.removed: list[str] = []
+        self.errors: list[tuple[str, str]] = []
+        self.assets = SyncReport()
+        self.compressed = CompressReport()
+        self.search = SearchReport()
+        self.sitemap = SitemapReport()
+        # {source: why it was rendered} for every page rendered or taken from the cache.
+        self.reasons: dict[str, str] = {}
+
+
+def output_path_for(source: str) -> str:
+    """Map a content-relative .md path to its public-relative .html path."""
+    return os.path.splitext(source)[0] + '.html'
+
+
+def is_page(source: str) -> bool:
+    """Return whether find_sources() would list the content-relative path source."""
+    return source.endswith('.md') and not any(part.startswith('_') for part in source.split('/'))
+
+
+def find_sources(content_dir: str) -> list[str]:
+    """Return the pages under content_dir, sorted.
+
+    Files and directories whose names start with '_' are left out, so
+    markdown meant only to be included can live next to the pages.
+    """
+    sources = []
+    for directory, dirnames, filenames in os.walk(content_dir):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('_'))
+        for filename in filenames:
+            if filename.endswith('.md') and not filename.startswith('_'):
+                path = os.path.join(directory, filename)
+                sources.append(os.path.relpath(path, content_dir).replace(os.sep, '/'))
+    sources.sort()
+    return sources
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get('format') != MANIFEST_FORMAT:
+        return {}
+    return manifest
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    data = json.dumps(manifest, indent=1, sort_keys=True) + '\n'
+    write_atomic(path, data.encode('utf-8'))
+
+
+def content_path(content_dir: str, path: str) -> str:
+    """Return path relative to content_dir, with forward slashes."""
+    return os.path.relpath(path, content_dir).replace(os.sep, '/')
+
+
+def rebuild_reason(
+    content_dir: str,
+    output_dir: str,
+    source: str,
+    stat: os.stat_result,
+    entry: dict | None,
+    dirty: dict[str, str],
+) -> str | None:
+    """Return why the page at source must be rendered again, or None if its output is current.
+
+    entry is the page's manifest entry from the last build and dirty is
+    DependencyGraph.dirty() of the files changed since. Reasons the whole
+    site is rebuilt for are build_site's business.
+    """
+    if entry is None:
+        return 'new page'
+    if not os.path.exists(os.path.join(output_dir, entry['output'])):
+        return 'output missing'
+    if (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns) and entry['source'] != file_digest(
+            os.path.join(content_dir, source)):
+        return 'source changed'
+    if source in dirty:
+        return f'dependency changed: {dirty[source]}'
+    return None
+
+
+def site_reason(old: dict, version: str, template: Template, graph: DependencyGraph) -> str | None:
+    """Return why every page of the last build must be rendered again, or None."""
+    if not old:
+        return None
+    if old.get('renderer') != version:
+        return 'renderer changed'
+    if old.get('template') != template.digest:
+        changed = [path for path, digest in template.files.items() if graph.template.get(path) != digest]
+        return f'template changed: {changed[0]}' if changed else 'template changed'
+    return None
+
+
+def write_page_list(output_dir: str, pages: dict[str, dict]) -> None:
+    """Write the sorted list of {source, output} for pages, if it changed."""
+    page_list = [{'source': source, 'output': pages[source]['output']} for source in sorted(pages)]
+    data = (json.dumps(page_list, indent=1) + '\n').encode('utf-8')
+    path = os.path.join(output_dir, PAGE_LIST_NAME)
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
+
+
+def build_site(
+    content_dir: str,
+    output_dir: str,
+    template_path: str,
+    jobs: int = 1,
+    cache: BlockCache | None = None,
+    static_dir: str | None = None,
+    hardlink_assets: bool = False,
+    gzip_min_size: int | None = None,
+    escape_html: bool = False,
+    render_cache: RenderCache | None = None,
+    shard: tuple[int, int] | None = None,
+    stream_threshold: int = STREAM_THRESHOLD,
+    search: bool = False,
+    site_url: str | None = None,
+    feed_title: str | None = None,
+    io_concurrency: int = 1,
+) -> BuildReport:
+    """Render content_dir into output_dir, re-rendering only what changed.
+
+    The manifest in output_dir records, per page, the hash and stat of its
+    source, the hash of its output, its title, when that output last
+    changed, and the link targets and ids in it (for links.check_links),
+    alongside the template hash and RENDERER_VERSION shared by all
+    pages. A page is rendered again when its
+    source changed, its output is missing, or the template or renderer
+    changed. Outputs of sources that no longer exist are deleted, including
+    those of pages that failed to render since the output was written.
+
+    The files each page includes are kept in a DependencyGraph (DEPS_NAME
+    in output_dir); a page is also rendered again when one of them changed,
+    and only those pages are. The manifest entry of each page says why it
+    was last rendered, as report.reasons does for this build.
+
+    With jobs > 1 pages are rendered in batches across a process pool. The
+    workers send back encoded HTML and the outputs are written here in source
+    order, so the result is identical to a serial build.
+
+    cache memoizes rendered blocks. Each worker keeps its own copy with the
+    same settings and their hit/miss counts are added to cache.
+
+    static_dir, if given, is mirrored into output_dir by sync_assets before
+    any page is rendered; the manifest keeps its record of synced files.
+
+    gzip_min_size, if given, turns on precompress(): every page and asset
+    of at least that many bytes gets a .gz sidecar, rewritten only when the
+    file changed. Without it, sidecars left by earlier builds are removed.
+
+    escape_html renders with HTML escaping on (see htmlnode.set_escaping).
+    Switching it rebuilds every page; a cache passed in should be keyed by
+    renderer_version(escape_html).
+
+    render_cache, if given, is checked for every page that needs rendering
+    before any worker starts; hits are written out as they are and listed in
+    report.cached. Newly rendered pages are added to it and it is pruned
+    back to its size cap at the end.
+
+    shard, as (i, N), renders only the pages shard_of() assigns to shard i,
+    so N machines can split a site between them and merge_shards() can
+    combine their output directories. Static files are synced by shard 1
+    only; outputs of pages that moved to another shard are deleted.
+
+    Sources of stream_threshold bytes or more are rendered in this process
+    with stream_source(), which keeps memory bounded by the largest block.
+    They skip the block and render caches.
+
+    io_concurrency > 1 has a serial build read sources ahead and write
+    outputs behind while it renders, with that many of each in flight (see
+    render_pipelined). It pays off where file access is slow, as on a
+    network filesystem; a build with jobs > 1 ignores it.
+
+    search keeps a full-text index of the pages under search/ (see
+    update_search_index); only pages rendered this time are tokenized again.
+    A shard build keeps the terms of its pages for merge_shards() to index.
+
+    site_url, if given, turns on sitemap.xml and an Atom feed.xml of the
+    most recently changed pages (see update_sitemap), built from the
+    manifest and rewritten only when their entries changed. A shard build
+    leaves them to merge_shards().
+    """
+    report = BuildReport()
+    started = time.time()
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    old = load_manifest(manifest_path)
+
+    template = load_template(template_path)
+    template_hash = template.digest
+    graph = load_deps(output_dir) if old else DependencyGraph()
+
+    if shard is not None:
+        from shard import shard_of
+
+    def in_shard(source: str) -> bool:
+        return shard is None or shard_of(source, shard[1]) == shard[0]
+
+    assets = {}
+    if static_dir is not None and (shard is None or shard[0] == 1):
+        from assets import sync_assets
+
+        assets, report.assets = sync_assets(static_dir, output_dir, old.get('assets', {}), hardlink=hardlink_assets)
+
+    version = renderer_version(escape_html)
+    old_pages = old.get('pages', {})
+    everything = site_reason(old, version, template, graph)
+    dirty = graph.dirty(graph.refresh(content_dir))
+
+    pages = {}
+    stats = {}
+    for source in filter(in_shard, find_sources(content_dir)):
+        stat = os.stat(os.path.join(content_dir, source))
+        entry = old_pages.get(source)
+        reason = everything if entry is not None and everything else rebuild_reason(
+            content_dir, output_dir, source, stat, entry, dirty)
+        if reason is None:
+            if (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+                entry = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            pages[source] = entry
+            report.unchanged.append(source)
+            continue
+        report.reasons[source] = reason
+        stats[source] = stat
+
+    build_time = None
+    if stats:
+        # Imported here because only rendering a page needs the time, and
+        # sitemap pulls in urllib.parse.
+        from sitemap import format_time
+
+        build_time = format_time(started)
+
+    def record_page(source: str, source_hash: str, output_hash: str, meta: dict) -> None:
+        # A page rendered again to the same HTML, say after a template
+        # change elsewhere, keeps the time its output last changed.
+        previous = old.get('pages', {}).get(source)
+        modified = build_time
+        if previous is not None and previous.get('output_hash') == output_hash:
+            modified = previous['modified']
+        graph.record(source, meta.pop('deps'))
+        pages[source] = {
+            'output': output_path_for(source),
+            'source': source_hash,
+            'size': stats[source].st_size,
+            'mtime_ns': stats[source].st_mtime_ns,
+            'output_hash': output_hash,
+            'modified': modified,
+            'reason': report.reasons[source],
+            **meta,
+        }
+
+    def write_page(source: str, source_hash: str, html: bytes, meta: dict) -> None:
+        write_atomic(os.path.join(output_dir, output_path_for(source)), html)
+        record_page(source, source_hash, bytes_digest(html), meta)
+
+    pending = [source for source, stat in stats.items() if stat.st_size < stream_threshold]
+    streamed = [source for source, stat in stats.items() if stat.st_size >= stream_threshold]
+    if render_cache is not None:
+        candidates, pending = pending, []
+        states = {}
+
+        def include_state(path: str) -> tuple | None:
+            # refresh() has brought the files the graph knows up to date.
+            # A cached page can include others, say on a runner that only
+            # restored the cache, so those are read from the disk once.
+            if path not in states:
+                state = graph.files.get(path)
+                if state is None:
+                    try:
+                        stat = os.stat(os.path.join(content_dir, path))
+                        state = (stat.st_size, stat.st_mtime_ns, file_digest(os.path.join(content_dir, path)))
+                    except OSError:
+                        pass
+                states[path] = state
+            return states[path]
+
+        for source in candidates:
+            # The entry lists the files the page included; get() asks for
+            # each one's digest, and they become the page's reads on a hit.
+            reads = {}
+
+            def include_digest(path: str) -> str | None:
+                state = include_state(path)
+                if state is None:
+                    return None
+                reads[path] = state
+                return state[2]
+
+            source_hash = file_digest(os.path.join(content_dir, source))
+            html = render_cache.get(render_cache.key(version, template_hash, source, source_hash), include_digest)
+            if html is None:
+                pending.append(source)
+                continue
+            with instrument.page(source):
+                meta = page_meta(stream_title(os.path.join(content_dir, source)), html.decode('utf-8'))
+                meta['deps'] = reads
+                write_page(source, source_hash, html, meta)
+                instrument.add_page_bytes(len(html))
+            report.cached.append(source)
+
+    failed = {}
+
+    def page_failed(source: str, message: str) -> None:
+        # The page has no manifest entry until it renders again, but an
+        # output left by an earlier build stays and is still ours to delete.
+        report.errors.append((source, message))
+        graph.record(source, {})
+        if os.path.exists(os.path.join(output_dir, output_path_for(source))):
+            failed[source] = output_path_for(source)
+
+    def accept(source: str, source_hash: str | None, result: bytes | str, meta: dict | None) -> bool:
+        # Take in a render_source() result; return whether there is a page to write.
+        if source_hash is None:
+            page_failed(source, result)
+            return False
+        if render_cache is not None:
+            render_cache.put(render_cache.key(version, template_hash, source, source_hash), result,
+                             {path: state[2] for path, state in meta['deps'].items()})
+        report.rendered.append(source)
+        return True
+
+    if io_concurrency > 1 and (jobs <= 1 or len(pending) <= 1):
+        def written(source: str, source_hash: str, html: bytes, meta: dict) -> None:
+            record_page(source, source_hash, bytes_digest(html), meta)
+
+        render_pipelined(
+            content_dir, output_dir, template, pending, cache, escape_html, io_concurrency, accept, written)
+    else:
+        for rendered in render_pages(content_dir, template, pending, jobs, cache, escape_html):
+            if accept(*rendered):
+                write_page(*rendered)
+
+    for source in streamed:
+        _, source_hash, result, meta = stream_source(content_dir, output_dir, template, source, escape_html)
+        if source_hash is None:
+            page_failed(source, result)
+            continue
+        record_page(source, source_hash, result, meta)
+        report.rendered.append(source)
+
+    if render_cache is not None and render_cache.stored:
+        render_cache.prune()
+
+    owned = {source: entry['output'] for source, entry in old.get('pages', {}).items()}
+    owned.update(old.get('failed', {}))
+    for source, output in sorted(owned.items()):
+        if source in pages:
+            continue
+        if not in_shard(source) or not os.path.exists(os.path.join(content_dir, source)):
+            remove_file(os.path.join(output_dir, output), output_dir)
+            failed.pop(source, None)
+            report.removed.append(source)
+
+    if shard is None:
+        write_page_list(output_dir, pages)
+    graph.retain(pages)
+    graph.template = template.files
+    save_deps(output_dir, graph)
+
+    if search:
+        from search import update_search_index
+
+        report.search = update_search_index(
+            output_dir, pages, lambda sources: index_sources(content_dir, sources), write_index=shard is None)
+    else:
+        from search import remove_search_index
+
+        remove_search_index(output_dir)
+
+    sitemap = None
+    if site_url is not None and shard is None:
+        from sitemap import update_sitemap
+
+        sitemap, report.sitemap = update_sitemap(output_dir, pages, site_url, feed_title, old.get('sitemap'))
+    else:
+        if old.get('sitemap'):
+            from sitemap import remove_sitemap
+
+            report.sitemap.removed = remove_sitemap(output_dir, old['sitemap'])
+        if site_url is not None:
+            # Kept for merge_shards(), which writes the files.
+            sitemap = {'url': site_url, 'title': feed_title, 'files': {}}
+
+    compressed = {}
+    if gzip_min_size is not None:
+        from compress import precompress
+
+        compressed, report.compressed = precompress(output_dir, old.get('gzip', {}), gzip_min_size)
+    elif old.get('gzip'):
+        from compress import remove_sidecars
+
+        report.compressed.removed = remove_sidecars(output_dir, list(old['gzip']))
+
+    save_manifest(manifest_path, {
+        'format': MANIFEST_FORMAT,
+        'renderer': version,
+        'template': template_hash,
+        'pages': pages,
+        'assets': assets,
+        'gzip': compressed,
+        # For merge_shards(), which compresses the files it writes itself.
+        'gzip_min_size': gzip_min_size,
+        'shard': list(shard) if shard is not None else None,
+        'sitemap': sitemap,
+        'failed': failed,
+    })
+    return report
+
+
+class PageExplanation:
+    __slots__ = ('source', 'output', 'last_reason', 'includes', 'included_by', 'template_files', 'reason')
+
+    def __init__(
+        self,
+        source: str,
+        output: str | None,
+        last_reason: str | None,
+        includes: list[str],
+        included_by: list[str],
+        template_files: list[str],
+        reason: str | None,
+    ) -> None:
+        self.source = source
+        # None if source is not a page, like a file only meant to be included.
+        self.output = output
+        # Why the page was last rendered, or None if no build has rendered it.
+        self.last_reason = last_reason
+        # What the page includes, and what includes it, relative to the content directory.
+        self.includes = includes
+        self.included_by = included_by
+        self.template_files = template_files
+        # Why the next build will render the page, or None if its output is current.
+        self.reason = reason
+
+
+def explain_page(
+    content_dir: str,
+    output_dir: str,
+    template_path: str,
+    source: str,
+    escape_html: bool = False,
+) -> PageExplanation:
+    """Say why build_site() last rendered source and whether it would now, without building.
+
+    source is content-relative, like the keys of the manifest. Raises
+    OSError if it does not exist.
+    """
+    stat = os.stat(os.path.join(content_dir, source))
+    old = load_manifest(os.path.join(output_dir, MANIFEST_NAME))
+    template = load_template(template_path)
+    graph = load_deps(output_dir) if old else DependencyGraph()
+    entry = old.get('pages', {}).get(source)
+    includes = list(graph.pages.get(source, ()))
+    if not is_page(source):
+        return PageExplanation(source, None, None, [], graph.users(source), list(template.files), None)
+
+    everything = site_reason(old, renderer_version(escape_html), template, graph)
+    if entry is not None and everything:
+        reason = everything
+    else:
+        # Only this page's files need looking at.
+        mine = DependencyGraph({path: graph.files[path] for path in includes if path in graph.files},
+                               {source: includes})
+        reason = rebuild_reason(content_dir, output_dir, source, stat, entry, mine.dirty(mine.refresh(content_dir)))
+    return PageExplanation(
+        source=source,
+        output=entry['output'] if entry is not None else output_path_for(source),
+        last_reason=entry.get('reason') if entry is not None else None,
+        includes=includes,
+        included_by=graph.users(source),
+        template_files=list(template.files),
+        reason=reason,
+    )
+
+
+def render_pages(
+    content_dir: str,
+    template: Template,
+    sources: list[str],
+    jobs: int = 1,
+    cache: BlockCache | None = None,
+    escape_html: bool = False,
+):
+    """Yield (source, source_hash, html_bytes, meta) for each source, in order.
+
+    meta is page_meta() of the page, plus under 'deps' the files it
+    included as DependencyGraph.record() takes them.
+
+    A page that fails to render yields (source, None, error_message, None).
+    """
+    if jobs <= 1 or len(sources) <= 1:
+        previous = set_escaping(escape_html)
+        try:
+            for source in sources:
+                yield render_source(content_dir, template, source, cache)
+        finally:
+            set_escaping(previous)
+        return
+
+    # Imported here because it pulls in multiprocessing, which a serial build
+    # never needs; it roughly doubles the import time of this module.
+    from concurrent.futures import ProcessPoolExecutor
+
+    cache_settings = None
+    if cache is not None:
+        cache_settings = (cache.max_entries, cache.directory, cache.version)
+    recorder = instrument.active()
+    batch_size = max(1, min(MAX_BATCH_SIZE, len(sources) // (jobs * 4)))
+    batches = [sources[i:i + batch_size] for i in range(0, len(sources), batch_size)]
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(batches)),
+        initializer=_init_worker,
+        initargs=(content_dir, template, cache_settings, recorder is not None, escape_html),
+    ) as pool:
+        for results, cache_stats, profile in pool.map(_render_batch, batches):
+            if cache is not None:
+                cache.hits += cache_stats['hits']
+                cache.disk_hits += cache_stats['disk_hits']
+                cache.misses += cache_stats['misses']
+            if recorder is not None:
+                recorder.merge(profile)
+            yield from results
+
+
+def index_sources(content_dir: str, sources: list[str]) -> dict[str, tuple[str, dict[str, int]]]:
+    """Return {source: (title, term counts)}, leaving out sources that fail to read."""
+    from search import index_source
+
+    indexed = {}
+    for source in sources:
+        try:
+            indexed[source] = index_source(os.path.join(content_dir, source))
+        except (OSError, ValueError):
+            continue
+    return indexed
+
+
+def page_meta(title: str, html: str) -> dict:
+    """Return the manifest fields that describe a rendered page."""
+    # Imported here because links pulls in urllib.parse and html, which a
+    # build that renders nothing never needs.
+    from links import scan_html
+
+    return {'title': title, **scan_html(html)}
+
+
+def render_pipelined(
+    content_dir: str,
+    output_dir: str,
+    template: Template,
+    sources: list[str],
+    cache: BlockCache | None,
+    escape_html: bool,
+    concurrency: int,
+    accept,
+    written,
+) -> None:
+    """Render sources in this thread while run_pipeline() reads and writes them in others.
+
+    Each render_source() result goes to accept(), which returns whether the
+    page is to be written; once it is, written() gets the same result.
+    """
+    # Imported here because it is only needed when the option is on.
+    from pipeline import run_pipeline
+
+    def read(source: str) -> bytes:
+        with open(os.path.join(content_dir, source), 'rb') as f:
+            return f.read()
+
+    def process(source: str, data: bytes | Exception):
+        rendered = render_source(content_dir, template, source, cache, data)
+        if not accept(*rendered):
+            return None, None
+        return (os.path.join(output_dir, output_path_for(source)), rendered[2]), rendered
+
+    def write(output: tuple[str, bytes]) -> None:
+        write_atomic(*output)
+
+    def finish(rendered: tuple | None) -> None:
+        if rendered is not None:
+            written(*rendered)
+
+    previous = set_escaping(escape_html)
+    try:
+        run_pipeline(sources, read, process, write, finish, concurrency)
+    finally:
+        set_escaping(previous)
+
+
+def render_source(
+    content_dir: str,
+    template: Template,
+    source: str,
+    cache: BlockCache | None = None,
+    source_bytes: bytes | Exception | None = None,
+) -> tuple[str, str | None, bytes | str, dict | None]:
+    """Render one page; see render_pages().
+
+    source_bytes, if given, is the source as already read, or the exception
+    reading it raised.
+    """
+    source_path = os.path.join(content_dir, source)
+    reads = {}
+    with instrument.page(source):
+        try:
+            if source_bytes is None:
+                with open(source_path, 'rb') as f:
+                    source_bytes = f.read()
+            elif isinstance(source_bytes, Exception):
+                raise source_bytes
+            html, title = render_page_with_title(
+                source_bytes.decode('utf-8'), template, source, cache, source_file=source_path, reads=reads)
+        except Exception as e:
+            return source, None, f'{type(e).__name__}: {e}', None
+        html_bytes = html.encode('utf-8')
+        instrument.add_page_bytes(len(html_bytes))
+    meta = page_meta(title, html)
+    meta['deps'] = {content_path(content_dir, path): state for path, state in reads.items()}
+    return source, bytes_digest(source_bytes), html_bytes, meta
+
+
+def stream_source(
+    content_dir: str,
+    output_dir: str,
+    template: Template,
+    source: str,
+    escape_html: bool = False,
+) -> tuple[str, str | None, str, dict | None]:
+    """Render source straight into its output file with stream_page().
+
+    Returns (source, source_hash, output_hash, page_meta()), or (source, None,
+    error_message, None) if it fails, in which case the old output is kept.
+    """
+    source_path = os.path.join(content_dir, source)
+    output_path = os.path.join(output_dir, output_path_for(source))
+    from links import LinkScanner
+
+    scanner = LinkScanner()
+    reads = {}
+    previous = set_escaping(escape_html)
+    try:
+        with instrument.page(source), atomic_writer(output_path, encoding='utf-8') as f:
+            def write(chunk: str) -> None:
+                f.write(chunk)
+                scanner.feed(chunk)
+
+            title = stream_page(source_path, write, template, reads=reads)
+        if title is None:
+            title = stream_title(source_path)
+    except Exception as e:
+        return source, None, f'{type(e).__name__}: {e}', None
+    finally:
+        set_escaping(previous)
+    meta = {'title': title, **scanner.meta()}
+    meta['deps'] = {content_path(content_dir, path): state for path, state in reads.items()}
+    return source, file_digest(source_path), file_digest(output_path), meta
+
+
+_worker_content_dir = ''
+_worker_template = None
+_worker_cache = None
+
+
+def _init_worker(
+    content_dir: str,
+    template: Template,
+    cache_settings: tuple | None,
+    instrumented: bool,
+    escape_html: bool,
+) -> None:
+    global _worker_content_dir, _worker_template, _worker_cache
+    _worker_content_dir = content_dir
+    _worker_template = template
+    set_escaping(escape_html)
+    if cache_settings is not None:
+        _worker_cache = BlockCache(*cache_settings)
+    if instrumented:
+        # A forked worker inherits the parent's recorder; start from zero so
+        # counts are not reported twice.
+        instrument.enable().reset()
+
+
+def _render_batch(sources: list[str]) -> tuple[list[tuple[str, str | None, bytes | str, dict | None]], dict[str, int], dict | None]:
+    before = _worker_cache.stats() if _worker_cache is not None else {}
+    results = [render_source(_worker_content_dir, _worker_template, source, _worker_cache) for source in sources]
+    after = _worker_cache.stats() if _worker_cache is not None else {}
+
+    profile = None
+    recorder = instrument.active()
+    if recorder is not None:
+        profile = recorder.to_dict()
+        recorder.reset()
+    return results, {name: count - before[name] for name, count in after.items()}, profile
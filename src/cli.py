@@ -0,0 +1,283 @@
+#python
+
+import argparse
+import sys
+
+# Commands import what they need when they run, so starting the CLI costs
+# little more than starting the interpreter: tooling may call render-one
+# once per file. bench_startup.py keeps an eye on it. main.py is the entry
+# point; the code lives here so it is loaded from cached bytecode instead
+# of being compiled on every run.
+
+
+def build_command(args: argparse.Namespace) -> int:
+    import instrument
+    from block_cache import BlockCache
+    from build import build_site, renderer_version
+    from render_cache import RenderCache
+
+    cache = None
+    if args.block_cache_size > 0:
+        cache = BlockCache(args.block_cache_size, args.block_cache_dir, renderer_version(args.escape_html))
+    render_cache = None
+    if args.render_cache_dir:
+        render_cache = RenderCache(args.render_cache_dir, args.render_cache_size << 20)
+    profiling = args.profile or args.profile_json
+    if profiling:
+        instrument.enable()
+    try:
+        report = build_site(
+            args.content, args.output, args.template,
+            jobs=args.jobs, cache=cache, static_dir=args.static, hardlink_assets=args.hardlink_assets,
+            gzip_min_size=args.gzip_min_size if args.gzip else None, escape_html=args.escape_html,
+            render_cache=render_cache, shard=args.shard, search=args.search,
+            site_url=args.site_url, feed_title=args.feed_title, io_concurrency=args.io_concurrency,
+        )
+    finally:
+        recorder = instrument.disable() if profiling else None
+    for source, message in report.errors:
+        print(f'error: {source}: {message}', file=sys.stderr)
+    print(
+        f'{len(report.rendered)} rendered, {len(report.cached)} cached, {len(report.unchanged)} unchanged, '
+        f'{len(report.removed)} removed, {len(report.errors)} failed'
+    )
+    print(
+        f'assets: {len(report.assets.copied)} copied, {len(report.assets.unchanged)} unchanged, '
+        f'{len(report.assets.removed)} removed'
+    )
+    if args.gzip:
+        print(
+            f'gzip: {len(report.compressed.compressed)} compressed, {len(report.compressed.unchanged)} unchanged, '
+            f'{len(report.compressed.removed)} removed'
+        )
+    if args.search:
+        print(
+            f'search: {len(report.search.indexed)} indexed, {len(report.search.removed)} removed, '
+            f'{len(report.search.shards)} shards rewritten'
+        )
+    if args.site_url:
+        print(
+            f'sitemap: {len(report.sitemap.written)} written, {len(report.sitemap.unchanged)} unchanged, '
+            f'{len(report.sitemap.removed)} removed'
+        )
+    if cache is not None:
+        stats = cache.stats()
+        print(f'block cache: {stats["hits"]} hits, {stats["disk_hits"]} disk hits, {stats["misses"]} misses')
+    if render_cache is not None:
+        stats = render_cache.stats()
+        print(
+            f'render cache: {stats["hits"]} hits, {stats["misses"]} misses, '
+            f'{stats["corrupt"]} corrupt, {stats["stored"]} stored'
+        )
+    if args.profile:
+        print(recorder.summary(), file=sys.stderr)
+    if args.profile_json:
+        with open(args.profile_json, 'w', encoding='utf-8') as f:
+            f.write(recorder.to_json() + '\n')
+    broken = False
+    if (args.check_links or args.check_external) and args.shard is None:
+        broken = report_links(args.output, args.site_url, args.check_external)
+    return 1 if report.errors or broken else 0
+
+
+def check_links_command(args: argparse.Namespace) -> int:
+    return 1 if report_links(args.output, args.site_url, args.external) else 0
+
+
+def report_links(output_dir: str, site_url: str | None, external: bool) -> bool:
+    """Check the links of the site in output_dir and print any broken; return whether there were."""
+    import os
+
+    from build import MANIFEST_NAME, load_manifest
+    from links import check_links
+
+    manifest = load_manifest(os.path.join(output_dir, MANIFEST_NAME))
+    report = check_links(output_dir, manifest.get('pages', {}), manifest.get('assets', {}),
+                         site_url=site_url, external=external)
+    for output, target, reason in report.broken:
+        print(f'broken link: {output}: {target}: {reason}', file=sys.stderr)
+    summary = f'links: {report.links} checked in {report.pages} pages, {len(report.broken)} broken'
+    if external:
+        summary += f'; {report.external} external URLs, {report.external_cached} from cache'
+    print(summary)
+    return bool(report.broken)
+
+
+def explain_command(args: argparse.Namespace) -> int:
+    from build import explain_page
+
+    try:
+        explanation = explain_page(args.content, args.output, args.template, args.source, args.escape_html)
+    except (OSError, ValueError) as e:
+        print(f'error: {args.source}: {e}', file=sys.stderr)
+        return 1
+    if explanation.output is None:
+        print(f'{explanation.source}: not a page')
+        print(f'included by: {", ".join(explanation.included_by) or "nothing"}')
+        return 0
+    print(f'{explanation.source} -> {explanation.output}')
+    print(f'last rendered: {explanation.last_reason or "never"}')
+    print(f'includes: {", ".join(explanation.includes) or "nothing"}')
+    if explanation.included_by:
+        print(f'included by: {", ".join(explanation.included_by)}')
+    print(f'template: {", ".join(explanation.template_files)}')
+    if explanation.reason is None:
+        print('next build: up to date')
+    else:
+        print(f'next build: renders it, {explanation.reason}')
+    return 0
+
+
+def render_one_command(args: argparse.Namespace) -> int:
+    from fsutil import atomic_writer
+    from htmlnode import set_escaping
+    from page import stream_page
+    from template import load_template
+
+    set_escaping(args.escape_html)
+    template = load_template(args.template)
+    try:
+        if args.output == '-':
+            stream_page(args.source, sys.stdout.write, template)
+        else:
+            with atomic_writer(args.output, encoding='utf-8') as f:
+                stream_page(args.source, f.write, template)
+    except Exception as e:
+        print(f'error: {args.source}: {type(e).__name__}: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def bench_command(args: argparse.Namespace) -> int:
+    import benchmark
+
+    return benchmark.main(args.extra)
+
+
+def merge_command(args: argparse.Namespace) -> int:
+    from merge import merge_shards
+
+    report = merge_shards(args.shards, args.output, args.hardlink)
+    for conflict in report.conflicts:
+        print(f'conflict: {conflict}', file=sys.stderr)
+    if report.conflicts:
+        return 1
+    print(
+        f'{report.pages} pages: {len(report.copied)} files copied, {len(report.unchanged)} unchanged, '
+        f'{len(report.removed)} removed'
+    )
+    return 0
+
+
+def serve_command(args: argparse.Namespace) -> int:
+    from serve import serve
+
+    serve(args.content, args.output, args.template, args.static, args.host, args.port, args.interval, args.jobs,
+          args.escape_html)
+    return 0
+
+
+def shard_argument(text: str) -> tuple[int, int]:
+    from shard import parse_shard
+
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def add_site_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--content', default='content', help='markdown source directory')
+    parser.add_argument('--output', default='public', help='output directory')
+    parser.add_argument('--template', default='template.html', help='page template')
+    parser.add_argument('--static', default='static', help='static files copied as-is into the output')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--escape-html', action='store_true',
+                        help='escape &, < and > in text and quotes in attributes')
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='static_site')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='render content/ into public/')
+    add_site_arguments(build_parser)
+    build_parser.add_argument('--block-cache-size', type=int, default=4096, metavar='N',
+                              help='rendered blocks to keep in memory, 0 disables the cache')
+    build_parser.add_argument('--block-cache-dir', metavar='DIR',
+                              help='also store rendered blocks on disk for later builds')
+    build_parser.add_argument('--render-cache-dir', metavar='DIR',
+                              help='reuse whole rendered pages from this directory, which may be shared between machines')
+    build_parser.add_argument('--render-cache-size', type=int, default=512, metavar='MB',
+                              help='size cap for --render-cache-dir (default: %(default)s)')
+    build_parser.add_argument('--shard', type=shard_argument, metavar='I/N',
+                              help='render only the I-th of N partitions of the pages, for merge')
+    build_parser.add_argument('--io-concurrency', type=int, default=1, metavar='N',
+                              help='read and write up to N files at once while rendering, for slow or network '
+                                   'filesystems; used without --jobs (default: %(default)s)')
+    build_parser.add_argument('--hardlink-assets', action='store_true',
+                              help='hard link static files into the output instead of copying them')
+    build_parser.add_argument('--gzip', action='store_true',
+                              help='write a precompressed .gz next to each html, css, js and other text file')
+    build_parser.add_argument('--gzip-min-size', type=int, default=1024, metavar='BYTES',
+                              help='smallest file to precompress (default: %(default)s)')
+    build_parser.add_argument('--search', action='store_true',
+                              help='write a full-text search index of the pages to search/')
+    build_parser.add_argument('--site-url', metavar='URL',
+                              help='write sitemap.xml and an Atom feed.xml with page URLs under URL')
+    build_parser.add_argument('--feed-title', help='title of feed.xml (default: the site URL)')
+    build_parser.add_argument('--check-links', action='store_true',
+                              help='check internal links and anchors after building; fail if any are broken')
+    build_parser.add_argument('--check-external', action='store_true',
+                              help='also request external URLs; implies --check-links')
+    build_parser.add_argument('--profile', action='store_true',
+                              help='print per-stage and per-page timings to stderr')
+    build_parser.add_argument('--profile-json', metavar='FILE',
+                              help='write per-stage and per-page timings as JSON')
+    build_parser.set_defaults(handler=build_command)
+
+    render_parser = commands.add_parser('render-one', help='render a single markdown file')
+    render_parser.add_argument('source', help='markdown file')
+    render_parser.add_argument('-o', '--output', default='-', help='output file, - for stdout (default)')
+    render_parser.add_argument('--template', default='template.html', help='page template')
+    render_parser.add_argument('--escape-html', action='store_true',
+                               help='escape &, < and > in text and quotes in attributes')
+    render_parser.set_defaults(handler=render_one_command)
+
+    # Everything after "bench", --help included, goes to benchmark.py.
+    bench_parser = commands.add_parser('bench', add_help=False, help='time each stage of the pipeline')
+    bench_parser.set_defaults(handler=bench_command)
+
+    merge_parser = commands.add_parser('merge', help='combine the outputs of build --shard runs')
+    merge_parser.add_argument('shards', nargs='+', metavar='SHARD_DIR', help='output directory of each shard')
+    merge_parser.add_argument('--output', default='public', help='merged output directory')
+    merge_parser.add_argument('--hardlink', action='store_true', help='hard link files instead of copying them')
+    merge_parser.set_defaults(handler=merge_command)
+
+    links_parser = commands.add_parser('check-links', help='check the links of a built site')
+    links_parser.add_argument('--output', default='public', help='built output directory')
+    links_parser.add_argument('--site-url', metavar='URL',
+                              help='treat absolute links under URL as internal, and root-relative ones as under its path')
+    links_parser.add_argument('--external', action='store_true', help='also request external URLs')
+    links_parser.set_defaults(handler=check_links_command)
+
+    explain_parser = commands.add_parser('explain', help='say why a page was rendered and whether it will be again')
+    explain_parser.add_argument('source', help='page, relative to the content directory')
+    add_site_arguments(explain_parser)
+    explain_parser.set_defaults(handler=explain_command)
+
+    serve_parser = commands.add_parser('serve', help='serve public/ and rebuild when sources change')
+    add_site_arguments(serve_parser)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--interval', type=float, default=0.25, help='seconds between change checks')
+    serve_parser.set_defaults(handler=serve_command)
+
+    args, extra = parser.parse_known_args(argv)
+    if args.command != 'bench' and extra:
+        parser.error(f'unrecognized arguments: {" ".join(extra)}')
+    args.extra = extra
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
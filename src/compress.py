@@ -0,0 +1,102 @@
+#python
+
+import os
+import struct
+import zlib
+
+from fsutil import bytes_digest, remove_file, write_atomic
+from reports import CompressReport
+
+COMPRESSIBLE = ('.html', '.css', '.js', '.svg', '.xml', '.json', '.txt')
+
+# Gzip header with no file name, an mtime of 0 and an "unknown" OS byte, so
+# the same input always produces the same bytes on every platform. Byte 8
+# is the extra-flags field, filled in per level.
+_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+
+def gzip_bytes(data: bytes, level: int = 9) -> bytes:
+    """Gzip data with a fixed header so identical input gives identical output."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    body = compressor.compress(data) + compressor.flush()
+    extra_flags = 2 if level == 9 else 4 if level == 1 else 0
+    header = _HEADER[:8] + bytes([extra_flags]) + _HEADER[9:]
+    trailer = struct.pack('<II', zlib.crc32(data), len(data) & 0xffffffff)
+    return header + body + trailer
+
+
+def find_compressible(output_dir: str, min_size: int) -> dict[str, os.stat_result]:
+    """Return {relative path: stat} for the files under output_dir worth compressing."""
+    files = {}
+    for directory, dirnames, filenames in os.walk(output_dir):
+        dirnames.sort()
+        for filename in filenames:
+            # Dotfiles are build bookkeeping such as the manifest.
+            if filename.startswith('.') or not filename.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            if stat.st_size >= min_size:
+                files[os.path.relpath(path, output_dir).replace(os.sep, '/')] = stat
+    return files
+
+
+def precompress(
+    output_dir: str,
+    previous: dict[str, list],
+    min_size: int = 1024,
+    level: int = 9,
+    threads: int = 8,
+) -> tuple[dict[str, list], CompressReport]:
+    """Write a .gz sidecar next to every compressible file of min_size bytes or more.
+
+    previous is the record returned by the last run, {path: [size,
+    mtime_ns, sha256]}. A file whose size and mtime match that record, or
+    whose content hash does, keeps its existing sidecar. Sidecars recorded
+    for files that are gone or now too small are removed. Compression runs
+    in a thread pool; zlib releases the GIL while it works.
+    """
+    report = CompressReport()
+    record = {}
+    pending = []
+    for relative, stat in find_compressible(output_dir, min_size).items():
+        entry = previous.get(relative)
+        sidecar = os.path.join(output_dir, relative + '.gz')
+        if entry is not None and os.path.exists(sidecar):
+            if entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                record[relative] = entry
+                report.unchanged.append(relative)
+                continue
+        pending.append((relative, stat, entry))
+
+    def compress(item: tuple) -> tuple[str, list, bool]:
+        relative, stat, entry = item
+        path = os.path.join(output_dir, relative)
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = bytes_digest(data)
+        sidecar = path + '.gz'
+        if entry is not None and entry[2] == digest and os.path.exists(sidecar):
+            return relative, [stat.st_size, stat.st_mtime_ns, digest], False
+        write_atomic(sidecar, gzip_bytes(data, level))
+        return relative, [stat.st_size, stat.st_mtime_ns, digest], True
+
+    if pending:
+        # Imported only when there is work, as in sync_assets().
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            for relative, entry, written in pool.map(compress, pending):
+                record[relative] = entry
+                (report.compressed if written else report.unchanged).append(relative)
+
+    report.removed = remove_sidecars(output_dir, [relative for relative in previous if relative not in record])
+    return record, report
+
+
+def remove_sidecars(output_dir: str, relatives: list[str]) -> list[str]:
+    """Delete the .gz sidecars of relatives, returning the paths in sorted order."""
+    removed = sorted(relatives)
+    for relative in removed:
+        remove_file(os.path.join(output_dir, relative + '.gz'), output_dir)
+    return removed
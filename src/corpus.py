@@ -0,0 +1,129 @@
+#python
+
+# Reproducible synthetic Markdown for benchmarks.
+#
+# Each kind stresses a different part of the pipeline. A corpus is a list of
+# documents built from a seeded random.Random, so the same arguments always
+# produce the same text.
+
+import random
+
+WORDS = (
+    'static site build render block inline parse node tree page content '
+    'markdown html link image code quote list heading paragraph fast slow '
+    'cache index output source template theme write read stream token'
+).split()
+
+KINDS = ('mixed', 'links', 'code', 'lists', 'quotes')
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def _link(rng: random.Random) -> str:
+    return f'[{_words(rng, 2)}](https://example.com/{rng.choice(WORDS)}/{rng.randrange(10_000)})'
+
+
+def _image(rng: random.Random) -> str:
+    return f'![{_words(rng, 2)}](/images/{rng.randrange(10_000)}.png)'
+
+
+def _inline_sentence(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(4, 9)):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f'**{_words(rng, 2)}**')
+        elif roll < 0.2:
+            parts.append(f'_{_words(rng, 2)}_')
+        elif roll < 0.3:
+            parts.append(f'`{rng.choice(WORDS)}()`')
+        elif roll < 0.38:
+            parts.append(_link(rng))
+        elif roll < 0.4:
+            parts.append(_image(rng))
+        else:
+            parts.append(_words(rng, rng.randint(2, 6)))
+    return ' '.join(parts) + '.'
+
+
+def _paragraph(rng: random.Random) -> str:
+    return '\n'.join(_inline_sentence(rng) for _ in range(rng.randint(2, 5)))
+
+
+def _heading(rng: random.Random) -> str:
+    return '#' * rng.randint(1, 6) + ' ' + _words(rng, rng.randint(2, 6)).title()
+
+
+def _code(rng: random.Random, lines: int) -> str:
+    body = '\n'.join(f'{rng.choice(WORDS)}_{i} = {rng.choice(WORDS)}({i}, "{_words(rng, 2)}")' for i in range(lines))
+    return f'```\n{body}\n```'
+
+
+def _unordered(rng: random.Random, items: int) -> str:
+    return '\n'.join(f'- {_inline_sentence(rng)}' for _ in range(items))
+
+
+def _ordered(rng: random.Random, items: int) -> str:
+    return '\n'.join(f'{i}. {_inline_sentence(rng)}' for i in range(1, items + 1))
+
+
+def _quote(rng: random.Random, lines: int) -> str:
+    return '\n'.join(f'> {_inline_sentence(rng)}' for _ in range(lines))
+
+
+def _link_roundup(rng: random.Random) -> str:
+    return ' '.join(f'{_link(rng)} {_words(rng, 2)}' for _ in range(rng.randint(50, 200)))
+
+
+def _next_block(rng: random.Random, kind: str) -> str:
+    if kind == 'links':
+        return _link_roundup(rng) if rng.random() < 0.7 else _paragraph(rng)
+    if kind == 'code':
+        return _code(rng, rng.randint(5, 60)) if rng.random() < 0.6 else _paragraph(rng)
+    if kind == 'lists':
+        if rng.random() < 0.5:
+            return _unordered(rng, rng.randint(20, 300))
+        return _ordered(rng, rng.randint(20, 300))
+    if kind == 'quotes':
+        return _quote(rng, rng.randint(200, 2000))
+
+    roll = rng.random()
+    if roll < 0.15:
+        return _heading(rng)
+    if roll < 0.25:
+        return _code(rng, rng.randint(3, 20))
+    if roll < 0.35:
+        return _unordered(rng, rng.randint(2, 8))
+    if roll < 0.42:
+        return _ordered(rng, rng.randint(2, 8))
+    if roll < 0.5:
+        return _quote(rng, rng.randint(1, 5))
+    return _paragraph(rng)
+
+
+def generate_document(kind: str, size: int, seed: int = 0) -> str:
+    """Return a document of roughly size characters made of kind blocks."""
+    if kind not in KINDS:
+        raise ValueError(f'unknown corpus kind: {kind}')
+    rng = random.Random(f'{kind}:{seed}')
+    blocks = [f'# {kind.title()} document {seed}']
+    length = len(blocks[0])
+    while length < size:
+        block = _next_block(rng, kind)
+        blocks.append(block)
+        length += len(block) + 2
+    return '\n\n'.join(blocks) + '\n'
+
+
+def generate_corpus(mix: dict[str, int], documents: int, size: int, seed: int = 0) -> list[str]:
+    """Return documents split across kinds in proportion to their weight in mix."""
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError('corpus mix needs at least one positive weight')
+    corpus = []
+    for kind, weight in sorted(mix.items()):
+        count = round(documents * weight / total)
+        corpus.extend(generate_document(kind, size, seed + i) for i in range(count))
+    return corpus
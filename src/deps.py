@@ -0,0 +1,147 @@
+#python
+
+# The dependency graph: every file each page read while it was rendered.
+#
+# A page depends on its source, on the template and the partials the
+# template pulls in, and on the markdown files its source includes, directly
+# or through other includes. Sources are tracked by the manifest and the
+# template by its digest, which covers its partials; the graph holds the
+# rest. On disk it is one table of files, each with the size, mtime and
+# digest it had when last read, and per page a list of indexes into that
+# table, so a partial that thousands of pages include is stored once.
+
+import json
+import os
+from collections.abc import Iterable
+
+from fsutil import file_digest, write_atomic
+
+DEPS_NAME = '.deps.json'
+DEPS_FORMAT = 1
+
+
+class DependencyGraph:
+    """Which files, relative to the content directory, each page read.
+
+    files maps a path to (size, mtime_ns, digest) as last read. A digest of
+    '' means pages read it with different contents during one build, so it
+    counts as changed the next time round.
+    """
+
+    __slots__ = ('files', 'pages', 'template')
+
+    def __init__(self, files: dict | None = None, pages: dict | None = None, template: dict | None = None) -> None:
+        self.files = files if files is not None else {}
+        self.pages = pages if pages is not None else {}
+        # {path: digest} of the template files, to say which one changed.
+        self.template = template if template is not None else {}
+
+    def record(self, source: str, reads: dict) -> None:
+        """Set the files source read to reads, {path: (size, mtime_ns, digest)}."""
+        for path, state in reads.items():
+            known = self.files.get(path)
+            if known is not None and known[2] != state[2]:
+                state = (state[0], state[1], '')
+            self.files[path] = tuple(state)
+        if reads:
+            self.pages[source] = sorted(reads)
+        else:
+            self.pages.pop(source, None)
+
+    def reads(self, source: str) -> dict | None:
+        """Return what source read as record() took it, or None if a file is gone."""
+        reads = {}
+        for path in self.pages.get(source, ()):
+            state = self.files.get(path)
+            if state is None:
+                return None
+            reads[path] = state
+        return reads
+
+    def refresh(self, content_dir: str) -> set[str]:
+        """Bring the files up to date with the disk and return the paths whose contents changed.
+
+        Files are hashed only when their size or mtime moved. Files that are
+        gone are dropped from the table.
+        """
+        changed = set()
+        for path, (size, mtime_ns, digest) in list(self.files.items()):
+            try:
+                stat = os.stat(os.path.join(content_dir, path))
+            except OSError:
+                del self.files[path]
+                changed.add(path)
+                continue
+            if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) and digest:
+                continue
+            current = file_digest(os.path.join(content_dir, path))
+            if current != digest:
+                changed.add(path)
+            self.files[path] = (stat.st_size, stat.st_mtime_ns, current)
+        return changed
+
+    def dirty(self, changed: set[str]) -> dict[str, str]:
+        """Return {source: the first changed path it read} for the pages that read any of changed."""
+        dirty = {}
+        if changed:
+            for source, paths in self.pages.items():
+                for path in paths:
+                    if path in changed:
+                        dirty[source] = path
+                        break
+        return dirty
+
+    def users(self, path: str) -> list[str]:
+        """Return the pages that read path, sorted."""
+        return sorted(source for source, paths in self.pages.items() if path in paths)
+
+    def retain(self, sources: Iterable[str]) -> None:
+        """Forget the pages not in sources, and the files no page read."""
+        keep = set(sources)
+        self.pages = {source: paths for source, paths in self.pages.items() if source in keep}
+        used = {path for paths in self.pages.values() for path in paths}
+        self.files = {path: state for path, state in self.files.items() if path in used}
+
+    def to_json(self) -> dict:
+        paths = sorted(self.files)
+        index = {path: i for i, path in enumerate(paths)}
+        return {
+            'format': DEPS_FORMAT,
+            'template': self.template,
+            'files': [[path, *self.files[path]] for path in paths],
+            'pages': {source: [index[path] for path in paths_read] for source, paths_read in self.pages.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'DependencyGraph':
+        paths = [row[0] for row in data['files']]
+        return cls(
+            {row[0]: tuple(row[1:]) for row in data['files']},
+            {source: [paths[i] for i in indexes] for source, indexes in data['pages'].items()},
+            data['template'],
+        )
+
+
+def load_deps(output_dir: str) -> DependencyGraph:
+    """Return the graph saved in output_dir, or an empty one."""
+    try:
+        with open(os.path.join(output_dir, DEPS_NAME), encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') == DEPS_FORMAT:
+            return DependencyGraph.from_json(data)
+    except (FileNotFoundError, ValueError, KeyError, IndexError, TypeError):
+        pass
+    return DependencyGraph()
+
+
+def save_deps(output_dir: str, graph: DependencyGraph) -> None:
+    """Write graph to output_dir, unless it is already there as it is."""
+    data = (json.dumps(graph.to_json(), separators=(',', ':'), sort_keys=True) + '\n').encode('utf-8')
+    path = os.path.join(output_dir, DEPS_NAME)
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
@@ -0,0 +1,62 @@
+#python
+
+import contextlib
+import hashlib
+import os
+import tempfile
+
+
+def bytes_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write data to path so readers only ever see the old or new contents."""
+    with atomic_writer(path) as f:
+        f.write(data)
+
+
+@contextlib.contextmanager
+def atomic_writer(path: str, encoding: str | None = None):
+    """Open a temporary file that replaces path when the with block succeeds.
+
+    The file is binary unless encoding is given. If the block raises, path
+    is left as it was and the temporary file is removed.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        if encoding is None:
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding=encoding, newline='')
+        with f:
+            yield f
+        # mkstemp creates the file as 0600; outputs are meant to be served.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def remove_file(path: str, root: str) -> None:
+    """Remove path and any directories it leaves empty, up to root."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
@@ -1,6 +1,61 @@
 #python
 
+import functools
+
+_escaping = False
+
+
+def set_escaping(enabled: bool) -> bool:
+    """Turn HTML escaping of leaf values and props on or off, returning the old setting.
+
+    Off by default, so values are written exactly as given.
+    """
+    global _escaping
+    previous, _escaping = _escaping, enabled
+    return previous
+
+
+def escaping_enabled() -> bool:
+    return _escaping
+
+
+def escape_text(text: str) -> str:
+    """Escape &, < and > in text, returning text itself when none occur."""
+    # Membership tests scan without allocating, so clean strings (the common
+    # case) come back untouched and replace() only runs for characters that
+    # are present. Unrolled, this beats both html.escape and str.translate,
+    # which is slow when it maps characters to multi-character strings.
+    # '&' goes first so the entities added below are not escaped again.
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    """Escape value for use inside a double- or single-quoted attribute."""
+    value = escape_text(value)
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if "'" in value:
+        value = value.replace("'", '&#x27;')
+    return value
+
+
+def _escape_props(items) -> str:
+    # Values are stringified first, as unescaped output does with them.
+    return ''.join(f' {k}="{escape_attribute(str(v))}"' for k, v in items)
+
+
+_escaped_props = functools.lru_cache(maxsize=4096)(_escape_props)
+
+
 class HTMLNode:
+    __slots__ = ('tag', 'value', 'children', 'props')
+
     def __init__(self, tag: str | None = None, value: str | None = None, children: list | None = None, props: dict | None = None) -> None:
         self.tag = tag
         self.value = value
@@ -10,15 +65,30 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError('not implemented yet')
 
+    def render_into(self, write) -> None:
+        """Write the HTML for this node to write() one chunk at a time."""
+        raise NotImplementedError('not implemented yet')
+
     def props_to_html(self):
         if not self.props:
             return ''    
+        if _escaping:
+            # Links and images repeat the same props across pages, so the
+            # escaped string is cached by the props' contents.
+            items = tuple(self.props.items())
+            try:
+                return _escaped_props(items)
+            except TypeError:
+                # A value that cannot be hashed cannot be a cache key.
+                return _escape_props(items)
         return ' ' + ' '.join(f'{k}="{v}"' for k, v in self.props.items())
     
     def __repr__(self) -> str:
         return f'HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})'
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str | None, value: str, props: dict | None = None) -> None:
         super().__init__(tag, value, None, props)
     
@@ -26,37 +96,54 @@ class LeafNode(HTMLNode):
         # return super().to_html() # Include if I want to keep the parent logic?
         if self.value is None:
             raise ValueError('no value provided')
+        value = escape_text(self.value) if _escaping else self.value
         if self.tag is None:
-            return self.value
+            return value
         html_props = self.props_to_html()
         start_tag = f'<{self.tag}{html_props}>'
         end_tag = f'</{self.tag}>'
 
-        return f'{start_tag}{self.value}{end_tag}'
+        return f'{start_tag}{value}{end_tag}'
+
+    def render_into(self, write) -> None:
+        write(self.to_html())
     
     def __repr__(self) -> str:
         return f'LeafNode({self.tag}, {self.value}, {self.props})'
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list[HTMLNode], props: dict | None = None) -> None:
         super().__init__(tag, None, children, props)
 
     def to_html(self):
         # return super().to_html()
-        if self.tag is None:
-            raise ValueError('no tag provided')
-        if self.children is None:
-            raise ValueError('no children provided')
-        
-        html_props = self.props_to_html()
-        start_tag = f'<{self.tag}{html_props}>'
-        end_tag = f'</{self.tag}>'
+        chunks = []
+        self.render_into(chunks.append)
+        return ''.join(chunks)
 
-        all_children = ''
-        for child in self.children:
-            all_children += child.to_html()
+    def render_into(self, write) -> None:
+        # Walk the tree with an explicit stack so deeply nested lists and
+        # quotes cannot hit the recursion limit. Closing tags are pushed as
+        # plain strings and written when they come back off the stack.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if type(node) is str:
+                write(node)
+                continue
+            if not isinstance(node, ParentNode):
+                node.render_into(write)
+                continue
+            if node.tag is None:
+                raise ValueError('no tag provided')
+            if node.children is None:
+                raise ValueError('no children provided')
+
+            write(f'<{node.tag}{node.props_to_html()}>')
+            stack.append(f'</{node.tag}>')
+            stack.extend(reversed(node.children))
 
-        return f'{start_tag}{all_children}{end_tag}'
-    
     def __repr__(self) -> str:
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
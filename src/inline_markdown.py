@@ -2,6 +2,9 @@
 import re
 from textnode import TextNode, TextType
 
+_IMAGE_PATTERN = re.compile(r'!\[([^\[\]]*)\]\(([^\(\)]*)\)')
+_LINK_PATTERN = re.compile(r'(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)')
+
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type:TextType) -> list[TextNode]:
     new_nodes = []
 
@@ -29,79 +32,108 @@ def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type:T
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
     """Return list of (alt_text, url) for all markdown images in text."""
-    matches = re.findall(r'!\[([^\[\]]*)\]\(([^\(\)]*)\)', text)
-    return matches
+    return _IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
     """Return list of (alt_text, url) for all markdown links in text."""
-    matches = re.findall(r'(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)', text)
-    return matches
+    return _LINK_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
-    new_nodes = []
-    
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-
-        working_text = old_node.text
-        extracted = extract_markdown_images(working_text)
-
-        if not extracted:
-            new_nodes.append(old_node)
-            continue
-
-        for node_text, node_link in extracted:
-            sections = working_text.split(f'![{node_text}]({node_link})', 1)
-
-            if len(sections) != 2:
-                raise ValueError('invalid markdown, image section not closed')
-
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(node_text, TextType.IMAGE, node_link))
-
-            working_text = sections[1] if len(sections) > 1 else ''
-
-        if working_text:
-            new_nodes.append(TextNode(working_text, TextType.TEXT))
-
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, _IMAGE_PATTERN, TextType.IMAGE)
 
 def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    return _split_nodes_pattern(old_nodes, _LINK_PATTERN, TextType.LINK)
+
+def _split_nodes_pattern(old_nodes: list[TextNode], pattern: re.Pattern, text_type: TextType) -> list[TextNode]:
     new_nodes = []
-    
+
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
 
-        working_text = old_node.text
-        extracted = extract_markdown_links(working_text)
+        text = old_node.text
+        position = 0
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = end
 
-        if not extracted:
+        if position == 0:
             new_nodes.append(old_node)
-            continue
-
-        for node_text, node_link in extracted:
-            sections = working_text.split(f'[{node_text}]({node_link})', 1)
-
-            if len(sections) != 2:
-                raise ValueError('invalid markdown, link section not closed')
-
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(node_text, TextType.LINK, node_link))
-
-            working_text = sections[1] if len(sections) > 1 else ''
-
-        if working_text:
-            new_nodes.append(TextNode(working_text, TextType.TEXT))
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
 
     return new_nodes
 
+# Inline delimiters in the order the reference passes apply them. A delimiter
+# only splits the text left over by the ones before it, so an earlier entry
+# always wins over a later one.
+_INLINE_DELIMITERS = (
+    ('**', TextType.BOLD),
+    ('_', TextType.ITALIC),
+    ('`', TextType.CODE),
+)
+
 def text_to_textnodes(text: str) -> list[TextNode]:
+    """Split text into inline TextNodes in a single left-to-right walk.
+
+    Produces the same nodes as text_to_textnodes_reference, but works on
+    offsets into the original string instead of re-splitting new TextNodes
+    once per delimiter.
+    """
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    _scan_delimited(text, 0, len(text), 0, nodes)
+    return nodes
+
+def _scan_delimited(text: str, start: int, end: int, level: int, nodes: list[TextNode]) -> None:
+    if level == len(_INLINE_DELIMITERS):
+        _scan_images(text, start, end, nodes)
+        return
+
+    delimiter, text_type = _INLINE_DELIMITERS[level]
+    if text.count(delimiter, start, end) % 2 == 1:
+        raise Exception(f'Error: odd number of delimiters in: {text[start:end]}')
+
+    size = len(delimiter)
+    position = start
+    opening = text.find(delimiter, position, end)
+    while opening != -1:
+        closing = text.find(delimiter, opening + size, end)
+        _scan_delimited(text, position, opening, level + 1, nodes)
+        if closing > opening + size:
+            nodes.append(TextNode(text[opening + size:closing], text_type))
+        position = closing + size
+        opening = text.find(delimiter, position, end)
+    _scan_delimited(text, position, end, level + 1, nodes)
+
+def _scan_images(text: str, start: int, end: int, nodes: list[TextNode]) -> None:
+    position = start
+    for match in _IMAGE_PATTERN.finditer(text, start, end):
+        _scan_links(text, position, match.start(), nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    _scan_links(text, position, end, nodes)
+
+def _scan_links(text: str, start: int, end: int, nodes: list[TextNode]) -> None:
+    position = start
+    for match in _LINK_PATTERN.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        position = match.end()
+    if end > position:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
+
+def text_to_textnodes_reference(text: str) -> list[TextNode]:
+    """Split text into inline TextNodes by chaining the split_nodes_* passes.
+
+    Kept as the reference behaviour for text_to_textnodes.
+    """
     node = [TextNode(text, TextType.TEXT)]
     node = split_nodes_delimiter(node, '**', TextType.BOLD)
     node = split_nodes_delimiter(node, '_', TextType.ITALIC)
@@ -0,0 +1,217 @@
+#python
+
+# Opt-in per-stage and per-page timing.
+#
+# enable() swaps each pipeline stage function for a timing wrapper in its
+# module or class, and disable() puts the originals back. Callers in other
+# modules look the stages up there on every call, never by
+# `from module import stage`, or they would keep calling the original.
+# Nothing is wrapped while recording is off, so the only cost left in a
+# normal build is the page() call made once per page.
+
+import functools
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# (stage, module, attribute, measure) where measure(result) returns the
+# number of nodes the call produced and the UTF-8 size of the output it
+# built. A measure of None is for a render_into() method, which passes its
+# output to a write callable instead of returning it; what it writes is
+# counted.
+#
+# ParentNode.to_html() renders through render_into(), so to_html covers
+# whole pages, cached blocks and streamed pages alike. A page taken whole
+# from the render cache is rendered by none of the stages; render_cache
+# counts its lookups and the bytes of the hits.
+STAGES = (
+    ('blocks', 'block_markdown', 'markdown_to_blocks', lambda result: (len(result), 0)),
+    ('block_type', 'block_markdown', 'block_to_block_type', lambda result: (0, 0)),
+    ('inline', 'inline_markdown', 'text_to_textnodes', lambda result: (len(result), 0)),
+    ('html_nodes', 'textnode', 'text_node_to_html_node', lambda result: (1, 0)),
+    ('to_html', 'htmlnode', 'ParentNode.render_into', None),
+    ('render_cache', 'render_cache', 'RenderCache.get', lambda result: (0, len(result) if result else 0)),
+)
+
+# output is in bytes of UTF-8, for the stages as for the 'page' entry,
+# which counts what was written for the page.
+FIELDS = ('calls', 'seconds', 'nodes', 'output')
+
+
+def _new_stats() -> list:
+    return [0, 0.0, 0, 0]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.stages = {}
+        self.pages = {}
+        self._page = None
+
+    def add(self, stage: str, seconds: float, nodes: int, output: int) -> None:
+        for stats in (self.stages, self._page):
+            if stats is None:
+                continue
+            entry = stats.get(stage)
+            if entry is None:
+                entry = stats[stage] = _new_stats()
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += nodes
+            entry[3] += output
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.pages.clear()
+
+    def to_dict(self) -> dict:
+        def named(stats: dict) -> dict:
+            return {stage: dict(zip(FIELDS, entry)) for stage, entry in stats.items()}
+        return {
+            'stages': named(self.stages),
+            'pages': {page: named(stats) for page, stats in self.pages.items()},
+        }
+
+    def merge(self, data: dict) -> None:
+        """Add the counts from another recorder's to_dict()."""
+        def add_into(target: dict, stats: dict) -> None:
+            for stage, values in stats.items():
+                entry = target.setdefault(stage, _new_stats())
+                for i, name in enumerate(FIELDS):
+                    entry[i] += values[name]
+        add_into(self.stages, data['stages'])
+        for page, stats in data['pages'].items():
+            add_into(self.pages.setdefault(page, {}), stats)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=1, sort_keys=True)
+
+    def summary(self, slowest: int = 10) -> str:
+        lines = [f'{"stage":<12} {"calls":>9} {"ms":>10} {"nodes":>10} {"output":>12}']
+        for stage, (calls, seconds, nodes, output) in self.stages.items():
+            lines.append(f'{stage:<12} {calls:>9} {seconds * 1e3:>10.2f} {nodes:>10} {output:>12}')
+        if self.pages:
+            lines.append('')
+            lines.append(f'slowest pages ({min(slowest, len(self.pages))} of {len(self.pages)})')
+            ranked = sorted(self.pages.items(), key=lambda item: item[1]['page'][1], reverse=True)
+            for page, stats in ranked[:slowest]:
+                calls, seconds, _, size = stats['page']
+                lines.append(f'  {seconds * 1e3:>9.2f} ms {size:>10} bytes  {page}')
+        return '\n'.join(lines)
+
+
+_recorder = None
+_originals = []
+
+
+def active() -> Recorder | None:
+    return _recorder
+
+
+def enable() -> Recorder:
+    """Start recording and return the Recorder that collects the counts."""
+    global _recorder
+    if _recorder is not None:
+        return _recorder
+    _recorder = Recorder()
+    for stage, module_name, attribute, measure in STAGES:
+        owner, name, original = _resolve(module_name, attribute)
+        wrapper = _timed(stage, original, measure) if measure is not None else _timed_writer(stage, original)
+        _originals.append((owner, name, original))
+        setattr(owner, name, wrapper)
+    return _recorder
+
+
+def disable() -> Recorder | None:
+    """Stop recording, restore the original functions and return the Recorder."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+    return recorder
+
+
+@contextmanager
+def recording():
+    recorder = enable()
+    try:
+        yield recorder
+    finally:
+        disable()
+
+
+_NO_PAGE = nullcontext()
+
+
+def page(name: str):
+    """Attribute everything recorded inside the with block to page name."""
+    if _recorder is None:
+        return _NO_PAGE
+    return _page(_recorder, name)
+
+
+@contextmanager
+def _page(recorder: Recorder, name: str):
+    previous = recorder._page
+    recorder._page = recorder.pages.setdefault(name, {})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add('page', time.perf_counter() - start, 0, 0)
+        recorder._page = previous
+
+
+def add_page_bytes(size: int) -> None:
+    """Record the encoded size of the page currently being rendered."""
+    recorder = _recorder
+    if recorder is None or recorder._page is None:
+        return
+    recorder._page.setdefault('page', _new_stats())[3] += size
+    recorder.stages.setdefault('page', _new_stats())[3] += size
+
+
+def _resolve(module_name: str, attribute: str):
+    owner = sys.modules.get(module_name) or __import__(module_name)
+    *path, name = attribute.split('.')
+    for part in path:
+        owner = getattr(owner, part)
+    return owner, name, getattr(owner, name)
+
+
+def _timed(stage: str, func, measure):
+    perf_counter = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = perf_counter() - start
+        recorder = _recorder
+        if recorder is not None:
+            recorder.add(stage, elapsed, *measure(result))
+        return result
+    return wrapper
+
+
+def _timed_writer(stage: str, method):
+    perf_counter = time.perf_counter
+
+    @functools.wraps(method)
+    def wrapper(self, write, *args, **kwargs):
+        # The chunks are only kept, and measured once the call is timed.
+        chunks = []
+
+        def write_and_keep(chunk: str) -> None:
+            chunks.append(chunk)
+            write(chunk)
+
+        start = perf_counter()
+        method(self, write_and_keep, *args, **kwargs)
+        elapsed = perf_counter() - start
+        recorder = _recorder
+        if recorder is not None:
+            recorder.add(stage, elapsed, 0, sum(len(chunk.encode('utf-8')) for chunk in chunks))
+    return wrapper
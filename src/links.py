@@ -0,0 +1,332 @@
+#python
+
+# Link checking over the rendered site.
+#
+# The link and image targets of every page and the ids it defines are taken
+# from its HTML as it is produced (see LinkScanner) and kept in the build
+# manifest, so checking a site is one pass over the manifest against an
+# in-memory index of output paths and anchors; no HTML is read back. The
+# scan runs on the output rather than on text nodes so that pages served
+# from the block or render cache, streamed pages and the template's own
+# links are all covered.
+#
+# External URLs can be checked as well, by a small asyncio HTTP client with
+# bounded concurrency. Successful results are cached between builds for
+# EXTERNAL_CACHE_SECONDS; failures are retried on every check.
+
+import html
+import json
+import os
+import posixpath
+import re
+import time
+from dataclasses import dataclass, field
+from urllib.parse import quote, unquote, urljoin, urlsplit
+
+from fsutil import write_atomic
+
+LINK_CACHE_NAME = '.link-cache.json'
+EXTERNAL_CACHE_SECONDS = 24 * 3600
+EXTERNAL_CONCURRENCY = 16
+EXTERNAL_TIMEOUT = 10.0
+MAX_REDIRECTS = 5
+
+# Attributes are matched after a single space, as the renderer writes them.
+# Allowing any whitespace there makes the scan more than twice as slow; an
+# attribute in the template that follows a line break is not seen.
+_ATTRIBUTE = re.compile(r''' (href|src|id)=(?:"([^"]*)"|'([^']*)')''')
+
+# A tag with attributes. Only these are searched for _ATTRIBUTE, so text
+# that merely reads like an attribute, as in a paragraph about HTML, is not
+# taken for a link.
+_TAG = re.compile(r'<[a-zA-Z][^<>\s]*\s[^<>]*>')
+_SCHEME = re.compile(r'[a-zA-Z][a-zA-Z0-9+.-]*:')
+_EXTERNAL = object()
+_UNCHECKED = object()
+
+
+@dataclass
+class LinkReport:
+    pages: int = 0
+    links: int = 0
+    broken: list[tuple[str, str, str]] = field(default_factory=list)
+    external: int = 0
+    external_cached: int = 0
+
+
+class LinkScanner:
+    """Collect link targets and ids from HTML fed to it a chunk at a time.
+
+    Chunks must not split a tag, which holds for everything render_into()
+    and Template.render_into() write. The contents of <code> elements, code
+    blocks included, are skipped: HTML shown there is not part of the page.
+    """
+    __slots__ = ('links', 'anchors', 'in_code')
+
+    def __init__(self) -> None:
+        self.links = set()
+        self.anchors = set()
+        self.in_code = False
+
+    def feed(self, chunk: str) -> None:
+        start = 0
+        if self.in_code:
+            start = chunk.find('</code>')
+            if start == -1:
+                return
+            self.in_code = False
+        while True:
+            code = chunk.find('<code>', start)
+            self._scan(chunk, start, len(chunk) if code == -1 else code)
+            if code == -1:
+                return
+            end = chunk.find('</code>', code + len('<code>'))
+            if end == -1:
+                self.in_code = True
+                return
+            start = end + len('</code>')
+
+    def _scan(self, chunk: str, start: int, end: int) -> None:
+        if chunk.find('=', start, end) == -1:
+            return
+        for tag in _TAG.finditer(chunk, start, end):
+            for name, double, single in _ATTRIBUTE.findall(tag.group()):
+                value = double or single
+                if '&' in value:
+                    value = html.unescape(value)
+                if name == 'id':
+                    self.anchors.add(value)
+                else:
+                    self.links.add(value)
+
+    def meta(self) -> dict[str, list[str]]:
+        """Return the manifest fields for what was fed so far."""
+        return {'links': sorted(self.links), 'anchors': sorted(self.anchors)}
+
+
+def scan_html(text: str) -> dict[str, list[str]]:
+    scanner = LinkScanner()
+    scanner.feed(text)
+    return scanner.meta()
+
+
+def check_links(
+    output_dir: str,
+    pages: dict[str, dict],
+    assets=(),
+    site_url: str | None = None,
+    external: bool = False,
+    cache_path: str | None = None,
+    concurrency: int = EXTERNAL_CONCURRENCY,
+    timeout: float = EXTERNAL_TIMEOUT,
+) -> LinkReport:
+    """Check the links of pages, the build manifest's {source: entry}.
+
+    A relative or root-relative target must name a page output, an asset or
+    another file in output_dir; a directory means its index.html and a path
+    without an extension may also mean path.html. A #fragment into a page
+    must be the id of an element on it. Absolute URLs under site_url are
+    checked the same way, and root-relative ones are taken relative to its
+    path.
+
+    With external set, other http and https URLs are requested too; results
+    are cached in cache_path (LINK_CACHE_NAME in output_dir by default).
+    report.broken lists (page output, target, reason), sorted.
+    """
+    report = LinkReport()
+    base_path = '/'
+    site_prefix = None
+    if site_url is not None:
+        base_path = urlsplit(site_url).path.rstrip('/') + '/'
+        site_prefix = site_url.rstrip('/') + '/'
+
+    by_output = {entry['output']: entry for entry in pages.values()}
+    files = by_output.keys() | set(assets)
+    anchors = {}
+    resolved = {}
+    verdicts = {}
+    external_pages = {}
+
+    def exists(path: str) -> bool:
+        return path in files or os.path.isfile(os.path.join(output_dir, path))
+
+    def has_anchor(output: str, fragment: str) -> bool:
+        ids = anchors.get(output)
+        if ids is None:
+            ids = anchors[output] = frozenset(by_output[output].get('anchors', ()))
+        return fragment in ids
+
+    def verdict(output: str, directory: str, target: str):
+        # Why target is broken, _EXTERNAL, or None if it is fine.
+        if site_prefix is not None and target.startswith(site_prefix):
+            target = base_path + target[len(site_prefix):]
+        elif target.startswith('//') or _SCHEME.match(target):
+            return _EXTERNAL if target.startswith(('http:', 'https:', '//')) else None
+        path, _, fragment = target.partition('#')
+        path = path.partition('?')[0]
+        if not path:
+            return 'no such anchor' if fragment and not has_anchor(output, fragment) else None
+        key = (directory, path)
+        if key not in resolved:
+            resolved[key] = _resolve(directory, unquote(path), base_path, exists)
+        found = resolved[key]
+        if found is None:
+            return 'no such page or file'
+        if fragment and found in by_output and not has_anchor(found, fragment):
+            return 'no such anchor'
+        return None
+
+    for output in sorted(by_output):
+        links = by_output[output].get('links', ())
+        report.pages += 1
+        report.links += len(links)
+        directory = posixpath.dirname(output)
+        for target in links:
+            # Links other than to the page's own anchors mean the same from
+            # every page in a directory; the template's are checked once.
+            key = (output, target) if target.startswith('#') else (directory, target)
+            reason = verdicts.get(key, _UNCHECKED)
+            if reason is _UNCHECKED:
+                reason = verdicts[key] = verdict(output, directory, target)
+            if reason is _EXTERNAL:
+                external_pages.setdefault(target.partition('#')[0], []).append(output)
+            elif reason is not None:
+                report.broken.append((output, target, reason))
+
+    if external and external_pages:
+        if cache_path is None:
+            cache_path = os.path.join(output_dir, LINK_CACHE_NAME)
+        results, report.external_cached = check_external(list(external_pages), cache_path, concurrency, timeout)
+        report.external = len(results)
+        broken = [(output, url, results[url]) for url, outputs in external_pages.items()
+                  for output in outputs if results[url] is not None]
+        report.broken.extend(broken)
+    report.broken.sort()
+    return report
+
+
+def _resolve(directory: str, path: str, base_path: str, exists) -> str | None:
+    # The output-relative file path refers to, or None if there is none.
+    if path.startswith('/'):
+        if not (path + '/').startswith(base_path):
+            return None
+        path = path[len(base_path):]
+    else:
+        path = posixpath.join(directory, path)
+    is_directory = not path or path.endswith('/')
+    path = posixpath.normpath(path) if path else '.'
+    if path == '..' or path.startswith('../'):
+        return None
+    if path == '.':
+        path, is_directory = '', True
+    if is_directory:
+        candidates = [posixpath.join(path, 'index.html')]
+    elif '.' in posixpath.basename(path):
+        candidates = [path]
+    else:
+        candidates = [path, path + '.html', path + '/index.html']
+    for candidate in candidates:
+        if exists(candidate):
+            return candidate
+    return None
+
+
+def check_external(
+    urls: list[str],
+    cache_path: str,
+    concurrency: int = EXTERNAL_CONCURRENCY,
+    timeout: float = EXTERNAL_TIMEOUT,
+) -> tuple[dict[str, str | None], int]:
+    """Request each URL, returning ({url: None or error}, number answered from the cache)."""
+    # Imported here: asyncio and ssl take longer to import than the rest of
+    # a build's modules together, and most builds never check external links.
+    import asyncio
+
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    now = time.time()
+    cache = {url: checked for url, checked in cache.items() if now - checked < EXTERNAL_CACHE_SECONDS}
+    results = {url: None for url in urls if url in cache}
+    cached = len(results)
+    pending = [url for url in urls if url not in cache]
+    if pending:
+        results.update(asyncio.run(_check_urls(pending, concurrency, timeout)))
+    for url in pending:
+        if results[url] is None:
+            cache[url] = now
+    write_atomic(cache_path, (json.dumps(cache, indent=1, sort_keys=True) + '\n').encode('utf-8'))
+    return results, cached
+
+
+async def _check_urls(urls: list[str], concurrency: int, timeout: float) -> dict[str, str | None]:
+    import asyncio
+    import ssl
+
+    semaphore = asyncio.Semaphore(concurrency)
+    context = ssl.create_default_context()
+
+    async def check(url: str) -> tuple[str, str | None]:
+        async with semaphore:
+            try:
+                status = await asyncio.wait_for(_status(url, context), timeout)
+            except asyncio.TimeoutError:
+                return url, f'no answer in {timeout:g}s'
+            except (OSError, ValueError, UnicodeError) as e:
+                return url, f'{type(e).__name__}: {e}'
+        return url, None if status < 400 else f'HTTP {status}'
+
+    return dict(await asyncio.gather(*(check(url) for url in urls)))
+
+
+async def _status(url: str, context, method: str = 'HEAD', redirects: int = MAX_REDIRECTS) -> int:
+    # The final status of url after following redirects. Servers that refuse
+    # HEAD are asked again with GET; only the headers are read either way.
+    import asyncio
+
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url)
+    secure = parts.scheme == 'https'
+    if parts.hostname is None:
+        raise ValueError(f'no host in {url!r}')
+    path = quote(parts.path or '/', safe="/%:@!$&'()*+,;=-._~")
+    if parts.query:
+        path += '?' + quote(parts.query, safe="/%:@!$&'()*+,;=-._~?")
+    host = parts.hostname.encode('idna').decode('ascii')
+    if parts.port is not None:
+        host += f':{parts.port}'
+
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, parts.port or (443 if secure else 80), ssl=context if secure else None)
+    location = None
+    try:
+        writer.write(
+            f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: static_site link check\r\n'
+            f'Accept: */*\r\nConnection: close\r\n\r\n'.encode('ascii')
+        )
+        await writer.drain()
+        fields = (await reader.readline()).decode('latin-1').split()
+        if len(fields) < 2 or not fields[0].startswith('HTTP/') or not fields[1].isdigit():
+            raise ValueError('not an HTTP response')
+        status = int(fields[1])
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'location':
+                location = value.strip()
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    if 300 <= status < 400 and location:
+        if not redirects:
+            raise ValueError('too many redirects')
+        return await _status(urljoin(url, location), context, method, redirects - 1)
+    if status in (405, 501) and method == 'HEAD':
+        return await _status(url, context, 'GET', redirects)
+    return status
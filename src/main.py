@@ -1,11 +1,8 @@
 #python
 
-from textnode import TextNode, TextType
+import sys
 
-
-def main():
-    node = TextNode('This is a dummy', TextType.LINK, 'https://www.boot.dev')
-    print(node)
+from cli import main
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
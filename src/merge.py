@@ -0,0 +1,189 @@
+#python
+
+import os
+from dataclasses import dataclass, field
+
+from assets import copy_file, link_or_copy
+from compress import precompress
+from build import MANIFEST_FORMAT, MANIFEST_NAME, load_manifest, save_manifest, write_page_list
+from deps import DependencyGraph, load_deps, save_deps
+from fsutil import file_digest, remove_file
+from search import load_state, remove_search_index, update_search_index
+from sitemap import remove_sitemap, update_sitemap
+
+
+@dataclass
+class MergeReport:
+    pages: int = 0
+    copied: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+
+
+def manifest_files(manifest: dict) -> set[str]:
+    """Return every output-relative file a build manifest accounts for."""
+    files = {entry['output'] for entry in manifest.get('pages', {}).values()}
+    files.update(manifest.get('assets', {}))
+    files.update(manifest.get('failed', {}).values())
+    files.update(relative + '.gz' for relative in manifest.get('gzip', {}))
+    return files
+
+
+def merge_shards(shard_dirs: list[str], output_dir: str, hardlink: bool = False) -> MergeReport:
+    """Combine the output directories of a sharded build into output_dir.
+
+    Each directory must hold the manifest of a build_site(shard=(i, N)) run,
+    with every shard from 1 to N present exactly once, all rendered with the
+    same renderer and template. Only files a shard's manifest accounts for
+    are taken from it. A page claimed by two shards, or a file two shards
+    produced with different contents, is a conflict.
+
+    Nothing is written if there are conflicts; they are listed in the
+    report. Otherwise the files are copied (or hard linked) into output_dir,
+    skipping those already there with the same size and mtime, files left
+    from the previous merge that no shard produced are deleted, and the
+    merged manifest, page list and dependency graph are written.
+
+    sitemap.xml and feed.xml are written if the shards were built with a
+    site URL. If every shard was built with search on, the search index is updated
+    from the terms the shards recorded, without reading any source. If the
+    shards were built with gzip on, the files written here get .gz sidecars
+    too, as in a whole build.
+    """
+    report = MergeReport()
+    manifests = [load_manifest(os.path.join(directory, MANIFEST_NAME)) for directory in shard_dirs]
+    report.conflicts = _check_shards(shard_dirs, manifests)
+    if report.conflicts:
+        return report
+
+    pages = {}
+    assets = {}
+    compressed = {}
+    failed = {}
+    owners = {}
+    for directory, manifest in zip(shard_dirs, manifests):
+        for source, entry in manifest.get('pages', {}).items():
+            if source in pages:
+                report.conflicts.append(f'{source}: rendered by more than one shard')
+            pages[source] = entry
+        assets.update(manifest.get('assets', {}))
+        compressed.update(manifest.get('gzip', {}))
+        failed.update(manifest.get('failed', {}))
+        for relative in manifest_files(manifest):
+            owner = owners.setdefault(relative, directory)
+            if owner != directory and file_digest(os.path.join(owner, relative)) != file_digest(
+                    os.path.join(directory, relative)):
+                report.conflicts.append(f'{relative}: differs between {owner} and {directory}')
+    if report.conflicts:
+        return report
+
+    copy = link_or_copy if hardlink else copy_file
+    for relative, directory in sorted(owners.items()):
+        source = os.path.join(directory, relative)
+        target = os.path.join(output_dir, relative)
+        stat = os.stat(source)
+        try:
+            target_stat = os.stat(target)
+        except FileNotFoundError:
+            target_stat = None
+        if target_stat is not None and (target_stat.st_size, target_stat.st_mtime_ns) == (
+                stat.st_size, stat.st_mtime_ns):
+            report.unchanged.append(relative)
+            continue
+        copy(source, target)
+        report.copied.append(relative)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    first = manifests[0]
+    gzip_min_size = first.get('gzip_min_size')
+    stale = manifest_files(previous) - owners.keys()
+    if gzip_min_size is not None:
+        # Left to precompress() below, which keeps the sidecars of the files
+        # written here if they did not change.
+        stale -= {relative + '.gz' for relative in previous.get('gzip', {})}
+    for relative in sorted(stale):
+        remove_file(os.path.join(output_dir, relative), output_dir)
+        report.removed.append(relative)
+
+    write_page_list(output_dir, pages)
+    graph = DependencyGraph(template=load_deps(shard_dirs[0]).template)
+    for directory in shard_dirs:
+        shard_graph = load_deps(directory)
+        for source in shard_graph.pages:
+            graph.record(source, shard_graph.reads(source) or {})
+    graph.retain(pages)
+    save_deps(output_dir, graph)
+    sitemap = first.get('sitemap')
+    if sitemap is not None:
+        sitemap, _ = update_sitemap(output_dir, pages, sitemap['url'], sitemap['title'], previous.get('sitemap'))
+    else:
+        remove_sitemap(output_dir, previous.get('sitemap'))
+    states = [load_state(directory) for directory in shard_dirs]
+    if all(states):
+        indexed = {
+            source: (doc['title'], doc['terms'])
+            for state in states for source, doc in state['docs'].items()
+            if source in pages and doc['hash'] == pages[source]['output_hash']
+        }
+        update_search_index(output_dir, pages, lambda sources: {
+            source: indexed[source] for source in sources if source in indexed})
+    else:
+        remove_search_index(output_dir)
+    if gzip_min_size is not None:
+        # The shards' records describe the copies too, which keep their
+        # mtimes, so only the files written here are compressed again.
+        compressed, gzip_report = precompress(output_dir, {**previous.get('gzip', {}), **compressed}, gzip_min_size)
+        report.removed.extend(relative + '.gz' for relative in gzip_report.removed)
+    save_manifest(manifest_path, {
+        'format': MANIFEST_FORMAT,
+        'renderer': first['renderer'],
+        'template': first['template'],
+        'pages': pages,
+        'assets': assets,
+        'gzip': compressed,
+        'gzip_min_size': gzip_min_size,
+        'shard': None,
+        'sitemap': sitemap,
+        'failed': failed,
+    })
+    report.pages = len(pages)
+    return report
+
+
+def _check_shards(shard_dirs: list[str], manifests: list[dict]) -> list[str]:
+    if not manifests:
+        return ['no shards to merge']
+    conflicts = []
+    seen = {}
+    counts = set()
+    for directory, manifest in zip(shard_dirs, manifests):
+        shard = manifest.get('shard')
+        if not shard:
+            conflicts.append(f'{directory}: not the output of a sharded build')
+            continue
+        index, count = shard
+        counts.add(count)
+        if index in seen:
+            conflicts.append(f'{directory}: shard {index}/{count} is also in {seen[index]}')
+        seen[index] = directory
+    if conflicts:
+        return conflicts
+    if len(counts) != 1:
+        return [f'shards come from builds split {" and ".join(map(str, sorted(counts)))} ways']
+    count = counts.pop()
+    conflicts.extend(f'shard {index}/{count} is missing' for index in range(1, count + 1) if index not in seen)
+    for key in ('renderer', 'template'):
+        if len({manifest[key] for manifest in manifests}) > 1:
+            conflicts.append(f'shards were built with different {key} versions')
+    if len({manifest.get('gzip_min_size') for manifest in manifests}) > 1:
+        conflicts.append('shards were built with different gzip settings')
+    if len({_site_settings(manifest) for manifest in manifests}) > 1:
+        conflicts.append('shards were built with different site URLs or feed titles')
+    return conflicts
+
+
+def _site_settings(manifest: dict) -> tuple[str, str | None] | None:
+    sitemap = manifest.get('sitemap')
+    return None if sitemap is None else (sitemap['url'], sitemap['title'])
@@ -0,0 +1,177 @@
+#python
+
+import os
+from collections.abc import Iterable, Iterator
+
+# markdown_to_blocks and block_to_block_type are called through
+# block_markdown, so that instrument.enable() can swap them for timed
+# wrappers.
+import block_markdown
+from block_cache import BlockCache
+from block_markdown import BlockType, block_to_html_node, iter_markdown_blocks
+from fsutil import file_digest
+from htmlnode import ParentNode, escape_text, escaping_enabled
+from template import INCLUDE_PATTERN, Template, compile_template
+
+
+def extract_title(markdown: str) -> str | None:
+    """Return the text of the first heading block, or None if there is none."""
+    return title_from_blocks(block_markdown.markdown_to_blocks(markdown))
+
+
+def title_from_blocks(blocks: Iterable[str]) -> str | None:
+    for block in blocks:
+        if block_markdown.block_to_block_type(block) == BlockType.HEADING:
+            return block.lstrip('#').strip()
+    return None
+
+
+def render_content(markdown: str, cache: BlockCache | None = None) -> str:
+    return render_blocks(block_markdown.markdown_to_blocks(markdown), cache)
+
+
+def render_blocks(blocks: list[str], cache: BlockCache | None = None) -> str:
+    if cache is None:
+        return ParentNode('div', [block_to_html_node(block) for block in blocks]).to_html()
+    # Same output as the ParentNode above, assembled from per-block
+    # fragments so repeated blocks are rendered once.
+    fragments = [cache.render(block, render_block) for block in blocks]
+    return f'<div>{"".join(fragments)}</div>'
+
+
+def render_block(block: str) -> str:
+    return block_to_html_node(block).to_html()
+
+
+def render_page(
+    markdown: str,
+    template: Template | str,
+    source_path: str = '',
+    cache: BlockCache | None = None,
+    context: dict[str, str] | None = None,
+) -> str:
+    """Render markdown into template's {{ Title }} and {{ Content }} slots.
+
+    The title is the first heading block, or the source file name if there
+    is none; it is escaped when HTML escaping is on. context fills any other
+    slots the template has.
+    """
+    return render_page_with_title(markdown, template, source_path, cache, context)[0]
+
+
+def render_page_with_title(
+    markdown: str,
+    template: Template | str,
+    source_path: str = '',
+    cache: BlockCache | None = None,
+    context: dict[str, str] | None = None,
+    source_file: str | None = None,
+    reads: dict | None = None,
+) -> tuple[str, str]:
+    """Like render_page, but return (html, title) with the title unescaped.
+
+    source_file, the file markdown was read from, turns on includes (see
+    expand_includes); reads is passed on to it.
+    """
+    if isinstance(template, str):
+        template = compile_template(template)
+    blocks = block_markdown.markdown_to_blocks(markdown)
+    if source_file is not None:
+        blocks = list(expand_includes(blocks, source_file, reads))
+    title = page_title(blocks, source_path)
+    values = dict(context) if context else {}
+    values['Title'] = escape_text(title) if escaping_enabled() else title
+    values['Content'] = render_blocks(blocks, cache)
+    return template.render(values), title
+
+
+def expand_includes(
+    blocks: Iterable[str],
+    source_path: str,
+    reads: dict | None = None,
+    including: tuple[str, ...] = (),
+) -> Iterator[str]:
+    """Yield blocks, replacing each include block with the blocks of the file it names.
+
+    An include block is just {{> file }}, with file a path relative to
+    source_path; it may include others in turn. reads, if given, gets
+    {path: (size, mtime_ns, digest)} for every file included, so the build
+    can tell when a page has to be rendered again.
+    """
+    including += (os.path.normpath(source_path),)
+    for block in blocks:
+        match = INCLUDE_PATTERN.fullmatch(block) if block.startswith('{{>') else None
+        if match is None:
+            yield block
+            continue
+        path = os.path.normpath(os.path.join(os.path.dirname(source_path), match.group(1)))
+        if path in including:
+            raise ValueError(f'includes form a cycle: {" -> ".join(including + (path,))}')
+        if reads is not None and path not in reads:
+            stat = os.stat(path)
+            reads[path] = (stat.st_size, stat.st_mtime_ns, file_digest(path))
+        yield from expand_includes(iter_markdown_blocks(read_chunks(path)), path, reads, including)
+
+
+def page_title(blocks: Iterable[str], source_path: str) -> str:
+    """Return the first heading of blocks, or the file name of source_path."""
+    title = title_from_blocks(blocks)
+    if title is None:
+        title = os.path.splitext(os.path.basename(source_path))[0]
+    return title
+
+
+# Characters read from the source at a time by stream_page().
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def read_chunks(path: str, size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    # newline='' keeps \r\n as is, matching a whole-file bytes.decode().
+    with open(path, encoding='utf-8', newline='') as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+def stream_page(
+    source_path: str,
+    write,
+    template: Template | str,
+    context: dict[str, str] | None = None,
+    reads: dict | None = None,
+) -> str | None:
+    """Render the markdown file at source_path like render_page, one block at a time.
+
+    The HTML is passed to write() as it is produced, so memory use is set by
+    the largest block rather than the whole document. The file is read
+    twice: once up to its first heading for the title, then for the content.
+    Returns the unescaped title, or None if the template has no Title slot
+    and it was not looked for. Includes are expanded, and recorded in reads
+    if it is given (see expand_includes).
+    """
+    if isinstance(template, str):
+        template = compile_template(template)
+    title = None
+    if 'Title' in template.slots:
+        title = stream_title(source_path, reads)
+    values = dict(context) if context else {}
+    values['Title'] = escape_text(title) if title is not None and escaping_enabled() else title
+    values['Content'] = lambda write: _stream_content(source_path, write, reads)
+    template.render_into(write, values)
+    return title
+
+
+def stream_title(source_path: str, reads: dict | None = None) -> str:
+    """Return page_title() of the markdown file at source_path, reading no further than needed."""
+    return page_title(stream_blocks(source_path, reads), source_path)
+
+
+def stream_blocks(source_path: str, reads: dict | None = None) -> Iterator[str]:
+    """Yield the blocks of the markdown file at source_path, includes expanded."""
+    return expand_includes(iter_markdown_blocks(read_chunks(source_path)), source_path, reads)
+
+
+def _stream_content(source_path: str, write, reads: dict | None) -> None:
+    write('<div>')
+    for block in stream_blocks(source_path, reads):
+        block_to_html_node(block).render_into(write)
+    write('</div>')
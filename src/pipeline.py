@@ -0,0 +1,93 @@
+#python
+
+# Overlapping file I/O with rendering.
+#
+# On a network filesystem each open, read and write can wait on a round
+# trip, and a serial build spends most of its time waiting rather than
+# rendering. run_pipeline() reads items ahead and writes results behind in
+# a small thread pool driven by asyncio, while the items in between are
+# processed one at a time in the calling thread. Reads, writes and
+# processing then overlap, and at most `concurrency` of each of reads and
+# writes are in flight, so memory stays bounded however many items there
+# are.
+
+IO_CONCURRENCY = 8
+
+
+def run_pipeline(items, read, process, write, finish, concurrency: int = IO_CONCURRENCY) -> None:
+    """Feed each item through read -> process -> write -> finish.
+
+    read(item) and write(output) are called in worker threads; process(item,
+    data) and finish(result) in the calling thread. process gets the items
+    in order, with whatever read returned, or the exception it raised, as
+    data. It returns (output, result): output is passed to write, then
+    result to finish, in the order the writes complete. An output of None
+    skips the write. An exception from process, write or finish stops the
+    pipeline and is raised once the reads and writes in flight are done.
+    """
+    # Imported here: asyncio takes longer to import than the rest of a
+    # build's modules together, and only builds that ask for it need it.
+    import asyncio
+
+    asyncio.run(_pipeline(list(items), read, process, write, finish, max(1, concurrency)))
+
+
+async def _pipeline(items: list, read, process, write, finish, concurrency: int) -> None:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    # Reads and writes each stay within `concurrency`, so they never wait
+    # for a thread.
+    executor = ThreadPoolExecutor(max_workers=2 * concurrency + 1, thread_name_prefix='io')
+    loop.set_default_executor(executor)
+    # Reads are queued as they start, and their data waits there for
+    # process(); a full queue keeps the reader from running further ahead.
+    reads = asyncio.Queue(maxsize=concurrency)
+    reading = asyncio.Semaphore(concurrency)
+    writes = asyncio.Semaphore(concurrency)
+    writing = set()
+
+    def read_or_error(item):
+        try:
+            return read(item)
+        except Exception as e:
+            return e
+
+    async def produce() -> None:
+        for item in items:
+            await reading.acquire()
+            future = asyncio.ensure_future(asyncio.to_thread(read_or_error, item))
+            future.add_done_callback(lambda _: reading.release())
+            await reads.put(future)
+
+    async def write_then_finish(output, result) -> None:
+        try:
+            await asyncio.to_thread(write, output)
+        finally:
+            writes.release()
+        finish(result)
+
+    producer = asyncio.create_task(produce())
+    try:
+        for item in items:
+            data = await (await reads.get())
+            output, result = process(item, data)
+            if output is None:
+                finish(result)
+            else:
+                await writes.acquire()
+                writing.add(asyncio.create_task(write_then_finish(output, result)))
+            # process() runs without yielding; give the reader and writers a
+            # turn so they start the next reads and finish completed writes.
+            await asyncio.sleep(0)
+            for task in [task for task in writing if task.done()]:
+                writing.discard(task)
+                task.result()
+        for task in list(writing):
+            await task
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, *writing, return_exceptions=True)
+        while not reads.empty():
+            await asyncio.gather(reads.get_nowait(), return_exceptions=True)
@@ -0,0 +1,143 @@
+#python
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable
+
+from fsutil import bytes_digest, write_atomic
+
+# First bytes of every entry, followed by the sha256 of the rest and a
+# newline. The rest is a line of JSON, {path: digest} of the files the page
+# included, then the HTML.
+ENTRY_MAGIC = b'static_site page 2 '
+
+# Temp files older than this are left over from a writer that died.
+STALE_TEMP_SECONDS = 3600
+
+
+class RenderCache:
+    """Store whole rendered pages on disk, keyed by what they were rendered from.
+
+    The key covers the renderer version, the template digest, the source path
+    (the title falls back to the file name) and the source hash. The entry
+    itself lists the files the source included and their digests, and is a
+    miss if any of them has changed since. Nothing else in the build feeds
+    into a page, so several machines building the same site can point at one
+    directory, e.g. on a network or overlay filesystem, and reuse each
+    other's pages without any other state.
+
+    Entries are written with write_atomic(), so readers only ever see a
+    complete file. Each starts with the sha256 of the rest; an entry that
+    fails the check is deleted and treated as a miss. Reading an entry
+    touches its mtime, and prune() deletes the least recently used entries
+    until the directory fits in max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 << 20) -> None:
+        if max_bytes < 1:
+            raise ValueError('max_bytes must be at least 1')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.corrupt = 0
+        self.stored = 0
+
+    def key(self, version: str, template_digest: str, source: str, source_hash: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (version, template_digest, source, source_hash):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str, digest: Callable[[str], str | None] | None = None) -> bytes | None:
+        """Return the HTML stored under key, or None if it is missing, damaged or out of date.
+
+        digest(path) is called for each file the page included and returns
+        its digest now, or None if it is gone. Without it, an entry that
+        includes anything is a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        header, _, body = data.partition(b'\n')
+        includes, _, html = body.partition(b'\n')
+        try:
+            if header != ENTRY_MAGIC + bytes_digest(body).encode('ascii'):
+                raise ValueError('checksum mismatch')
+            includes = json.loads(includes)
+        except ValueError:
+            self.corrupt += 1
+            self.misses += 1
+            self._remove(path)
+            return None
+        for included, stored in sorted(includes.items()):
+            if digest is None or digest(included) != stored:
+                self.misses += 1
+                return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Read-only cache mount; the entry just ages as if unused.
+            pass
+        self.hits += 1
+        return html
+
+    def put(self, key: str, html: bytes, includes: dict[str, str] | None = None) -> None:
+        """Store html under key; includes is {path: digest} of the files the page included."""
+        body = json.dumps(includes or {}, separators=(',', ':'), sort_keys=True).encode('utf-8') + b'\n' + html
+        header = ENTRY_MAGIC + bytes_digest(body).encode('ascii') + b'\n'
+        write_atomic(self._path(key), header + body)
+        self.stored += 1
+
+    def prune(self) -> int:
+        """Delete least recently used entries until the cache fits in max_bytes.
+
+        Returns the number of entries deleted. Other processes may be
+        reading, writing or pruning at the same time; entries that vanish
+        mid-scan are skipped.
+        """
+        entries = []
+        total = 0
+        stale = time.time() - STALE_TEMP_SECONDS
+        for directory, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if filename.startswith('.tmp-'):
+                    if stat.st_mtime < stale:
+                        self._remove(path)
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'corrupt': self.corrupt, 'stored': self.stored}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + '.html')
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,43 @@
+#python
+
+# The reports that every build_site() run fills in, one per step.
+#
+# They are plain classes rather than dataclasses: importing dataclasses
+# pulls in inspect, which takes longer than a build with nothing to do.
+# Each step's module imports its report from here, so it can still be
+# imported from there.
+
+
+class Report:
+    """Lists of paths named by __slots__, all empty to start with."""
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, [])
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({values})'
+
+
+class SyncReport(Report):
+    __slots__ = ('copied', 'unchanged', 'removed')
+
+
+class CompressReport(Report):
+    __slots__ = ('compressed', 'unchanged', 'removed')
+
+
+class SearchReport(Report):
+    __slots__ = ('indexed', 'removed', 'shards')
+
+
+class SitemapReport(Report):
+    __slots__ = ('written', 'unchanged', 'removed')
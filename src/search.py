@@ -0,0 +1,287 @@
+#python
+
+# Build-time full-text search index.
+#
+# Pages are tokenized from the TextType.TEXT nodes of their inline markdown
+# and the inverted index is written under search/ in the output:
+#
+#   search/index.json   {"format": 1, "prefix": 2,
+#                        "docs": [[output, title] or null, ...],
+#                        "shards": {shard: digest, ...}}
+#   search/<shard>.txt  one line per term, sorted: "<term> <postings>"
+#
+# A term lives in the shard named by its first `prefix` characters: the
+# characters themselves when they are all a-z or 0-9, otherwise "_" and
+# their UTF-8 bytes in hex. A client reads index.json, then fetches only the
+# shards of the terms it looks up (the digest is there to bust caches).
+#
+# Postings are the documents containing the term, in increasing id order,
+# separated by commas. Each is the gap from the previous id (the first is
+# the id itself) in base 36, followed by ":" and the term's count in that
+# document, also base 36, when the count is more than 1.
+#
+# The per-page terms are kept in SEARCH_STATE_NAME next to the output, so a
+# rebuild tokenizes only pages whose output changed (an include can change
+# a page as well as its source) and rewrites only the shards holding their
+# old or new terms.
+
+import json
+import os
+import re
+from collections import Counter
+from collections.abc import Iterable
+
+# markdown_to_blocks and text_to_textnodes are called through their
+# modules, so that instrument.enable() can swap them for timed wrappers.
+import block_markdown
+import inline_markdown
+from block_markdown import block_inline_texts
+from fsutil import bytes_digest, remove_file, write_atomic
+from page import stream_blocks, stream_title
+from reports import SearchReport
+from textnode import TextType
+
+SEARCH_DIR = 'search'
+SEARCH_STATE_NAME = '.search-state.json'
+SEARCH_FORMAT = 1
+PREFIX_LENGTH = 2
+
+# Terms are runs of word characters, case-folded, of this many characters.
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+_WORD = re.compile(r'\w+')
+_PLAIN_SHARD = frozenset('abcdefghijklmnopqrstuvwxyz0123456789')
+
+
+def page_terms(markdown: str) -> Counter:
+    """Count the terms in the TEXT nodes of every block of markdown except code."""
+    return _block_terms(block_markdown.markdown_to_blocks(markdown))
+
+
+def _block_terms(blocks: Iterable[str]) -> Counter:
+    terms = Counter()
+    for block in blocks:
+        for text in block_inline_texts(block):
+            for node in inline_markdown.text_to_textnodes(text):
+                if node.text_type == TextType.TEXT:
+                    terms.update(tokenize(node.text))
+    return terms
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        word for word in (match.group().casefold() for match in _WORD.finditer(text))
+        if MIN_TERM_LENGTH <= len(word) <= MAX_TERM_LENGTH
+    ]
+
+
+def index_source(path: str) -> tuple[str, dict[str, int]]:
+    """Return (title, term counts) for the markdown file at path.
+
+    The file is streamed a block at a time, as stream_page() reads it, so
+    a page too large to render in memory is not read into it here either.
+    """
+    return stream_title(path), dict(_block_terms(stream_blocks(path)))
+
+
+def shard_name(term: str, prefix: int = PREFIX_LENGTH) -> str:
+    head = term[:prefix]
+    if all(char in _PLAIN_SHARD for char in head):
+        return head
+    return '_' + head.encode('utf-8').hex()
+
+
+def encode_postings(postings: dict[int, int]) -> str:
+    parts = []
+    previous = 0
+    for doc in sorted(postings):
+        count = postings[doc]
+        part = _base36(doc - previous)
+        if count > 1:
+            part += ':' + _base36(count)
+        parts.append(part)
+        previous = doc
+    return ','.join(parts)
+
+
+def decode_postings(text: str) -> dict[int, int]:
+    postings = {}
+    doc = 0
+    for part in text.split(','):
+        gap, _, count = part.partition(':')
+        doc += int(gap, 36)
+        postings[doc] = int(count, 36) if count else 1
+    return postings
+
+
+def _base36(number: int) -> str:
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    if number < 36:
+        return digits[number]
+    out = []
+    while number:
+        number, digit = divmod(number, 36)
+        out.append(digits[digit])
+    return ''.join(reversed(out))
+
+
+def load_state(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, SEARCH_STATE_NAME), encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if state.get('format') != SEARCH_FORMAT or state.get('prefix') != PREFIX_LENGTH:
+        return {}
+    return state
+
+
+def update_search_index(output_dir: str, pages: dict[str, dict], index_pages, write_index: bool = True) -> SearchReport:
+    """Bring the search index in output_dir up to date with pages.
+
+    pages is the build manifest's {source: entry}. index_pages(sources) is
+    called with the sources that are new or whose hash changed and returns
+    {source: (title, term counts)}; a source it leaves out is dropped from
+    the index. Document ids are kept for unchanged pages and ids that fall
+    free are reused, so an edit only rewrites the shards holding the page's
+    old or new terms. With write_index false only the state is kept, for a
+    shard build whose index is written by merge_shards().
+    """
+    report = SearchReport()
+    old = load_state(output_dir)
+    if old.get('written') != write_index:
+        # First build with search, or a switch between shard and whole builds:
+        # start over rather than patch files this state does not describe.
+        _remove_index_files(output_dir)
+        old = {'docs': {}, 'shards': {}}
+    old_docs = old['docs']
+
+    docs = {source: doc for source, doc in old_docs.items() if source in pages}
+    changed = sorted(source for source, entry in pages.items()
+                     if source not in docs or docs[source]['hash'] != entry['output_hash'])
+    report.removed = sorted(source for source in old_docs if source not in pages)
+
+    dropped = {old_docs[source]['id'] for source in report.removed}
+    affected = set()
+    for source in report.removed:
+        affected.update(shard_name(term) for term in old_docs[source]['terms'])
+    indexed = index_pages(changed)
+    for source in changed:
+        previous = docs.pop(source, None)
+        if previous is not None:
+            dropped.add(previous['id'])
+            affected.update(shard_name(term) for term in previous['terms'])
+
+    # New pages take the lowest ids not in use, then ids past the largest.
+    used = {doc['id'] for doc in docs.values()}
+    next_id = max(used | dropped, default=-1) + 1
+    free = [doc_id for doc_id in range(next_id) if doc_id not in used]
+    fresh = {}
+    for source in changed:
+        if source not in indexed:
+            continue
+        previous = old_docs.get(source)
+        if previous is not None and previous['id'] not in used:
+            doc_id = previous['id']
+            free.remove(doc_id)
+        elif free:
+            doc_id = free.pop(0)
+        else:
+            doc_id = next_id
+            next_id += 1
+        used.add(doc_id)
+        title, terms = indexed[source]
+        docs[source] = fresh[source] = {
+            'id': doc_id,
+            'hash': pages[source]['output_hash'],
+            'output': pages[source]['output'],
+            'title': title,
+            'terms': terms,
+        }
+        affected.update(shard_name(term) for term in terms)
+    report.indexed = sorted(fresh)
+
+    shards = dict(old['shards'])
+    if write_index:
+        search_dir = os.path.join(output_dir, SEARCH_DIR)
+        additions = {}
+        for doc in fresh.values():
+            for term, count in doc['terms'].items():
+                additions.setdefault(shard_name(term), {}).setdefault(term, {})[doc['id']] = count
+        for name in sorted(affected):
+            digest = _update_shard(search_dir, name, dropped, additions.get(name, {}))
+            if digest is None:
+                if shards.pop(name, None) is not None:
+                    report.shards.append(name)
+            elif shards.get(name) != digest:
+                shards[name] = digest
+                report.shards.append(name)
+        _write_if_changed(os.path.join(search_dir, 'index.json'), _index_json(docs, shards))
+
+    write_atomic(os.path.join(output_dir, SEARCH_STATE_NAME), (json.dumps({
+        'format': SEARCH_FORMAT,
+        'prefix': PREFIX_LENGTH,
+        'written': write_index,
+        'docs': docs,
+        'shards': shards,
+    }, sort_keys=True) + '\n').encode('utf-8'))
+    return report
+
+
+def remove_search_index(output_dir: str) -> None:
+    """Delete the index and state left by an earlier build with search on."""
+    _remove_index_files(output_dir)
+    remove_file(os.path.join(output_dir, SEARCH_STATE_NAME), output_dir)
+
+
+def _remove_index_files(output_dir: str) -> None:
+    search_dir = os.path.join(output_dir, SEARCH_DIR)
+    try:
+        names = os.listdir(search_dir)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.endswith('.txt') or name == 'index.json':
+            remove_file(os.path.join(search_dir, name), output_dir)
+
+
+def _update_shard(search_dir: str, name: str, dropped: set[int], additions: dict) -> str | None:
+    """Rewrite one shard file, returning its digest, or None if it is now empty."""
+    path = os.path.join(search_dir, name + '.txt')
+    index = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                term, _, postings = line.rstrip('\n').partition(' ')
+                index[term] = {doc: count for doc, count in decode_postings(postings).items()
+                               if doc not in dropped}
+    except FileNotFoundError:
+        pass
+    for term, postings in additions.items():
+        index.setdefault(term, {}).update(postings)
+    lines = [f'{term} {encode_postings(postings)}\n' for term, postings in sorted(index.items()) if postings]
+    if not lines:
+        remove_file(path, os.path.dirname(search_dir))
+        return None
+    data = ''.join(lines).encode('utf-8')
+    _write_if_changed(path, data)
+    return bytes_digest(data)[:12]
+
+
+def _index_json(docs: dict[str, dict], shards: dict[str, str]) -> bytes:
+    table = [None] * (max((doc['id'] for doc in docs.values()), default=-1) + 1)
+    for doc in docs.values():
+        table[doc['id']] = [doc['output'], doc['title']]
+    index = {'format': SEARCH_FORMAT, 'prefix': PREFIX_LENGTH, 'docs': table, 'shards': shards}
+    return (json.dumps(index, ensure_ascii=False, separators=(',', ':'), sort_keys=True) + '\n').encode('utf-8')
+
+
+def _write_if_changed(path: str, data: bytes) -> None:
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
@@ -0,0 +1,190 @@
+#python
+
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from block_cache import BlockCache
+from build import BuildReport, build_site, renderer_version
+from template import load_template
+
+
+class Watcher:
+    """Poll a set of files and directory trees for changes.
+
+    Each poll stats every file under the watched paths and compares size and
+    mtime with the previous poll, so no file is read unless it changed.
+    """
+
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = paths
+        self.snapshot = self.scan()
+
+    def set_paths(self, paths: list[str]) -> None:
+        """Watch paths from now on.
+
+        Paths newly added are taken as they are now rather than reported as
+        changes; what is under paths no longer watched is forgotten.
+        """
+        added = [path for path in paths if path not in self.paths]
+        dropped = [path for path in self.paths if path not in paths]
+        self.paths = paths
+        if dropped:
+            self.snapshot = {
+                path: stat for path, stat in self.snapshot.items()
+                if not any(path == root or path.startswith(root + os.sep) for root in dropped)
+            }
+        self.snapshot.update(self.scan(added))
+
+    def scan(self, paths: list[str] | None = None) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for path in self.paths if paths is None else paths:
+            if os.path.isdir(path):
+                self._scan_tree(path, snapshot)
+            else:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _scan_tree(self, directory: str, snapshot: dict) -> None:
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    self._scan_tree(entry.path, snapshot)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+    def changes(self) -> list[str]:
+        """Return the paths added, modified or removed since the last call."""
+        current = self.scan()
+        changed = [path for path, stat in current.items() if self.snapshot.get(path) != stat]
+        changed.extend(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        return sorted(changed)
+
+
+class DevServer:
+    """Keep output_dir up to date with content_dir, template_path and static_dir.
+
+    Rebuilds go through the normal incremental build, so only pages whose
+    sources changed are rendered again. The partials the template includes
+    are watched along with it, and the list is refreshed after every
+    rebuild, since an edit can add or drop one. The block cache is kept between
+    rebuilds, so blocks of an edited page that did not change are not
+    rendered again either.
+    """
+
+    def __init__(self, content_dir: str, output_dir: str, template_path: str,
+                 static_dir: str | None = None, jobs: int = 1, escape_html: bool = False) -> None:
+        self.content_dir = content_dir
+        self.output_dir = output_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.jobs = jobs
+        self.escape_html = escape_html
+        self.cache = BlockCache(version=renderer_version(escape_html))
+        self.template_files = [template_path]
+        self.watcher = Watcher(self.watched())
+
+    def watched(self) -> list[str]:
+        """Return the paths to watch: content, static files, the template and its partials."""
+        missing = []
+        try:
+            self.template_files = sorted(set(load_template(self.template_path).files) | {self.template_path})
+        except FileNotFoundError as e:
+            # Keep watching the files known to work, and the missing partial
+            # too, so the fix is noticed however it is made.
+            missing = [e.filename]
+        except (OSError, ValueError):
+            # The partials include each other: the fix is an edit to one of
+            # the files known to work.
+            pass
+        watched = [self.content_dir, *self.template_files, *missing]
+        if self.static_dir is not None:
+            watched.append(self.static_dir)
+        return watched
+
+    def build(self) -> BuildReport:
+        try:
+            return build_site(
+                self.content_dir, self.output_dir, self.template_path,
+                jobs=self.jobs, cache=self.cache, static_dir=self.static_dir, escape_html=self.escape_html,
+            )
+        finally:
+            self.watcher.set_paths(self.watched())
+
+    def poll(self) -> tuple[list[str], BuildReport] | None:
+        """Rebuild if anything changed since the last poll."""
+        changed = self.watcher.changes()
+        if not changed:
+            return None
+        return changed, self.build()
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            start = time.perf_counter()
+            try:
+                result = self.poll()
+            except Exception as e:
+                # A broken template fails the whole build. Report it and keep
+                # watching: the next change may be the fix.
+                print(f'error: rebuild failed: {e}', file=sys.stderr)
+                continue
+            if result is None:
+                continue
+            changed, report = result
+            elapsed = (time.perf_counter() - start) * 1e3
+            for source, message in report.errors:
+                print(f'error: {source}: {message}', file=sys.stderr)
+            print(
+                f'{len(changed)} changed: {len(report.rendered)} rendered, '
+                f'{len(report.removed)} removed, {len(report.assets.copied)} assets copied '
+                f'in {elapsed:.0f} ms'
+            )
+
+
+class SiteRequestHandler(SimpleHTTPRequestHandler):
+    """Serve the output directory, mapping /page to /page.html."""
+
+    def translate_path(self, path: str) -> str:
+        translated = super().translate_path(path)
+        if not os.path.exists(translated) and os.path.exists(translated + '.html'):
+            return translated + '.html'
+        return translated
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(content_dir: str, output_dir: str, template_path: str, static_dir: str | None = None,
+          host: str = '127.0.0.1', port: int = 8000, interval: float = 0.25, jobs: int = 1,
+          escape_html: bool = False) -> None:
+    server = DevServer(content_dir, output_dir, template_path, static_dir, jobs, escape_html)
+    report = server.build()
+    print(f'{len(report.rendered)} rendered, {len(report.unchanged)} unchanged, {len(report.errors)} failed')
+
+    handler = functools.partial(SiteRequestHandler, directory=output_dir)
+    httpd = ThreadingHTTPServer((host, port), handler)
+    stop = threading.Event()
+    watcher = threading.Thread(target=server.watch, args=(interval, stop), daemon=True)
+    watcher.start()
+    print(f'serving {output_dir} on http://{host}:{httpd.server_address[1]}/')
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        httpd.server_close()
+        watcher.join()
@@ -0,0 +1,26 @@
+#python
+
+import hashlib
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """Parse 'i/N' into (i, N), with shards numbered from 1 like CI node indexes."""
+    index, sep, count = text.partition('/')
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        shard = None
+    if not sep or shard is None or not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f'invalid shard {text!r}, expected i/N with 1 <= i <= N')
+    return shard
+
+
+def shard_of(source: str, count: int) -> int:
+    """Return the shard, from 1 to count, that renders source.
+
+    Depends only on the path, so every machine agrees on the partition
+    without talking to the others, and a page stays on its shard when other
+    pages are added or removed.
+    """
+    digest = hashlib.blake2b(source.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
@@ -0,0 +1,158 @@
+#python
+
+# sitemap.xml and an Atom feed, written from the build manifest.
+#
+# Every page entry in the manifest carries the title of the page and the
+# time its output last changed, so neither file needs the HTML read back.
+# Each file is streamed out line by line, and only when the digest of what
+# goes into it differs from the one the manifest recorded for it.
+
+import functools
+import hashlib
+import heapq
+import os
+import time
+from collections.abc import Callable, Iterator
+from operator import itemgetter
+from urllib.parse import quote
+
+from fsutil import atomic_writer, remove_file
+from htmlnode import escape_attribute, escape_text
+from reports import SitemapReport
+
+SITEMAP_NAME = 'sitemap.xml'
+FEED_NAME = 'feed.xml'
+
+# The sitemap protocol's limit on URLs per file. Past it, sitemap.xml is an
+# index of sitemap-1.xml, sitemap-2.xml, ... holding this many pages each.
+SITEMAP_LIMIT = 50000
+
+# How many of the most recently changed pages the feed lists.
+FEED_ENTRIES = 20
+
+# Bump when the files written change, so the recorded digests stop matching.
+SITEMAP_FORMAT = '1'
+
+
+def format_time(seconds: float) -> str:
+    """Format a Unix time as the UTC timestamp both sitemaps and Atom take."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(seconds))
+
+
+def page_url(site_url: str, output: str) -> str:
+    """Return the absolute URL of an output path; an index.html maps to its directory."""
+    if output == 'index.html' or output.endswith('/index.html'):
+        output = output[:-len('index.html')]
+    return site_url.rstrip('/') + '/' + quote(output)
+
+
+def update_sitemap(
+    output_dir: str,
+    pages: dict[str, dict],
+    site_url: str,
+    feed_title: str | None = None,
+    previous: dict | None = None,
+) -> tuple[dict, SitemapReport]:
+    """Write sitemap.xml and feed.xml into output_dir for pages under site_url.
+
+    pages is the build manifest's {source: entry}; entries need 'output',
+    'title' and 'modified'. previous is the record returned by the last call:
+    a file whose digest it holds, and which still exists, is not written
+    again, and files it lists that are no longer produced are deleted.
+    Returns the record to keep for next time, and a report.
+    """
+    previous_files = (previous or {}).get('files', {})
+    report = SitemapReport()
+    files = {}
+    title = feed_title or site_url
+    for name, inputs, lines in _planned_files(pages, site_url, title):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{SITEMAP_FORMAT}\0{site_url}\0{title}'.encode('utf-8'))
+        digest.update('\0'.join(inputs).encode('utf-8'))
+        files[name] = digest.hexdigest()
+        path = os.path.join(output_dir, name)
+        if previous_files.get(name) == files[name] and os.path.exists(path):
+            report.unchanged.append(name)
+            continue
+        with atomic_writer(path, encoding='utf-8') as f:
+            for line in lines():
+                f.write(line)
+        report.written.append(name)
+    for name in sorted(previous_files.keys() - files.keys()):
+        remove_file(os.path.join(output_dir, name), output_dir)
+        report.removed.append(name)
+    return {'url': site_url, 'title': feed_title, 'files': files}, report
+
+
+def remove_sitemap(output_dir: str, previous: dict | None) -> list[str]:
+    """Delete the files update_sitemap() recorded in previous; return their names."""
+    names = sorted((previous or {}).get('files', {}))
+    for name in names:
+        remove_file(os.path.join(output_dir, name), output_dir)
+    return names
+
+
+def _planned_files(
+    pages: dict[str, dict],
+    site_url: str,
+    feed_title: str,
+) -> Iterator[tuple[str, Iterator[str], Callable[[], Iterator[str]]]]:
+    # (name, inputs, lines) for every file to produce: the values the file
+    # is made from, which are cheaper to hash than the file itself, and a
+    # function that streams its lines.
+    entries = [pages[source] for source in sorted(pages)]
+    chunks = [entries[i:i + SITEMAP_LIMIT] for i in range(0, len(entries), SITEMAP_LIMIT)] or [[]]
+    if len(chunks) == 1:
+        yield SITEMAP_NAME, _urlset_inputs(entries), functools.partial(_urlset_lines, entries, site_url)
+    else:
+        names = [f'sitemap-{i}.xml' for i in range(1, len(chunks) + 1)]
+        for name, chunk in zip(names, chunks):
+            yield name, _urlset_inputs(chunk), functools.partial(_urlset_lines, chunk, site_url)
+        indexed = [(name, max(entry['modified'] for entry in chunk)) for name, chunk in zip(names, chunks)]
+        yield SITEMAP_NAME, (value for pair in indexed for value in pair), functools.partial(
+            _index_lines, indexed, site_url)
+    recent = heapq.nlargest(FEED_ENTRIES, entries, key=itemgetter('modified', 'output'))
+    yield FEED_NAME, (entry[key] for entry in recent for key in ('output', 'modified', 'title')), functools.partial(
+        _feed_lines, recent, site_url, feed_title)
+
+
+def _urlset_inputs(entries: list[dict]) -> Iterator[str]:
+    for entry in entries:
+        yield entry['output']
+        yield entry['modified']
+
+
+def _urlset_lines(entries: list[dict], site_url: str) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for entry in entries:
+        yield f'<url><loc>{escape_text(page_url(site_url, entry["output"]))}</loc><lastmod>{entry["modified"]}</lastmod></url>\n'
+    yield '</urlset>\n'
+
+
+def _index_lines(indexed: list[tuple[str, str]], site_url: str) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for name, modified in indexed:
+        yield f'<sitemap><loc>{escape_text(page_url(site_url, name))}</loc><lastmod>{modified}</lastmod></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def _feed_lines(recent: list[dict], site_url: str, feed_title: str) -> Iterator[str]:
+    home = escape_attribute(page_url(site_url, ''))
+    updated = recent[0]['modified'] if recent else format_time(0)
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f'<title>{escape_text(feed_title)}</title>\n'
+    yield f'<id>{home}</id>\n'
+    yield f'<link href="{home}"/>\n'
+    yield f'<link rel="self" href="{escape_attribute(page_url(site_url, FEED_NAME))}"/>\n'
+    yield f'<author><name>{escape_text(feed_title)}</name></author>\n'
+    yield f'<updated>{updated}</updated>\n'
+    for entry in recent:
+        url = escape_attribute(page_url(site_url, entry['output']))
+        yield (
+            f'<entry><title>{escape_text(entry["title"])}</title><id>{url}</id>'
+            f'<link href="{url}"/><updated>{entry["modified"]}</updated></entry>\n'
+        )
+    yield '</feed>\n'
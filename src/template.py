@@ -0,0 +1,118 @@
+#python
+
+import functools
+import os
+import re
+
+from fsutil import bytes_digest
+
+_SLOT_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# {{> file }} in a template is replaced by the contents of file, a path
+# relative to the file that names it, when the template is loaded.
+INCLUDE_PATTERN = re.compile(r'\{\{>\s*(\S+?)\s*\}\}')
+
+
+class Template:
+    """A page template parsed once into literal text and {{ Name }} slots.
+
+    render() fills the slots and joins the pieces in one pass, instead of
+    running str.replace over the whole document once per placeholder.
+    """
+
+    __slots__ = ('source', 'digest', 'segments', 'slots', 'files')
+
+    def __init__(self, source: str, digest: str | None = None, files: dict[str, str] | None = None) -> None:
+        self.source = source
+        self.digest = digest if digest is not None else bytes_digest(source.encode('utf-8'))
+        # {path: digest} of every file the template was read from, partials
+        # included; empty for a template made from a string.
+        self.files = files or {}
+        # Literals sit at even indexes and slot names at odd ones, so the
+        # list always starts and ends with a (possibly empty) literal.
+        self.segments = _SLOT_PATTERN.split(source)
+        self.slots = frozenset(self.segments[1::2])
+
+    def render(self, context: dict[str, str]) -> str:
+        parts = self.segments.copy()
+        try:
+            for i in range(1, len(parts), 2):
+                parts[i] = context[parts[i]]
+        except KeyError as e:
+            raise ValueError(f'no value for template slot {e.args[0]!r}') from None
+        return ''.join(parts)
+
+    def render_into(self, write, context: dict) -> None:
+        """Write the rendered template to write() piece by piece.
+
+        A context value may be a callable, which is called with write to
+        stream that slot's contents instead of passing them as a string.
+        """
+        missing = self.slots - context.keys()
+        if missing:
+            raise ValueError(f'no value for template slot {min(missing)!r}')
+        segments = self.segments
+        for i, segment in enumerate(segments):
+            if not i % 2:
+                if segment:
+                    write(segment)
+                continue
+            value = context[segment]
+            if callable(value):
+                value(write)
+            else:
+                write(value)
+
+    def __repr__(self) -> str:
+        return f'Template(slots: {sorted(self.slots)}, {self.digest[:12]})'
+
+
+@functools.lru_cache(maxsize=32)
+def compile_template(source: str) -> Template:
+    return Template(source)
+
+
+_loaded = {}
+
+
+def load_template(path: str) -> Template:
+    """Return the parsed template at path, reparsing only when one of its files changed.
+
+    Partials named with {{> file }} are read in, recursively. The digest
+    is that of the text after they are, so it changes with any partial.
+    """
+    cached = _loaded.get(path)
+    if cached is not None and all(_stat_key(file) == key for file, key in cached[0].items()):
+        return cached[1]
+    stats = {}
+    files = {}
+    source = _read_with_partials(path, stats, files, ())
+    template = Template(source, bytes_digest(source.encode('utf-8')), files)
+    _loaded[path] = (stats, template)
+    return template
+
+
+def _stat_key(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_with_partials(path: str, stats: dict, files: dict, including: tuple[str, ...]) -> str:
+    if path in including:
+        raise ValueError(f'template partials include each other: {" -> ".join(including + (path,))}')
+    stats[path] = _stat_key(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    files[path] = bytes_digest(data)
+    source = data.decode('utf-8')
+    if '{{>' not in source:
+        return source
+    directory = os.path.dirname(path)
+    return INCLUDE_PATTERN.sub(
+        lambda match: _read_with_partials(
+            os.path.normpath(os.path.join(directory, match.group(1))), stats, files, including + (path,)),
+        source,
+    )
@@ -0,0 +1,115 @@
+#python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import assets
+from assets import copy_file, sync_assets
+from test_build import read, write
+
+
+class TestSyncAssets(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        self.static = os.path.join(self.root, 'static')
+        self.output = os.path.join(self.root, 'public')
+        write(os.path.join(self.static, 'styles.css'), 'body { color: red; }')
+        write(os.path.join(self.static, 'images', 'logo.svg'), '<svg></svg>')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def test_first_sync_copies_everything(self):
+        record, report = sync_assets(self.static, self.output, {})
+        self.assertEqual(sorted(report.copied), ['images/logo.svg', 'styles.css'])
+        self.assertEqual(sorted(record), ['images/logo.svg', 'styles.css'])
+        self.assertEqual(read(os.path.join(self.output, 'images', 'logo.svg')), '<svg></svg>')
+        source = os.stat(os.path.join(self.static, 'styles.css'))
+        target = os.stat(os.path.join(self.output, 'styles.css'))
+        self.assertEqual(source.st_mtime_ns, target.st_mtime_ns)
+
+    def test_second_sync_skips_unchanged(self):
+        record, _ = sync_assets(self.static, self.output, {})
+        _, report = sync_assets(self.static, self.output, record)
+        self.assertEqual(report.copied, [])
+        self.assertEqual(len(report.unchanged), 2)
+
+    def test_changed_file_is_copied(self):
+        record, _ = sync_assets(self.static, self.output, {})
+        write(os.path.join(self.static, 'styles.css'), 'body { color: blue; }')
+        _, report = sync_assets(self.static, self.output, record)
+        self.assertEqual(report.copied, ['styles.css'])
+        self.assertEqual(read(os.path.join(self.output, 'styles.css')), 'body { color: blue; }')
+
+    def test_touched_file_is_compared_not_copied(self):
+        record, _ = sync_assets(self.static, self.output, {})
+        source = os.path.join(self.static, 'styles.css')
+        os.utime(source, ns=(1, 1))
+        _, report = sync_assets(self.static, self.output, record)
+        self.assertEqual(report.copied, [])
+        self.assertEqual(os.stat(os.path.join(self.output, 'styles.css')).st_mtime_ns, 1)
+
+    def test_removed_file_is_deleted(self):
+        record, _ = sync_assets(self.static, self.output, {})
+        shutil.rmtree(os.path.join(self.static, 'images'))
+        write(os.path.join(self.output, 'index.html'), 'rendered page')
+        _, report = sync_assets(self.static, self.output, record)
+        self.assertEqual(report.removed, ['images/logo.svg'])
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'images')))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'index.html')))
+
+    def test_missing_static_dir(self):
+        record, report = sync_assets(os.path.join(self.root, 'missing'), self.output, {})
+        self.assertEqual(record, {})
+        self.assertEqual(report.copied, [])
+
+    def test_hardlink(self):
+        sync_assets(self.static, self.output, {}, hardlink=True)
+        source = os.stat(os.path.join(self.static, 'styles.css'))
+        target = os.stat(os.path.join(self.output, 'styles.css'))
+        self.assertEqual(source.st_ino, target.st_ino)
+
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, 'source.bin')
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        with open(self.source, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def copy_and_read(self) -> bytes:
+        target = os.path.join(self.root, 'nested', 'target.bin')
+        copy_file(self.source, target)
+        with open(target, 'rb') as f:
+            return f.read()
+
+    def test_copy(self):
+        self.assertEqual(self.copy_and_read(), self.data)
+
+    def test_small_chunks(self):
+        chunk = assets.COPY_CHUNK
+        assets.COPY_CHUNK = 1000
+        try:
+            self.assertEqual(self.copy_and_read(), self.data)
+        finally:
+            assets.COPY_CHUNK = chunk
+
+    def test_userspace_fallback(self):
+        def unsupported(*args):
+            raise OSError('not supported')
+        saved = os.copy_file_range, os.sendfile
+        os.copy_file_range = os.sendfile = unsupported
+        try:
+            self.assertEqual(self.copy_and_read(), self.data)
+        finally:
+            os.copy_file_range, os.sendfile = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
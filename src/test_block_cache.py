@@ -0,0 +1,81 @@
+#python
+
+import shutil
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from page import render_content, render_block
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls = []
+
+    def render(self, block: str) -> str:
+        self.calls.append(block)
+        return f'<p>{block}</p>'
+
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        self.assertEqual(cache.render('a', self.render), '<p>a</p>')
+        self.assertEqual(cache.render('a', self.render), '<p>a</p>')
+        self.assertEqual(cache.render('b', self.render), '<p>b</p>')
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertEqual(cache.stats(), {'hits': 1, 'disk_hits': 0, 'misses': 2})
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.render('a', self.render)
+        cache.render('b', self.render)
+        cache.render('a', self.render)
+        cache.render('c', self.render)
+        self.assertEqual(len(cache), 2)
+        cache.render('a', self.render)
+        cache.render('b', self.render)
+        self.assertEqual(self.calls, ['a', 'b', 'c', 'b'])
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            BlockCache(max_entries=0)
+
+    def test_disk_store_shared_across_caches(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        BlockCache(directory=directory, version='1').render('a', self.render)
+        cache = BlockCache(directory=directory, version='1')
+        self.assertEqual(cache.render('a', self.render), '<p>a</p>')
+        self.assertEqual(cache.stats(), {'hits': 0, 'disk_hits': 1, 'misses': 0})
+        self.assertEqual(self.calls, ['a'])
+
+    def test_version_changes_key(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        BlockCache(directory=directory, version='1').render('a', self.render)
+        cache = BlockCache(directory=directory, version='2')
+        cache.render('a', self.render)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+
+class TestRenderContentWithCache(unittest.TestCase):
+    def test_same_output_as_uncached(self):
+        md = '''
+# Title
+
+Shared **disclaimer** text
+
+- one
+- two
+
+Shared **disclaimer** text
+'''
+        cache = BlockCache()
+        self.assertEqual(render_content(md, cache), render_content(md))
+        self.assertEqual(cache.stats(), {'hits': 1, 'disk_hits': 0, 'misses': 3})
+
+    def test_render_block(self):
+        self.assertEqual(render_block('## Heading'), '<h2>Heading</h2>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,8 +3,14 @@
 import unittest
 from block_markdown import BlockType
 from block_markdown import (
+    iter_markdown_blocks,
     markdown_to_blocks,
     block_to_block_type,
+    markdown_to_html_node,
+    block_to_html_node,
+    block_inline_texts,
+    _BLOCK_BUILDERS,
+    _INLINE_TEXTS,
     )
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -148,6 +154,29 @@ This is a line with **bold** and _italic_ and a `code block`
             ]
         )
 
+class TestIterMarkdownBlocks(unittest.TestCase):
+    def assert_same_blocks(self, md):
+        expected = markdown_to_blocks(md)
+        for size in range(1, len(md) + 2):
+            chunks = [md[i:i + size] for i in range(0, len(md), size)]
+            self.assertEqual(list(iter_markdown_blocks(chunks)), expected, (md, size))
+
+    def test_matches_markdown_to_blocks(self):
+        self.assert_same_blocks('# Heading\n\nA paragraph\nover two lines\n\n- item\n- item\n')
+        self.assert_same_blocks('\n\n\nfirst\n\n\n\nsecond\n\n\n')
+        self.assert_same_blocks('  padded  \n \n\n\n  block\r\n\r\n')
+        self.assert_same_blocks('')
+
+    def test_separator_split_between_chunks(self):
+        self.assertEqual(list(iter_markdown_blocks(['one\n', '\ntwo'])), ['one', 'two'])
+        self.assertEqual(list(iter_markdown_blocks(['one\n', '', '\n', '\ntwo'])), ['one', 'two'])
+
+    def test_lazy(self):
+        def chunks():
+            yield 'first\n\nsec'
+            raise AssertionError('read past the first block')
+        self.assertEqual(next(iter_markdown_blocks(chunks())), 'first')
+
 class TestBlockToBlock(unittest.TestCase):
     def test_empty(self):
         md = ''''''
@@ -258,4 +287,126 @@ Followed by a non-quoted line'''
 2Not a list item
 '''
         result = block_to_block_type(md)
-        self.assertEqual(result, BlockType.PARAGRAPH)
\ No newline at end of file
+        self.assertEqual(result, BlockType.PARAGRAPH)
+
+    def test_trailing_newline(self):
+        self.assertEqual(block_to_block_type('# Heading\n'), BlockType.HEADING)
+        self.assertEqual(block_to_block_type('```code```\n'), BlockType.CODE)
+        self.assertEqual(block_to_block_type('>quote\n'), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type('>quote\n\n'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('- item\n'), BlockType.UNORDERED_LIST)
+        self.assertEqual(block_to_block_type('- item\n\n'), BlockType.PARAGRAPH)
+
+    def test_near_misses(self):
+        self.assertEqual(block_to_block_type('#'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('# '), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('#NoSpace'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('```'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('-'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('2. Starts at two'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('1999 was a year'), BlockType.PARAGRAPH)
+
+    def test_ordered_list_line_endings(self):
+        md = '1. First item\r\n2. Second item\r\n3. Third item'
+        self.assertEqual(block_to_block_type(md), BlockType.ORDERED_LIST)
+        md = '1.\tTab separated\n02. Zero padded'
+        self.assertEqual(block_to_block_type(md), BlockType.ORDERED_LIST)
+
+class TestMarkdownToHTMLNode(unittest.TestCase):
+    def test_paragraphs(self):
+        md = '''
+This is **bolded** paragraph
+text in a p
+tag here
+
+This is another paragraph with _italic_ text and `code` here
+
+'''
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><p>This is <b>bolded</b> paragraph text in a p tag here</p><p>This is another paragraph with <i>italic</i> text and <code>code</code> here</p></div>',
+        )
+
+    def test_codeblock(self):
+        md = '''
+```
+This is text that _should_ remain
+the **same** even with inline stuff
+```
+'''
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>',
+        )
+
+    def test_headings(self):
+        md = '''
+# Title with **bold**
+
+###### Smallest heading
+'''
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><h1>Title with <b>bold</b></h1><h6>Smallest heading</h6></div>',
+        )
+
+    def test_quote(self):
+        md = '''
+> This is a
+> quote with _italic_
+'''
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><blockquote>This is a quote with <i>italic</i></blockquote></div>',
+        )
+
+    def test_lists(self):
+        md = '''
+- first [link](https://boot.dev)
+- second
+
+1. one
+2. **two**
+'''
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><ul><li>first <a href="https://boot.dev">link</a></li><li>second</li></ul><ol><li>one</li><li><b>two</b></li></ol></div>',
+        )
+
+    def test_list_markers(self):
+        self.assertEqual(
+            block_to_html_node('1.\tTab separated\n02. Zero padded\n3. Three').to_html(),
+            '<ol><li>Tab separated</li><li>Zero padded</li><li>Three</li></ol>',
+        )
+        items = [f'{i}. item {i}' for i in range(1, 12)]
+        self.assertEqual(
+            block_to_html_node('\n'.join(items)).to_html(),
+            '<ol>' + ''.join(f'<li>item {i}</li>' for i in range(1, 12)) + '</ol>',
+        )
+        self.assertEqual(block_to_html_node('- one\n- two\n').to_html(), '<ul><li>one</li><li>two</li></ul>')
+
+    def test_list_line_breaks_other_than_newline(self):
+        # Items are split on every line break str.splitlines() knows.
+        self.assertEqual(
+            block_to_html_node('1. First\r\n2. Second').to_html(),
+            '<ol><li>First</li><li>Second</li></ol>',
+        )
+        self.assertEqual(block_to_html_node('- a\r\n- b').to_html(), '<ul><li>a</li><li>b</li></ul>')
+        self.assertEqual(block_to_html_node('- é\n- b').to_html(), '<ul><li>é</li><li>b</li></ul>')
+
+    def test_every_block_type_has_a_builder(self):
+        self.assertEqual(set(_BLOCK_BUILDERS), set(BlockType))
+        self.assertEqual(set(_INLINE_TEXTS), set(BlockType))
+
+    def test_block_inline_texts(self):
+        self.assertEqual(block_inline_texts('## A **b**'), ['A **b**'])
+        self.assertEqual(block_inline_texts('> a\n>> b'), ['a b'])
+        self.assertEqual(block_inline_texts('- a\n- b'), ['a', 'b'])
+        self.assertEqual(block_inline_texts('1. a\n02. b'), ['a', 'b'])
+        self.assertEqual(block_inline_texts('```\ncode\n```'), [])
+        self.assertEqual(block_inline_texts('a\nb', BlockType.PARAGRAPH), ['a b'])
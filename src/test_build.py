@@ -0,0 +1,232 @@
+#python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from build import MANIFEST_NAME, build_site, find_sources, output_path_for
+
+
+def write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(path: str) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+class SiteTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, 'content')
+        self.output = os.path.join(self.root, 'public')
+        self.template = os.path.join(self.root, 'template.html')
+        write(self.template, '<title>{{ Title }}</title>{{ Content }}')
+        write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome')
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First\n\nPost one')
+        write(os.path.join(self.content, 'blog', 'second.md'), '# Second\n\nPost two')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def build(self, **kwargs):
+        return build_site(self.content, self.output, self.template, **kwargs)
+
+
+class TestBuildPaths(unittest.TestCase):
+    def test_output_path_for(self):
+        self.assertEqual(output_path_for('index.md'), 'index.html')
+        self.assertEqual(output_path_for('blog/post.md'), 'blog/post.html')
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def test_find_sources(self):
+        self.assertEqual(
+            find_sources(self.content),
+            ['blog/first.md', 'blog/second.md', 'index.md'],
+        )
+
+    def test_first_build_renders_everything(self):
+        report = self.build()
+        self.assertEqual(report.rendered, ['blog/first.md', 'blog/second.md', 'index.md'])
+        self.assertEqual(
+            read(os.path.join(self.output, 'blog', 'first.html')),
+            '<title>First</title><div><h1>First</h1><p>Post one</p></div>',
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.output, MANIFEST_NAME)))
+
+    def test_second_build_renders_nothing(self):
+        self.build()
+        report = self.build()
+        self.assertEqual(report.rendered, [])
+        self.assertEqual(len(report.unchanged), 3)
+
+    def test_only_changed_page_rerenders(self):
+        self.build()
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First\n\nPost one, fixed')
+        report = self.build()
+        self.assertEqual(report.rendered, ['blog/first.md'])
+        self.assertIn('Post one, fixed', read(os.path.join(self.output, 'blog', 'first.html')))
+
+    def test_touch_without_change_does_not_rerender(self):
+        self.build()
+        path = os.path.join(self.content, 'index.md')
+        os.utime(path, ns=(1, 1))
+        report = self.build()
+        self.assertEqual(report.rendered, [])
+
+    def test_missing_output_rerenders(self):
+        self.build()
+        os.remove(os.path.join(self.output, 'index.html'))
+        report = self.build()
+        self.assertEqual(report.rendered, ['index.md'])
+
+    def test_template_change_rerenders_everything(self):
+        self.build()
+        write(self.template, '<h1>{{ Title }}</h1>{{ Content }}')
+        report = self.build()
+        self.assertEqual(len(report.rendered), 3)
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, 'blog', 'first.md'))
+        os.remove(os.path.join(self.content, 'blog', 'second.md'))
+        report = self.build()
+        self.assertEqual(report.removed, ['blog/first.md', 'blog/second.md'])
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'blog')))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'index.html')))
+
+    def test_static_assets(self):
+        static = os.path.join(self.root, 'static')
+        write(os.path.join(static, 'styles.css'), 'body {}')
+        report = self.build(static_dir=static)
+        self.assertEqual(report.assets.copied, ['styles.css'])
+        self.assertEqual(read(os.path.join(self.output, 'styles.css')), 'body {}')
+        report = self.build(static_dir=static)
+        self.assertEqual(report.assets.copied, [])
+        os.remove(os.path.join(static, 'styles.css'))
+        report = self.build(static_dir=static)
+        self.assertEqual(report.assets.removed, ['styles.css'])
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'styles.css')))
+
+    def test_escape_html_rebuilds_and_escapes(self):
+        write(os.path.join(self.content, 'index.md'), '# A <b> & C\n\nUse `<br>` here')
+        self.build()
+        self.assertIn('<code><br></code>', read(os.path.join(self.output, 'index.html')))
+        report = self.build(escape_html=True)
+        self.assertEqual(len(report.rendered), 3)
+        self.assertEqual(
+            read(os.path.join(self.output, 'index.html')),
+            '<title>A &lt;b&gt; &amp; C</title><div><h1>A &lt;b&gt; &amp; C</h1>'
+            '<p>Use <code>&lt;br&gt;</code> here</p></div>',
+        )
+        self.assertEqual(self.build(escape_html=True).rendered, [])
+
+    def test_streamed_pages_match_rendered(self):
+        self.build()
+        expected = {source: read(os.path.join(self.output, output_path_for(source))) for source in find_sources(self.content)}
+        shutil.rmtree(self.output)
+        report = self.build(stream_threshold=0)
+        self.assertEqual(len(report.rendered), 3)
+        for source, html in expected.items():
+            self.assertEqual(read(os.path.join(self.output, output_path_for(source))), html)
+        self.assertEqual(self.build(stream_threshold=0).rendered, [])
+
+    def test_streamed_page_error_keeps_old_output(self):
+        self.build()
+        write(os.path.join(self.content, 'index.md'), '# Home\n\nAn **unclosed bold')
+        report = self.build(stream_threshold=0)
+        self.assertEqual([source for source, _ in report.errors], ['index.md'])
+        self.assertEqual(read(os.path.join(self.output, 'index.html')), '<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>')
+        self.assertEqual([name for name in os.listdir(self.output) if name.startswith('.tmp-')], [])
+
+    def test_error_is_reported_and_retried(self):
+        write(os.path.join(self.content, 'broken.md'), 'An **unclosed bold')
+        report = self.build()
+        self.assertEqual([source for source, _ in report.errors], ['broken.md'])
+        self.assertEqual(len(report.rendered), 3)
+        report = self.build()
+        self.assertEqual([source for source, _ in report.errors], ['broken.md'])
+
+    def test_output_of_failing_page_is_removed_with_its_source(self):
+        source = os.path.join(self.content, 'a.md')
+        write(source, '# A')
+        self.build()
+        with open(source, 'wb') as f:
+            f.write(b'# A \xff invalid UTF-8')
+        for _ in range(2):
+            report = self.build()
+            self.assertEqual([source for source, _ in report.errors], ['a.md'])
+            self.assertTrue(os.path.exists(os.path.join(self.output, 'a.html')))
+        os.remove(source)
+        report = self.build()
+        self.assertEqual(report.removed, ['a.md'])
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'a.html')))
+
+
+class TestParallelBuild(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        for i in range(40):
+            write(os.path.join(self.content, 'many', f'page{i:02}.md'), f'# Page {i}\n\nText with a [link](/p{i}.html)')
+        write(os.path.join(self.content, 'many', 'broken-a.md'), 'An **unclosed bold')
+        write(os.path.join(self.content, 'many', 'broken-b.md'), 'An _unclosed italic')
+
+    def read_tree(self, root: str) -> dict[str, bytes]:
+        tree = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                with open(path, 'rb') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_matches_serial_build(self):
+        serial = self.build()
+        serial_tree = self.read_tree(self.output)
+        shutil.rmtree(self.output)
+
+        parallel = self.build(jobs=4)
+        self.assertEqual(parallel.rendered, serial.rendered)
+        self.assertEqual(parallel.errors, serial.errors)
+        self.assertEqual([source for source, _ in parallel.errors], ['many/broken-a.md', 'many/broken-b.md'])
+        parallel_tree = self.read_tree(self.output)
+        # Pages record the second they were built in, which the two builds
+        # need not share.
+        manifests = []
+        for tree in (serial_tree, parallel_tree):
+            manifest = json.loads(tree.pop(MANIFEST_NAME))
+            for entry in manifest['pages'].values():
+                del entry['modified']
+            manifests.append(manifest)
+        self.assertEqual(manifests[1], manifests[0])
+        self.assertEqual(parallel_tree, serial_tree)
+
+    def test_block_cache_counts_from_workers(self):
+        cache = BlockCache()
+        report = self.build(jobs=4, cache=cache)
+        stats = cache.stats()
+        # Two blocks per rendered page, plus one lookup for each broken page.
+        self.assertEqual(stats['hits'] + stats['disk_hits'] + stats['misses'], 2 * len(report.rendered) + 2)
+        self.assertGreater(stats['misses'], 0)
+
+    def test_parallel_escape_html(self):
+        write(os.path.join(self.content, 'many', 'page07.md'), 'a < b')
+        self.build(jobs=4, escape_html=True)
+        self.assertEqual(read(os.path.join(self.output, 'many', 'page07.html')), '<title>page07</title><div><p>a &lt; b</p></div>')
+
+    def test_parallel_incremental(self):
+        self.build(jobs=4)
+        write(os.path.join(self.content, 'many', 'page07.md'), '# Changed')
+        report = self.build(jobs=4)
+        self.assertEqual(report.rendered, ['many/page07.md'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#python
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+import cli
+from htmlnode import set_escaping
+from test_build import SiteTestCase, read, write
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_cli_import_is_light(self):
+        code = 'import sys, cli; print(" ".join(sorted(sys.modules)))'
+        result = subprocess.run([sys.executable, '-c', code], cwd=SRC, capture_output=True, text=True, check=True)
+        modules = set(result.stdout.split())
+        for module in ('build', 'serve', 'page', 'http.server', 'concurrent.futures', 'multiprocessing'):
+            self.assertNotIn(module, modules)
+
+    def test_build_import_leaves_out_optional_steps(self):
+        code = 'import sys, build; print(" ".join(sorted(sys.modules)))'
+        result = subprocess.run([sys.executable, '-c', code], cwd=SRC, capture_output=True, text=True, check=True)
+        modules = set(result.stdout.split())
+        for module in ('dataclasses', 'links', 'search', 'sitemap', 'compress', 'assets', 'shard', 'urllib.parse'):
+            self.assertNotIn(module, modules)
+
+
+class TestRenderOne(SiteTestCase):
+    def tearDown(self) -> None:
+        set_escaping(False)
+        super().tearDown()
+
+    def test_stdout(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = cli.main(['render-one', os.path.join(self.content, 'index.md'), '--template', self.template])
+        self.assertEqual(status, 0)
+        self.assertEqual(out.getvalue(), '<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>')
+
+    def test_output_file(self):
+        output = os.path.join(self.root, 'out', 'page.html')
+        write(os.path.join(self.content, 'page.md'), '1 < 2')
+        status = cli.main(['render-one', os.path.join(self.content, 'page.md'), '--template', self.template,
+                           '-o', output, '--escape-html'])
+        self.assertEqual(status, 0)
+        self.assertEqual(read(output), '<title>page</title><div><p>1 &lt; 2</p></div>')
+
+    def test_error(self):
+        write(os.path.join(self.content, 'broken.md'), 'An **unclosed bold')
+        output = os.path.join(self.root, 'broken.html')
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            status = cli.main(['render-one', os.path.join(self.content, 'broken.md'), '--template', self.template,
+                               '-o', output])
+        self.assertEqual(status, 1)
+        self.assertIn('broken.md', err.getvalue())
+        self.assertFalse(os.path.exists(output))
+
+
+class TestArguments(unittest.TestCase):
+    def test_unknown_argument(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.main(['build', '--no-such-flag'])
+
+    def test_bench_passes_arguments_through(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = cli.main(['bench', '--documents', '1', '--size', '500', '--repeat', '1'])
+        self.assertEqual(status, 0)
+        self.assertIn('markdown_to_blocks', out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#python
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from compress import gzip_bytes, precompress
+from test_build import SiteTestCase, write
+
+
+class TestGzipBytes(unittest.TestCase):
+    def test_round_trip(self):
+        data = b'<p>hello</p>' * 100
+        self.assertEqual(gzip.decompress(gzip_bytes(data)), data)
+        self.assertEqual(gzip.decompress(gzip_bytes(b'', level=1)), b'')
+
+    def test_reproducible(self):
+        data = os.urandom(1000)
+        self.assertEqual(gzip_bytes(data), gzip_bytes(data))
+        self.assertEqual(gzip_bytes(data)[4:8], b'\x00\x00\x00\x00')
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        write(os.path.join(self.root, 'index.html'), '<p>home</p>' * 200)
+        write(os.path.join(self.root, 'blog', 'post.html'), '<p>post</p>' * 200)
+        write(os.path.join(self.root, 'styles.css'), 'body{}')
+        write(os.path.join(self.root, 'logo.png'), 'x' * 5000)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def sidecar(self, relative: str) -> str:
+        return os.path.join(self.root, relative + '.gz')
+
+    def test_compresses_large_text_files(self):
+        record, report = precompress(self.root, {}, min_size=100)
+        self.assertEqual(sorted(report.compressed), ['blog/post.html', 'index.html'])
+        self.assertEqual(sorted(record), ['blog/post.html', 'index.html'])
+        with gzip.open(self.sidecar('index.html'), 'rt') as f:
+            self.assertEqual(f.read(), '<p>home</p>' * 200)
+        self.assertFalse(os.path.exists(self.sidecar('styles.css')))
+        self.assertFalse(os.path.exists(self.sidecar('logo.png')))
+
+    def test_unchanged_files_are_skipped(self):
+        record, _ = precompress(self.root, {}, min_size=100)
+        _, report = precompress(self.root, record, min_size=100)
+        self.assertEqual(report.compressed, [])
+        self.assertEqual(len(report.unchanged), 2)
+
+    def test_rewritten_with_same_content_is_not_recompressed(self):
+        record, _ = precompress(self.root, {}, min_size=100)
+        os.utime(os.path.join(self.root, 'index.html'), ns=(1, 1))
+        record, report = precompress(self.root, record, min_size=100)
+        self.assertEqual(report.compressed, [])
+        self.assertEqual(record['index.html'][1], 1)
+
+    def test_changed_file_is_recompressed(self):
+        record, _ = precompress(self.root, {}, min_size=100)
+        write(os.path.join(self.root, 'index.html'), '<p>new home</p>' * 200)
+        _, report = precompress(self.root, record, min_size=100)
+        self.assertEqual(report.compressed, ['index.html'])
+        with gzip.open(self.sidecar('index.html'), 'rt') as f:
+            self.assertEqual(f.read(), '<p>new home</p>' * 200)
+
+    def test_stale_sidecars_are_removed(self):
+        record, _ = precompress(self.root, {}, min_size=100)
+        shutil.rmtree(os.path.join(self.root, 'blog'))
+        write(os.path.join(self.root, 'index.html'), 'short')
+        record, report = precompress(self.root, record, min_size=100)
+        self.assertEqual(report.removed, ['blog/post.html', 'index.html'])
+        self.assertEqual(record, {})
+        self.assertFalse(os.path.exists(self.sidecar('index.html')))
+
+
+class TestBuildPrecompress(SiteTestCase):
+    def test_build_writes_and_removes_sidecars(self):
+        report = self.build(gzip_min_size=0)
+        self.assertEqual(sorted(report.compressed.compressed), ['blog/first.html', 'blog/second.html', 'index.html', 'pages.json'])
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'index.html.gz')))
+
+        report = self.build(gzip_min_size=0)
+        self.assertEqual(report.compressed.compressed, [])
+
+        report = self.build()
+        self.assertEqual(len(report.compressed.removed), 4)
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'index.html.gz')))
+
+
+if __name__ == "__main__":
+    unittest.main()
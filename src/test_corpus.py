@@ -0,0 +1,35 @@
+#python
+
+import unittest
+
+from block_markdown import markdown_to_html_node
+from corpus import KINDS, generate_corpus, generate_document
+
+
+class TestCorpus(unittest.TestCase):
+    def test_reproducible(self):
+        self.assertEqual(generate_document('mixed', 5000, seed=3), generate_document('mixed', 5000, seed=3))
+        self.assertNotEqual(generate_document('mixed', 5000, seed=3), generate_document('mixed', 5000, seed=4))
+
+    def test_size(self):
+        for kind in KINDS:
+            with self.subTest(kind=kind):
+                self.assertGreaterEqual(len(generate_document(kind, 5000)), 5000)
+
+    def test_documents_render(self):
+        for kind in KINDS:
+            with self.subTest(kind=kind):
+                markdown_to_html_node(generate_document(kind, 20_000)).to_html()
+
+    def test_mix(self):
+        corpus = generate_corpus({'mixed': 3, 'code': 1}, documents=8, size=1000)
+        self.assertEqual(len(corpus), 8)
+        self.assertEqual(sum(document.startswith('# Code') for document in corpus), 2)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            generate_document('tables', 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
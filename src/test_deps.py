@@ -0,0 +1,220 @@
+#python
+
+import io
+import json
+import os
+import shutil
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from build import MANIFEST_NAME, build_site, find_sources
+from cli import main
+from deps import DEPS_NAME, DependencyGraph, load_deps
+from merge import merge_shards
+from page import expand_includes
+from render_cache import RenderCache
+from test_build import SiteTestCase, read, write
+
+
+def touch_later(path: str, text: str) -> None:
+    """Write path so its mtime is sure to differ from the last write."""
+    write(path, text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestExpandIncludes(SiteTestCase):
+    def test_nested_includes_are_recorded(self):
+        write(os.path.join(self.content, '_parts', 'outer.md'), 'Outer\n\n{{> inner.md }}')
+        write(os.path.join(self.content, '_parts', 'inner.md'), 'Inner')
+        reads = {}
+        source = os.path.join(self.content, 'page.md')
+        blocks = list(expand_includes(['# Page', '{{> _parts/outer.md }}', 'End'], source, reads))
+        self.assertEqual(blocks, ['# Page', 'Outer', 'Inner', 'End'])
+        self.assertEqual(sorted(os.path.relpath(path, self.content) for path in reads),
+                         [os.path.join('_parts', 'inner.md'), os.path.join('_parts', 'outer.md')])
+
+    def test_cycle(self):
+        write(os.path.join(self.content, '_a.md'), '{{> _b.md }}')
+        write(os.path.join(self.content, '_b.md'), '{{> _a.md }}')
+        with self.assertRaisesRegex(ValueError, 'cycle'):
+            list(expand_includes(['{{> _a.md }}'], os.path.join(self.content, 'page.md')))
+
+    def test_include_inside_text_is_left_alone(self):
+        self.assertEqual(list(expand_includes(['see {{> x.md }}'], 'page.md')), ['see {{> x.md }}'])
+
+    def test_underscore_files_are_not_pages(self):
+        write(os.path.join(self.content, '_footer.md'), 'Footer')
+        write(os.path.join(self.content, '_parts', 'nav.md'), 'Nav')
+        self.assertEqual(find_sources(self.content), ['blog/first.md', 'blog/second.md', 'index.md'])
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_round_trip_and_queries(self):
+        graph = DependencyGraph()
+        graph.record('a.md', {'_nav.md': (1, 2, 'n'), '_foot.md': (3, 4, 'f')})
+        graph.record('b.md', {'_nav.md': (1, 2, 'n')})
+        data = graph.to_json()
+        self.assertEqual(data['files'], [['_foot.md', 3, 4, 'f'], ['_nav.md', 1, 2, 'n']])
+        self.assertEqual(data['pages'], {'a.md': [0, 1], 'b.md': [1]})
+        loaded = DependencyGraph.from_json(json.loads(json.dumps(data)))
+        self.assertEqual(loaded.users('_nav.md'), ['a.md', 'b.md'])
+        self.assertEqual(loaded.dirty({'_foot.md'}), {'a.md': '_foot.md'})
+
+    def test_disagreeing_reads_count_as_changed(self):
+        graph = DependencyGraph()
+        graph.record('a.md', {'_nav.md': (1, 2, 'old')})
+        graph.record('b.md', {'_nav.md': (1, 2, 'new')})
+        self.assertEqual(graph.files['_nav.md'][2], '')
+
+    def test_retain_drops_unused_files(self):
+        graph = DependencyGraph()
+        graph.record('a.md', {'_nav.md': (1, 2, 'n')})
+        graph.record('b.md', {'_foot.md': (1, 2, 'f')})
+        graph.retain(['a.md'])
+        self.assertEqual(list(graph.files), ['_nav.md'])
+
+
+class TestIncludeRebuilds(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.nav = os.path.join(self.content, '_parts', 'nav.md')
+        write(self.nav, '[home](/)')
+        write(os.path.join(self.content, '_parts', 'footer.md'), 'Footer\n\n{{> nav.md }}')
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First\n\n{{> ../_parts/nav.md }}\n\nPost one')
+        write(os.path.join(self.content, 'blog', 'second.md'), '# Second\n\n{{> ../_parts/footer.md }}')
+
+    def test_partial_change_rebuilds_only_its_users(self):
+        report = self.build()
+        self.assertEqual(report.rendered, ['blog/first.md', 'blog/second.md', 'index.md'])
+        self.assertIn('<a href="/">home</a>', read(os.path.join(self.output, 'blog', 'second.html')))
+
+        touch_later(self.nav, '[start](/)')
+        report = self.build()
+        self.assertEqual(report.rendered, ['blog/first.md', 'blog/second.md'])
+        self.assertEqual(report.reasons, {
+            'blog/first.md': 'dependency changed: _parts/nav.md',
+            'blog/second.md': 'dependency changed: _parts/nav.md',
+        })
+        self.assertIn('start', read(os.path.join(self.output, 'blog', 'second.html')))
+
+        touch_later(os.path.join(self.content, '_parts', 'footer.md'), 'New footer')
+        report = self.build()
+        self.assertEqual(report.rendered, ['blog/second.md'])
+        # second.md no longer reads nav.md, so changing it leaves second.md alone.
+        self.assertEqual(load_deps(self.output).users('_parts/nav.md'), ['blog/first.md'])
+        touch_later(self.nav, '[again](/)')
+        self.assertEqual(self.build().rendered, ['blog/first.md'])
+
+    def test_touched_but_unchanged_partial_rebuilds_nothing(self):
+        self.build()
+        touch_later(self.nav, read(self.nav))
+        report = self.build()
+        self.assertEqual(report.rendered, [])
+        self.assertEqual(load_deps(self.output).files['_parts/nav.md'][1], os.stat(self.nav).st_mtime_ns)
+
+    def test_missing_include_is_an_error_until_it_exists(self):
+        self.build()
+        os.remove(self.nav)
+        report = self.build()
+        self.assertEqual([source for source, _ in report.errors], ['blog/first.md', 'blog/second.md'])
+        write(self.nav, '[back](/)')
+        self.assertEqual(self.build().rendered, ['blog/first.md', 'blog/second.md'])
+
+    def test_streamed_and_parallel_builds_record_the_same_graph(self):
+        self.build()
+        expected = load_deps(self.output).pages
+        for kwargs in ({'stream_threshold': 0}, {'jobs': 2}):
+            os.remove(os.path.join(self.output, MANIFEST_NAME))
+            self.build(**kwargs)
+            self.assertEqual(load_deps(self.output).pages, expected)
+
+    def test_render_cache_is_keyed_by_includes(self):
+        render_cache = RenderCache(os.path.join(self.root, 'cache'))
+        self.build(render_cache=render_cache)
+        os.remove(os.path.join(self.output, 'blog', 'first.html'))
+        report = self.build(render_cache=render_cache)
+        self.assertEqual(report.cached, ['blog/first.md'])
+        self.assertEqual(report.reasons, {'blog/first.md': 'output missing'})
+
+        touch_later(self.nav, '[start](/)')
+        report = self.build(render_cache=render_cache)
+        self.assertEqual(report.cached, [])
+        self.assertIn('start', read(os.path.join(self.output, 'blog', 'first.html')))
+
+    def test_render_cache_hits_without_the_graph(self):
+        # A runner that restored only the cache has no .deps.json.
+        render_cache = RenderCache(os.path.join(self.root, 'cache'))
+        self.build(render_cache=render_cache)
+        expected = load_deps(self.output).pages
+        shutil.rmtree(self.output)
+        report = self.build(render_cache=render_cache)
+        self.assertEqual(report.cached, ['blog/first.md', 'blog/second.md', 'index.md'])
+        self.assertEqual(load_deps(self.output).pages, expected)
+
+        shutil.rmtree(self.output)
+        touch_later(self.nav, '[start](/)')
+        report = self.build(render_cache=render_cache)
+        self.assertEqual(report.cached, ['index.md'])
+        self.assertIn('start', read(os.path.join(self.output, 'blog', 'first.html')))
+
+    def test_template_partial(self):
+        header = os.path.join(self.root, 'parts', 'header.html')
+        write(header, '<header>Site</header>')
+        write(self.template, '{{> parts/header.html }}<title>{{ Title }}</title>{{ Content }}')
+        self.build()
+        self.assertTrue(read(os.path.join(self.output, 'index.html')).startswith('<header>Site</header>'))
+
+        touch_later(header, '<header>New</header>')
+        report = self.build()
+        self.assertEqual(len(report.rendered), 3)
+        self.assertEqual(set(report.reasons.values()), {f'template changed: {header}'})
+
+    def test_merge_combines_graphs(self):
+        dirs = [os.path.join(self.root, f'shard{index}') for index in (1, 2)]
+        for index, directory in enumerate(dirs, 1):
+            build_site(self.content, directory, self.template, shard=(index, 2))
+        merged = os.path.join(self.root, 'merged')
+        self.assertEqual(merge_shards(dirs, merged).conflicts, [])
+        self.assertEqual(load_deps(merged).users('_parts/nav.md'), ['blog/first.md', 'blog/second.md'])
+        self.assertTrue(os.path.exists(os.path.join(merged, DEPS_NAME)))
+
+    def test_explain(self):
+        self.build()
+        touch_later(self.nav, '[start](/)')
+
+        def explain(path: str) -> str:
+            out = io.StringIO()
+            with redirect_stdout(out):
+                status = main(['explain', path, '--content', self.content, '--output', self.output,
+                               '--template', self.template])
+            self.assertEqual(status, 0)
+            return out.getvalue()
+
+        self.assertEqual(explain('blog/second.md'), '\n'.join([
+            'blog/second.md -> blog/second.html',
+            'last rendered: new page',
+            'includes: _parts/footer.md, _parts/nav.md',
+            f'template: {self.template}',
+            'next build: renders it, dependency changed: _parts/nav.md',
+        ]) + '\n')
+        self.build()
+        output = explain('blog/second.md')
+        self.assertIn('last rendered: dependency changed: _parts/nav.md\n', output)
+        self.assertIn('next build: up to date\n', output)
+        self.assertIn('included by: blog/first.md, blog/second.md\n', explain('_parts/nav.md'))
+
+    def test_large_graph_check_is_fast(self):
+        graph = DependencyGraph()
+        for i in range(10000):
+            graph.record(f'page{i}.md', {'_nav.md': (1, 2, 'n'), f'_part{i % 100}.md': (1, 2, 'p')})
+        start = time.perf_counter()
+        dirty = graph.dirty({'_part7.md'})
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(dirty), 100)
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
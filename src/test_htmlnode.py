@@ -2,7 +2,7 @@
 
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_attribute, escape_text, set_escaping
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -60,6 +60,11 @@ class TestHTMLNode(unittest.TestCase):
         self.assertIsNone(node.children)
         self.assertIsNone(node.props)
 
+    def test_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("p", "text"), ParentNode("div", [])):
+            with self.assertRaises(AttributeError):
+                node.__dict__
+
     def test_nested_children(self):
         child_node = HTMLNode("span", "child")
         parent_node = HTMLNode("div", None, [child_node])
@@ -139,6 +144,87 @@ class TestParentNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             ParentNode("div", None).to_html() # type: ignore[arg-type]
 
+    def test_nested_child_valueError(self):
+        node = ParentNode("div", [ParentNode("span", None)]) # type: ignore[arg-type]
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_render_into_chunks(self):
+        node = ParentNode(
+            "ul",
+            [
+                ParentNode("li", [LeafNode("b", "one")]),
+                ParentNode("li", [LeafNode(None, "two")], {"class": "last"}),
+            ],
+        )
+        chunks = []
+        node.render_into(chunks.append)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), node.to_html())
+        self.assertEqual(
+            node.to_html(),
+            '<ul><li><b>one</b></li><li class="last">two</li></ul>',
+        )
+
+    def test_deep_nesting(self):
+        depth = 20000
+        node = LeafNode(None, "deep")
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<blockquote>" * depth + "deep"))
+        self.assertTrue(html.endswith("</blockquote>" * depth))
+
+
+class TestEscaping(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous = set_escaping(True)
+
+    def tearDown(self) -> None:
+        set_escaping(self.previous)
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text('a < b && c > "d"'), 'a &lt; b &amp;&amp; c &gt; "d"')
+        self.assertEqual(escape_text('&lt;'), '&amp;lt;')
+
+    def test_clean_string_is_returned_as_is(self):
+        text = 'nothing to escape here'
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute('a"b\'c&d<e>'), 'a&quot;b&#x27;c&amp;d&lt;e&gt;')
+
+    def test_leaf_value_is_escaped(self):
+        self.assertEqual(LeafNode('code', '<br> & co').to_html(), '<code>&lt;br&gt; &amp; co</code>')
+        self.assertEqual(LeafNode(None, '1 < 2').to_html(), '1 &lt; 2')
+
+    def test_props_are_escaped(self):
+        node = LeafNode('a', 'link', {'href': '/?a=1&b="2"'})
+        self.assertEqual(node.to_html(), '<a href="/?a=1&amp;b=&quot;2&quot;">link</a>')
+
+    def test_props_are_not_cached_by_identity(self):
+        props = {'href': '/one'}
+        node = LeafNode('a', 'link', props)
+        self.assertEqual(node.props_to_html(), ' href="/one"')
+        props['href'] = '/two'
+        self.assertEqual(node.props_to_html(), ' href="/two"')
+
+    def test_non_string_props_are_stringified(self):
+        self.assertEqual(LeafNode('a', 'x', {'href': None}).to_html(), '<a href="None">x</a>')
+        self.assertEqual(LeafNode('img', '', {'width': 640}).props_to_html(), ' width="640"')
+        self.assertEqual(LeafNode('a', 'x', {'data': ['<a>']}).props_to_html(), ' data="[&#x27;&lt;a&gt;&#x27;]"')
+        set_escaping(False)
+        self.assertEqual(LeafNode('a', 'x', {'href': None}).to_html(), '<a href="None">x</a>')
+
+    def test_parent_props_are_escaped(self):
+        node = ParentNode('div', [LeafNode('b', 'x')], {'title': '<hi>'})
+        self.assertEqual(node.to_html(), '<div title="&lt;hi&gt;"><b>x</b></div>')
+
+    def test_off_by_default(self):
+        set_escaping(False)
+        self.assertEqual(LeafNode('a', '<b>', {'href': '"'}).to_html(), '<a href="""><b></a>')
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -10,6 +10,7 @@ from inline_markdown import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_textnodes_reference,
     )
 
 class TestSplitMarkdownNode(unittest.TestCase):
@@ -225,6 +226,21 @@ class TestSplitNodeLinks(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_links_skips_matching_image(self):
+        node = TextNode(
+            "An ![same](https://boot.dev) image and a [same](https://boot.dev) link",
+            TextType.TEXT,
+        )
+        new_nodes = split_nodes_link([node])
+        self.assertListEqual(
+            [
+                TextNode("An ![same](https://boot.dev) image and a ", TextType.TEXT),
+                TextNode("same", TextType.LINK, "https://boot.dev"),
+                TextNode(" link", TextType.TEXT),
+            ],
+            new_nodes,
+        )
+
 class TestTextToTextnode(unittest.TestCase):
     def test_all_text_types(self):
         text = 'This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)'
@@ -243,4 +259,38 @@ class TestTextToTextnode(unittest.TestCase):
                 TextNode("link", TextType.LINK, "https://boot.dev"),
             ],
             result
-        )
\ No newline at end of file
+        )
+
+class TestTextToTextnodeReference(unittest.TestCase):
+    samples = [
+        '',
+        'Plain text without markup',
+        'This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)',
+        'This is two **bold** **words**',
+        '**bold at start** and `code at end`',
+        '_This is all italic_',
+        '**_nested_ inside bold** stays bold',
+        '`code` then _italic_ then **bold**',
+        'An ![image](https://a.example/x.png)[link right after](https://b.example)',
+        '![first](a.png)![second](b.png) and [one](x) [two](y) trailing',
+        'A [snake_case link](https://example.com/a_b) here',
+        'Bang before a link! [not an image](https://example.com)',
+        'Unclosed [bracket and ](paren but [a](b) works',
+        '****empty bold and __ empty italic',
+    ]
+
+    def test_matches_reference(self):
+        for text in self.samples:
+            with self.subTest(text=text):
+                self.assertListEqual(
+                    text_to_textnodes_reference(text),
+                    text_to_textnodes(text),
+                )
+
+    def test_odd_delimiters_raise(self):
+        for text in ['one **bold', 'one _italic', 'one `code', '`code with **stars**` split by bold']:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception):
+                    text_to_textnodes_reference(text)
+                with self.assertRaises(Exception):
+                    text_to_textnodes(text)
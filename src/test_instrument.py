@@ -0,0 +1,152 @@
+#python
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import block_markdown
+import instrument
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+from build import build_site
+from htmlnode import ParentNode
+from render_cache import RenderCache
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self) -> None:
+        instrument.disable()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(instrument.active())
+        self.assertIsNone(getattr(block_markdown.markdown_to_blocks, '__wrapped__', None))
+        self.assertIs(instrument.page('index.md'), instrument.page('other.md'))
+
+    def test_enable_and_disable_restore_functions(self):
+        original_blocks = block_markdown.markdown_to_blocks
+        original_render_into = ParentNode.render_into
+        instrument.enable()
+        self.assertIsNot(block_markdown.markdown_to_blocks, original_blocks)
+        self.assertIsNot(ParentNode.render_into, original_render_into)
+        # Nothing outside the stages' own modules is touched.
+        self.assertIs(markdown_to_blocks, original_blocks)
+        instrument.disable()
+        self.assertIs(block_markdown.markdown_to_blocks, original_blocks)
+        self.assertIs(ParentNode.render_into, original_render_into)
+
+    def test_no_module_imports_a_stage_by_name(self):
+        # Such a module would keep calling the original while recording.
+        # Benchmarks time the stages themselves, and main runs the cli.
+        SKIPPED = ('test_', 'bench', 'main')
+        for filename in os.listdir(SRC):
+            name, extension = os.path.splitext(filename)
+            if extension == '.py' and not name.startswith(SKIPPED):
+                importlib.import_module(name)
+        stages = {}
+        for _, module_name, attribute, _ in instrument.STAGES:
+            owner = sys.modules[module_name]
+            for part in attribute.split('.'):
+                owner = getattr(owner, part)
+            stages[id(owner)] = f'{module_name}.{attribute}'
+        for name, module in list(sys.modules.items()):
+            if os.path.dirname(getattr(module, '__file__', None) or '') != SRC or name.startswith(SKIPPED):
+                continue
+            for attribute, value in vars(module).items():
+                stage = stages.get(id(value))
+                if stage is not None and not stage.startswith(f'{name}.'):
+                    self.fail(f'{name}.{attribute} is {stage}; call it through its module')
+
+    def test_stage_counts(self):
+        md = '# Title\n\nSome **bold** text\n\n- one\n- two'
+        with instrument.recording() as recorder:
+            html = markdown_to_html_node(md).to_html()
+        stages = recorder.to_dict()['stages']
+        self.assertEqual(stages['blocks']['calls'], 1)
+        self.assertEqual(stages['blocks']['nodes'], 3)
+        self.assertEqual(stages['block_type']['calls'], 3)
+        self.assertEqual(stages['inline']['calls'], 4)
+        self.assertEqual(stages['inline']['nodes'], 6)
+        self.assertEqual(stages['html_nodes']['calls'], 6)
+        self.assertEqual(stages['to_html']['calls'], 1)
+        self.assertEqual(stages['to_html']['output'], len(html))
+
+    def test_pages(self):
+        with instrument.recording() as recorder:
+            with instrument.page('a.md'):
+                markdown_to_html_node('one block')
+                instrument.add_page_bytes(10)
+            with instrument.page('b.md'):
+                markdown_to_html_node('first\n\nsecond')
+        pages = recorder.to_dict()['pages']
+        self.assertEqual(pages['a.md']['inline']['calls'], 1)
+        self.assertEqual(pages['a.md']['page']['output'], 10)
+        self.assertEqual(pages['b.md']['inline']['calls'], 2)
+        self.assertIn('a.md', recorder.summary())
+
+    def test_merge(self):
+        with instrument.recording() as recorder:
+            with instrument.page('a.md'):
+                markdown_to_html_node('text')
+        data = recorder.to_dict()
+        recorder.merge(data)
+        self.assertEqual(recorder.to_dict()['stages']['inline']['calls'], 2)
+        self.assertEqual(recorder.to_dict()['pages']['a.md']['inline']['calls'], 2)
+
+    def test_streamed_and_cached_pages_are_counted(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        content = os.path.join(root, 'content')
+        output = os.path.join(root, 'public')
+        os.makedirs(content)
+        with open(os.path.join(content, 'page.md'), 'w', encoding='utf-8') as f:
+            f.write('# Café\n\nCrème **brûlée**')
+        template = os.path.join(root, 'template.html')
+        with open(template, 'w') as f:
+            f.write('{{ Content }}')
+
+        with instrument.recording() as recorder:
+            build_site(content, output, template, stream_threshold=0)
+        with open(os.path.join(output, 'page.html'), 'rb') as f:
+            size = len(f.read())
+        stages = recorder.to_dict()['stages']
+        self.assertEqual(stages['to_html']['calls'], 2)
+        self.assertEqual(stages['to_html']['output'], size - len('<div></div>'))
+
+        shutil.rmtree(output)
+        render_cache = RenderCache(os.path.join(root, 'cache'))
+        build_site(content, output, template, render_cache=render_cache)
+        os.remove(os.path.join(output, 'page.html'))
+        with instrument.recording() as recorder:
+            report = build_site(content, output, template, render_cache=render_cache)
+        self.assertEqual(report.cached, ['page.md'])
+        data = recorder.to_dict()
+        self.assertEqual(data['stages']['render_cache']['output'], size)
+        self.assertEqual(data['pages']['page.md']['page']['output'], size)
+        self.assertNotIn('to_html', data['stages'])
+
+    def test_parallel_build_reports_worker_counts(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        content = os.path.join(root, 'content')
+        os.makedirs(content)
+        for i in range(8):
+            with open(os.path.join(content, f'page{i}.md'), 'w') as f:
+                f.write(f'# Page {i}\n\nBody')
+        template = os.path.join(root, 'template.html')
+        with open(template, 'w') as f:
+            f.write('{{ Content }}')
+
+        with instrument.recording() as recorder:
+            build_site(content, os.path.join(root, 'public'), template, jobs=2)
+        data = recorder.to_dict()
+        self.assertEqual(len(data['pages']), 8)
+        self.assertEqual(data['stages']['page']['calls'], 8)
+        self.assertEqual(data['stages']['inline']['calls'], 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
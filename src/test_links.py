@@ -0,0 +1,211 @@
+#python
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from build import MANIFEST_NAME, load_manifest
+from cli import main
+from links import LinkScanner, check_external, check_links, scan_html
+from test_build import SiteTestCase, write
+
+
+class TestScanHtml(unittest.TestCase):
+    def test_scan(self):
+        meta = scan_html(
+            '<h1 id="top">T</h1><a href="a.html?x=1&amp;y=2">a</a>'
+            "<img src='i.png' alt=\"x\"><a href=\"a.html?x=1&amp;y=2\">again</a>"
+        )
+        self.assertEqual(meta, {'links': ['a.html?x=1&y=2', 'i.png'], 'anchors': ['top']})
+
+    def test_code_and_text_are_not_links(self):
+        meta = scan_html(
+            '<pre><code><a href="/nowhere">x</a></code></pre>'
+            '<p>Use <code> href="missing.html"</code> or write src="x.png" id="y" in prose.</p>'
+            '<a href="real.html">real</a>'
+        )
+        self.assertEqual(meta, {'links': ['real.html'], 'anchors': []})
+
+    def test_code_across_chunks(self):
+        scanner = LinkScanner()
+        for chunk in ('<pre><code>', '<a href="/nowhere">', '</code></pre>', '<a href="b.html">', 'b', '</a>'):
+            scanner.feed(chunk)
+        self.assertEqual(scanner.meta(), {'links': ['b.html'], 'anchors': []})
+
+    def test_chunks(self):
+        scanner = LinkScanner()
+        for chunk in ('<div id="main">', 'text = more', '<a href="b.html">', 'b', '</a>', '</div>'):
+            scanner.feed(chunk)
+        self.assertEqual(scanner.meta(), {'links': ['b.html'], 'anchors': ['main']})
+
+
+class TestCheckLinks(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        write(self.template, '<nav id="nav"><a href="/">Home</a><a href="/styles.css">css</a></nav>{{ Content }}')
+        self.static = os.path.join(self.root, 'static')
+        write(os.path.join(self.static, 'styles.css'), 'body {}')
+        write(os.path.join(self.static, 'img', 'logo.png'), 'png')
+        write(os.path.join(self.content, 'blog', 'first.md'), '\n\n'.join([
+            '# First',
+            '[second](second.html) [pretty](second) [up](../index.html) [dir](./) [anchor](#nav)',
+            '[other anchor](/index.html#nav) ![logo](/img/logo.png) [mail](mailto:me@example.com)',
+            '[missing](missing.html) [bad anchor](second.html#nope) [outside](../../etc/passwd)',
+            '[web](https://example.org/) [query](second.html?page=2)',
+        ]))
+
+    def check(self, **kwargs):
+        self.build(static_dir=self.static, **kwargs)
+        manifest = load_manifest(os.path.join(self.output, MANIFEST_NAME))
+        return check_links(self.output, manifest['pages'], manifest['assets'])
+
+    def test_broken_links(self):
+        report = self.check()
+        self.assertEqual(report.pages, 3)
+        self.assertEqual(report.broken, [
+            ('blog/first.html', '../../etc/passwd', 'no such page or file'),
+            ('blog/first.html', './', 'no such page or file'),
+            ('blog/first.html', 'missing.html', 'no such page or file'),
+            ('blog/first.html', 'second.html#nope', 'no such anchor'),
+        ])
+
+    def test_directory_link_needs_index(self):
+        self.assertIn(('blog/first.html', './', 'no such page or file'), self.check().broken)
+        write(os.path.join(self.content, 'blog', 'index.md'), '# Blog')
+        self.assertNotIn(('blog/first.html', './', 'no such page or file'), self.check().broken)
+
+    def test_streamed_and_cached_pages_record_links(self):
+        expected = self.check().broken
+        os.remove(os.path.join(self.output, MANIFEST_NAME))
+        self.assertEqual(self.check(stream_threshold=0).broken, expected)
+
+    def test_site_url_base_path(self):
+        write(self.template, '<a href="https://example.com/docs/blog/first.html#top">me</a>'
+                             '<a href="/docs/">home</a><a href="/elsewhere/">x</a>{{ Content }}')
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First')
+        self.build()
+        manifest = load_manifest(os.path.join(self.output, MANIFEST_NAME))
+        report = check_links(self.output, manifest['pages'], site_url='https://example.com/docs/')
+        broken = sorted({(target, reason) for _, target, reason in report.broken})
+        self.assertEqual(broken, [
+            ('/elsewhere/', 'no such page or file'),
+            ('https://example.com/docs/blog/first.html#top', 'no such anchor'),
+        ])
+
+    def test_local_check_is_fast(self):
+        pages = {}
+        for i in range(1000):
+            links = [f'/section{j}/page{(i + j) % 1000}.html#h{j}' for j in range(10)]
+            links += ['/', '/styles.css', '../index.html', f'page{i}.html', '#h1', 'https://example.org/']
+            pages[f'section{i % 10}/page{i}.md'] = {
+                'output': f'section{i % 10}/page{i}.html', 'links': links, 'anchors': [f'h{j}' for j in range(10)],
+            }
+        pages['index.md'] = {'output': 'index.html', 'links': [], 'anchors': []}
+        start = time.perf_counter()
+        report = check_links(self.output, pages, {'styles.css': []})
+        elapsed = time.perf_counter() - start
+        self.assertEqual(report.links, 16000)
+        # Only section{i % 10}/page{i} exist, so most cross-section links are broken.
+        self.assertTrue(report.broken)
+        self.assertLess(elapsed, 0.5)
+
+    def test_html_shown_in_code_is_not_checked(self):
+        write(os.path.join(self.content, 'blog', 'first.md'), '\n\n'.join([
+            '# First',
+            '```\n<a href="/nowhere">x</a>\n```',
+            'Inline ` href="missing.html"` code, and prose with src="gone.png".',
+        ]))
+        for escape_html in (False, True):
+            self.assertEqual(self.check(escape_html=escape_html).broken, [])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = main(['build', '--content', self.content, '--output', self.output, '--template', self.template,
+                           '--static', self.static, '--check-links', '--escape-html'])
+        self.assertEqual(status, 0)
+
+    def test_cli(self):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = main(['build', '--content', self.content, '--output', self.output, '--template', self.template,
+                           '--static', self.static, '--check-links'])
+        self.assertEqual(status, 1)
+        self.assertIn('broken link: blog/first.html: missing.html: no such page or file', err.getvalue())
+        self.assertIn('4 broken', out.getvalue())
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def respond(self, head: bool) -> None:
+        type(self).requests.append((self.command, self.path))
+        if self.path == '/moved':
+            self.send_response(301)
+            self.send_header('Location', '/ok')
+        elif self.path == '/no-head' and head:
+            self.send_response(405)
+        elif self.path in ('/ok', '/no-head'):
+            self.send_response(200)
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.respond(True)
+
+    def do_GET(self):
+        self.respond(False)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCheckExternal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        Handler.requests = []
+        self.root = tempfile.mkdtemp()
+        self.cache = os.path.join(self.root, 'links.json')
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+
+    def test_statuses_and_cache(self):
+        urls = [self.base + path for path in ('/ok', '/moved', '/no-head', '/missing')]
+        results, cached = check_external(urls, self.cache)
+        self.assertEqual(cached, 0)
+        self.assertEqual(results, {
+            self.base + '/ok': None,
+            self.base + '/moved': None,
+            self.base + '/no-head': None,
+            self.base + '/missing': 'HTTP 404',
+        })
+        self.assertIn(('GET', '/no-head'), Handler.requests)
+
+        Handler.requests = []
+        results, cached = check_external(urls, self.cache)
+        self.assertEqual(cached, 3)
+        self.assertEqual(Handler.requests, [('HEAD', '/missing')])
+        self.assertEqual(results[self.base + '/missing'], 'HTTP 404')
+
+    def test_timeout_and_refused(self):
+        results, _ = check_external([self.base + '/slow', 'http://127.0.0.1:9/'], self.cache, timeout=0.2)
+        self.assertEqual(results[self.base + '/slow'], 'no answer in 0.2s')
+        self.assertTrue(results['http://127.0.0.1:9/'].startswith('ConnectionRefusedError'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#python
+
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from corpus import KINDS, generate_document
+from page import extract_title, render_page, stream_page
+
+
+class TestExtractTitle(unittest.TestCase):
+    def test_first_heading(self):
+        md = '''
+Intro paragraph
+
+## Second level first
+
+# First level later
+'''
+        self.assertEqual(extract_title(md), 'Second level first')
+
+    def test_no_heading(self):
+        self.assertIsNone(extract_title('Just a paragraph'))
+
+
+class TestRenderPage(unittest.TestCase):
+    template = '<title>{{ Title }}</title><main>{{ Content }}</main>'
+
+    def test_render(self):
+        html = render_page('# Hello\n\nSome **bold** text', self.template)
+        self.assertEqual(
+            html,
+            '<title>Hello</title><main><div><h1>Hello</h1><p>Some <b>bold</b> text</p></div></main>',
+        )
+
+    def test_title_falls_back_to_file_name(self):
+        html = render_page('No heading here', self.template, 'blog/first-post.md')
+        self.assertEqual(
+            html,
+            '<title>first-post</title><main><div><p>No heading here</p></div></main>',
+        )
+
+
+    def test_extra_context(self):
+        html = render_page('# Hi', '{{ Title }} by {{ Author }}', context={'Author': 'me'})
+        self.assertEqual(html, 'Hi by me')
+
+
+class TestStreamPage(unittest.TestCase):
+    template = TestRenderPage.template
+
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def stream(self, markdown: str, name: str = 'page.md', template: str | None = None) -> str:
+        path = os.path.join(self.root, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(markdown)
+        chunks = []
+        stream_page(path, chunks.append, template or self.template)
+        return ''.join(chunks)
+
+    def test_matches_render_page(self):
+        for kind in KINDS:
+            markdown = generate_document(kind, 5000, seed=3)
+            self.assertEqual(self.stream(markdown), render_page(markdown, self.template), kind)
+
+    def test_title_falls_back_to_file_name(self):
+        self.assertEqual(
+            self.stream('No heading\r\n\r\nhere', 'first-post.md'),
+            render_page('No heading\r\n\r\nhere', self.template, 'first-post.md'),
+        )
+
+    def test_template_without_title(self):
+        self.assertEqual(self.stream('Body', template='{{ Content }}'), '<div><p>Body</p></div>')
+
+    def peak_memory(self, blocks: int) -> int:
+        block = 'A paragraph with **bold**, _italic_ and a [link](https://example.com) in it.'
+        path = os.path.join(self.root, 'large.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(f'{block} {i}' for i in range(blocks)))
+        tracemalloc.start()
+        try:
+            stream_page(path, lambda chunk: None, self.template)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_does_not_grow_with_document(self):
+        # Past the first few read chunks, a document four times as long
+        # should need no more memory.
+        small = self.peak_memory(2000)
+        large = self.peak_memory(8000)
+        self.assertLess(large, small * 1.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#python
+
+import json
+import os
+import threading
+import time
+import unittest
+
+from build import MANIFEST_NAME
+from pipeline import run_pipeline
+from test_build import SiteTestCase, read, write
+
+
+class Latency:
+    """Read and write callables that wait like a slow filesystem, counting how many run at once."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {'read': 0, 'write': 0}
+        self.peak = {'read': 0, 'write': 0}
+        self.written = []
+
+    def wait(self, kind: str) -> None:
+        with self.lock:
+            self.active[kind] += 1
+            self.peak[kind] = max(self.peak[kind], self.active[kind])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[kind] -= 1
+
+    def read(self, item: int) -> int:
+        self.wait('read')
+        if item < 0:
+            raise OSError(f'cannot read {item}')
+        return item * 10
+
+    def write(self, output: int) -> None:
+        self.wait('write')
+        self.written.append(output)
+
+
+class TestRunPipeline(unittest.TestCase):
+    def run_items(self, items, concurrency, delay=0.0):
+        io = Latency(delay)
+        processed = []
+        finished = []
+
+        def process(item, data):
+            processed.append((item, data))
+            if isinstance(data, Exception):
+                return None, f'error {item}'
+            return data + 1, item
+
+        run_pipeline(items, io.read, process, io.write, finished.append, concurrency)
+        return io, processed, finished
+
+    def test_order_and_errors(self):
+        io, processed, finished = self.run_items([1, 2, -3, 4], 2)
+        self.assertEqual([item for item, _ in processed], [1, 2, -3, 4])
+        self.assertIsInstance(processed[2][1], OSError)
+        self.assertEqual(sorted(io.written), [11, 21, 41])
+        self.assertEqual(sorted(finished, key=str), [1, 2, 4, 'error -3'])
+
+    def test_in_flight_is_bounded(self):
+        io, _, finished = self.run_items(range(40), 4, delay=0.005)
+        self.assertEqual(len(finished), 40)
+        self.assertLessEqual(io.peak['read'], 4)
+        self.assertLessEqual(io.peak['write'], 4)
+        self.assertGreater(io.peak['read'], 1)
+
+    def test_overlaps_io(self):
+        start = time.perf_counter()
+        self.run_items(range(20), 1, delay=0.01)
+        serial = time.perf_counter() - start
+        start = time.perf_counter()
+        self.run_items(range(20), 8, delay=0.01)
+        self.assertLess(time.perf_counter() - start, serial / 2)
+
+    def test_write_error_is_raised(self):
+        def write(output):
+            raise OSError('disk full')
+
+        with self.assertRaisesRegex(OSError, 'disk full'):
+            run_pipeline(range(10), lambda item: item, lambda item, data: (data, item), write, lambda result: None, 3)
+
+
+class TestPipelinedBuild(SiteTestCase):
+    def test_same_output_as_serial_build(self):
+        for i in range(20):
+            write(os.path.join(self.content, 'many', f'page{i}.md'), f'# Page {i}\n\nText *{i}*')
+        self.build()
+        expected = {name: read(os.path.join(self.output, 'many', name))
+                    for name in os.listdir(os.path.join(self.output, 'many'))}
+        manifest = self.pages()
+        os.remove(os.path.join(self.output, MANIFEST_NAME))
+
+        report = self.build(io_concurrency=4)
+        self.assertEqual(len(report.rendered), 23)
+        self.assertEqual(report.rendered, sorted(report.rendered))
+        self.assertEqual({name: read(os.path.join(self.output, 'many', name))
+                          for name in os.listdir(os.path.join(self.output, 'many'))}, expected)
+        self.assertEqual(self.pages(), manifest)
+
+    def pages(self) -> dict:
+        pages = json.loads(read(os.path.join(self.output, MANIFEST_NAME)))['pages']
+        for entry in pages.values():
+            del entry['modified']
+        return pages
+
+    def test_render_errors_are_reported(self):
+        write(os.path.join(self.content, 'loop.md'), '{{> loop.md }}')
+        report = self.build(io_concurrency=4)
+        self.assertEqual([source for source, _ in report.errors], ['loop.md'])
+        self.assertEqual(len(report.rendered), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
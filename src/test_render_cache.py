@@ -0,0 +1,124 @@
+#python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from render_cache import RenderCache
+from test_build import SiteTestCase, read, write
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache = RenderCache(self.directory)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_key_covers_every_input(self):
+        key = self.cache.key('1', 'template', 'index.md', 'hash')
+        self.assertEqual(key, self.cache.key('1', 'template', 'index.md', 'hash'))
+        self.assertNotEqual(key, self.cache.key('2', 'template', 'index.md', 'hash'))
+        self.assertNotEqual(key, self.cache.key('1', 'other', 'index.md', 'hash'))
+        self.assertNotEqual(key, self.cache.key('1', 'template', 'about.md', 'hash'))
+        self.assertNotEqual(key, self.cache.key('1', 'template', 'index.md', 'other'))
+
+    def test_put_and_get(self):
+        key = self.cache.key('1', 't', 'index.md', 'h')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, b'<p>page</p>')
+        self.assertEqual(self.cache.get(key), b'<p>page</p>')
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'corrupt': 0, 'stored': 1})
+
+    def test_entry_checks_its_includes(self):
+        key = self.cache.key('1', 't', 'index.md', 'h')
+        self.cache.put(key, b'<p>page</p>', {'_nav.md': 'n1'})
+        self.assertEqual(self.cache.get(key, {'_nav.md': 'n1'}.get), b'<p>page</p>')
+        self.assertIsNone(self.cache.get(key, {'_nav.md': 'n2'}.get))
+        self.assertIsNone(self.cache.get(key, {}.get))
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 3, 'corrupt': 0, 'stored': 1})
+
+    def test_shared_between_instances(self):
+        key = self.cache.key('1', 't', 'index.md', 'h')
+        self.cache.put(key, b'<p>page</p>')
+        self.assertEqual(RenderCache(self.directory).get(key), b'<p>page</p>')
+
+    def test_corrupt_entry_is_a_miss_and_removed(self):
+        key = self.cache.key('1', 't', 'index.md', 'h')
+        self.cache.put(key, b'<p>page</p>')
+        path = self.cache._path(key)
+        with open(path, 'r+b') as f:
+            f.seek(-3, os.SEEK_END)
+            f.write(b'XXX')
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.corrupt, 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_truncated_entry_is_a_miss(self):
+        key = self.cache.key('1', 't', 'index.md', 'h')
+        self.cache.put(key, b'<p>page</p>')
+        with open(self.cache._path(key), 'r+b') as f:
+            f.truncate(10)
+        self.assertIsNone(self.cache.get(key))
+
+    def test_prune_evicts_least_recently_used(self):
+        cache = RenderCache(self.directory, max_bytes=250)
+        keys = [cache.key('1', 't', f'page{i}.md', 'h') for i in range(3)]
+        for age, key in enumerate(keys):
+            cache.put(key, b'x' * 100)
+            os.utime(cache._path(key), ns=(age, age))
+        # Reading the oldest entry makes it the most recently used.
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertEqual(cache.prune(), 2)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNone(cache.get(keys[2]))
+
+    def test_prune_removes_stale_temp_files(self):
+        stale = os.path.join(self.directory, 'ab', '.tmp-dead')
+        fresh = os.path.join(self.directory, 'ab', '.tmp-live')
+        write(stale, 'partial')
+        write(fresh, 'partial')
+        os.utime(stale, (0, 0))
+        self.cache.prune()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+
+
+class TestBuildWithRenderCache(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = os.path.join(self.root, 'cache')
+
+    def test_fresh_output_reuses_cached_pages(self):
+        first = self.build(render_cache=RenderCache(self.cache_dir))
+        self.assertEqual(len(first.rendered), 3)
+        expected = read(os.path.join(self.output, 'blog', 'first.html'))
+
+        # Another machine: no output directory or manifest, same cache.
+        shutil.rmtree(self.output)
+        cache = RenderCache(self.cache_dir)
+        report = self.build(render_cache=cache, jobs=2)
+        self.assertEqual(report.rendered, [])
+        self.assertEqual(report.cached, ['blog/first.md', 'blog/second.md', 'index.md'])
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(read(os.path.join(self.output, 'blog', 'first.html')), expected)
+        self.assertEqual(self.build(render_cache=cache).cached, [])
+
+    def test_changed_inputs_miss(self):
+        self.build(render_cache=RenderCache(self.cache_dir))
+        shutil.rmtree(self.output)
+        write(os.path.join(self.content, 'index.md'), '# Home\n\nChanged')
+        report = self.build(render_cache=RenderCache(self.cache_dir))
+        self.assertEqual(report.rendered, ['index.md'])
+
+        shutil.rmtree(self.output)
+        report = self.build(render_cache=RenderCache(self.cache_dir), escape_html=True)
+        self.assertEqual(len(report.rendered), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+#python
+
+import json
+import os
+import tracemalloc
+import unittest
+
+from build import build_site
+from merge import merge_shards
+from search import (
+    SEARCH_DIR, SEARCH_STATE_NAME, decode_postings, encode_postings, index_source, page_terms, shard_name,
+    tokenize,
+)
+from test_build import SiteTestCase, read, write
+
+
+class TestTerms(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Hello, World! a Café 42'), ['hello', 'world', 'café', '42'])
+
+    def test_page_terms_skip_code_and_links(self):
+        markdown = '# Big Title\n\nSee [the docs](https://example.com/page) or `inline code`.\n\n```\nhidden words\n```'
+        self.assertEqual(dict(page_terms(markdown)), {'big': 1, 'title': 1, 'see': 1, 'or': 1})
+
+    def test_page_terms_strip_block_markers(self):
+        markdown = '> quoted text\n> more\n\n- item one\n- item two\n\n1. first\n2. second'
+        terms = page_terms(markdown)
+        self.assertEqual(terms['item'], 2)
+        self.assertEqual(set(terms), {'quoted', 'text', 'more', 'item', 'one', 'two', 'first', 'second'})
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name('hello'), 'he')
+        self.assertEqual(shard_name('42'), '42')
+        self.assertEqual(shard_name('é'), '_c3a9')
+        self.assertEqual(shard_name('ca'), 'ca')
+        self.assertEqual(shard_name('cé'), '_63c3a9')
+
+    def test_postings_round_trip(self):
+        postings = {0: 1, 3: 2, 40: 1, 1000: 37}
+        text = encode_postings(postings)
+        self.assertEqual(text, '0,3:2,11,qo:11')
+        self.assertEqual(decode_postings(text), postings)
+
+
+class TestSearchBuild(SiteTestCase):
+    def index(self) -> dict:
+        return json.loads(read(os.path.join(self.output, SEARCH_DIR, 'index.json')))
+
+    def lookup(self, term: str) -> list[str]:
+        """Resolve term the way a client would, to the outputs containing it."""
+        index = self.index()
+        path = os.path.join(self.output, SEARCH_DIR, shard_name(term) + '.txt')
+        if shard_name(term) not in index['shards']:
+            return []
+        for line in read(path).splitlines():
+            name, _, postings = line.partition(' ')
+            if name == term:
+                return sorted(index['docs'][doc][0] for doc in decode_postings(postings))
+        return []
+
+    def shard_mtimes(self) -> dict[str, int]:
+        directory = os.path.join(self.output, SEARCH_DIR)
+        return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+    def test_build_writes_index(self):
+        report = self.build(search=True)
+        self.assertEqual(report.search.indexed, ['blog/first.md', 'blog/second.md', 'index.md'])
+        index = self.index()
+        self.assertEqual(index['docs'], [['blog/first.html', 'First'], ['blog/second.html', 'Second'],
+                                         ['index.html', 'Home']])
+        self.assertEqual(self.lookup('post'), ['blog/first.html', 'blog/second.html'])
+        self.assertEqual(self.lookup('welcome'), ['index.html'])
+        self.assertEqual(self.lookup('missing'), [])
+
+    def test_unchanged_build_writes_nothing(self):
+        self.build(search=True)
+        before = self.shard_mtimes()
+        report = self.build(search=True)
+        self.assertEqual(report.search.indexed, [])
+        self.assertEqual(report.search.shards, [])
+        self.assertEqual(self.shard_mtimes(), before)
+
+    def test_edit_rewrites_only_affected_shards(self):
+        self.build(search=True)
+        before = self.shard_mtimes()
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First\n\nPost zebra')
+        report = self.build(search=True)
+        self.assertEqual(report.search.indexed, ['blog/first.md'])
+        self.assertEqual(report.search.shards, ['on', 'ze'])
+        after = self.shard_mtimes()
+        changed = sorted(name for name in after if after[name] != before.get(name))
+        # "one" was the only term of its shard, so that file goes.
+        self.assertEqual(changed, ['index.json', 'ze.txt'])
+        self.assertNotIn('on.txt', after)
+        self.assertEqual(self.lookup('zebra'), ['blog/first.html'])
+        self.assertEqual(self.lookup('one'), [])
+        self.assertEqual(self.lookup('post'), ['blog/first.html', 'blog/second.html'])
+
+    def test_removed_page_frees_its_id(self):
+        self.build(search=True)
+        os.remove(os.path.join(self.content, 'blog', 'first.md'))
+        report = self.build(search=True)
+        self.assertEqual(report.search.removed, ['blog/first.md'])
+        self.assertFalse(os.path.exists(os.path.join(self.output, SEARCH_DIR, 'on.txt')))
+        self.assertEqual(self.index()['docs'][0], None)
+        self.assertEqual(self.lookup('post'), ['blog/second.html'])
+
+        write(os.path.join(self.content, 'about.md'), '# About\n\nPost three')
+        self.build(search=True)
+        self.assertEqual(self.index()['docs'][0], ['about.html', 'About'])
+        self.assertEqual(self.lookup('post'), ['about.html', 'blog/second.html'])
+
+    def test_matches_fresh_build_after_edits(self):
+        self.build(search=True)
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First\n\nNew words here')
+        os.remove(os.path.join(self.content, 'index.md'))
+        write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome back')
+        self.build(search=True)
+        incremental = {term: self.lookup(term) for term in ('new', 'words', 'welcome', 'back', 'post', 'one')}
+        self.assertEqual(incremental['post'], ['blog/second.html'])
+        self.assertEqual(incremental['back'], ['index.html'])
+        fresh = os.path.join(self.root, 'fresh')
+        build_site(self.content, fresh, self.template, search=True)
+        self.output = fresh
+        self.assertEqual({term: self.lookup(term) for term in incremental}, incremental)
+
+    def test_turning_search_off_removes_index(self):
+        self.build(search=True)
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.output, SEARCH_DIR)))
+        self.assertFalse(os.path.exists(os.path.join(self.output, SEARCH_STATE_NAME)))
+
+    def test_merged_shards_match_whole_build(self):
+        for i in range(8):
+            write(os.path.join(self.content, 'many', f'page{i}.md'), f'# Page {i}\n\nBody number{i}')
+        dirs = []
+        for index in (1, 2, 3):
+            directory = os.path.join(self.root, f'shard{index}')
+            build_site(self.content, directory, self.template, shard=(index, 3), search=True)
+            self.assertFalse(os.path.exists(os.path.join(directory, SEARCH_DIR)))
+            dirs.append(directory)
+        merged = os.path.join(self.root, 'merged')
+        self.assertEqual(merge_shards(dirs, merged).conflicts, [])
+        self.build(search=True)
+        whole_dir = os.path.join(self.output, SEARCH_DIR)
+        for name in os.listdir(whole_dir):
+            self.assertEqual(read(os.path.join(merged, SEARCH_DIR, name)), read(os.path.join(whole_dir, name)))
+        self.assertEqual(sorted(os.listdir(os.path.join(merged, SEARCH_DIR))), sorted(os.listdir(whole_dir)))
+
+    def test_index_source_expands_includes(self):
+        write(os.path.join(self.content, '_parts', 'nav.md'), 'Navigation links')
+        path = os.path.join(self.content, 'page.md')
+        write(path, 'No heading\n\n{{> _parts/nav.md }}')
+        title, terms = index_source(path)
+        self.assertEqual(title, 'page')
+        self.assertEqual(terms, {'no': 1, 'heading': 1, 'navigation': 1, 'links': 1})
+
+    def peak_memory(self, blocks: int) -> int:
+        path = os.path.join(self.root, 'large.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('# Large\n\n' + '\n\n'.join(['Plain words that the index counts over and over again.' * 8] * blocks))
+        tracemalloc.start()
+        try:
+            index_source(path)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_index_memory_does_not_grow_with_document(self):
+        # Past the first few read chunks, a document four times as long
+        # should need no more memory.
+        small = self.peak_memory(500)
+        large = self.peak_memory(2000)
+        self.assertLess(large, small * 1.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#python
+
+import functools
+import io
+import os
+import threading
+import time
+import unittest
+import urllib.request
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import ThreadingHTTPServer
+
+from serve import DevServer, SiteRequestHandler, Watcher
+from test_build import SiteTestCase, read, write
+
+
+class TestWatcher(SiteTestCase):
+    def test_no_changes(self):
+        watcher = Watcher([self.content, self.template])
+        self.assertEqual(watcher.changes(), [])
+
+    def test_detects_add_modify_remove(self):
+        watcher = Watcher([self.content, self.template])
+        index = os.path.join(self.content, 'index.md')
+        added = os.path.join(self.content, 'blog', 'third.md')
+        removed = os.path.join(self.content, 'blog', 'second.md')
+        write(index, '# Home\n\nWelcome back')
+        write(added, '# Third')
+        os.remove(removed)
+        self.assertEqual(watcher.changes(), sorted([index, added, removed]))
+        self.assertEqual(watcher.changes(), [])
+
+    def test_detects_template_change(self):
+        watcher = Watcher([self.content, self.template])
+        os.utime(self.template, ns=(1, 1))
+        self.assertEqual(watcher.changes(), [self.template])
+
+
+class TestDevServer(SiteTestCase):
+    def test_poll_rebuilds_only_changed_page(self):
+        server = DevServer(self.content, self.output, self.template)
+        self.assertEqual(len(server.build().rendered), 3)
+        self.assertIsNone(server.poll())
+
+        write(os.path.join(self.content, 'blog', 'first.md'), '# First\n\nEdited')
+        start = time.perf_counter()
+        changed, report = server.poll()
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(changed, [os.path.join(self.content, 'blog', 'first.md')])
+        self.assertEqual(report.rendered, ['blog/first.md'])
+        self.assertIn('Edited', read(os.path.join(self.output, 'blog', 'first.html')))
+
+    def test_poll_rebuilds_when_a_partial_changes(self):
+        header = os.path.join(self.root, 'parts', 'header.html')
+        footer = os.path.join(self.root, 'parts', 'footer.html')
+        write(header, '<header>Site</header>')
+        write(footer, '<footer>Old</footer>')
+        write(self.template, '{{> parts/header.html }}{{ Content }}')
+        server = DevServer(self.content, self.output, self.template)
+        server.build()
+
+        write(header, '<header>Renamed site</header>')
+        changed, report = server.poll()
+        self.assertEqual(changed, [header])
+        self.assertEqual(len(report.rendered), 3)
+        self.assertIn('Renamed site', read(os.path.join(self.output, 'index.html')))
+
+        # A partial the template starts to include is watched from then on.
+        write(self.template, '{{> parts/header.html }}{{ Content }}{{> parts/footer.html }}')
+        self.assertEqual(server.poll()[0], [self.template])
+        self.assertIsNone(server.poll())
+        write(footer, '<footer>Newer</footer>')
+        changed, report = server.poll()
+        self.assertEqual(changed, [footer])
+        self.assertIn('<footer>Newer</footer>', read(os.path.join(self.output, 'index.html')))
+
+    def test_watch_survives_a_broken_partial(self):
+        header = os.path.join(self.root, 'parts', 'header.html')
+        write(header, '<header>Site</header>')
+        write(self.template, '{{> parts/header.html }}{{ Content }}')
+        server = DevServer(self.content, self.output, self.template)
+        server.build()
+        index = os.path.join(self.output, 'index.html')
+
+        def wait_for(condition) -> None:
+            deadline = time.monotonic() + 5
+            while not condition():
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+
+        stop = threading.Event()
+        errors = io.StringIO()
+        with redirect_stderr(errors), redirect_stdout(io.StringIO()):
+            thread = threading.Thread(target=server.watch, args=(0.01, stop), daemon=True)
+            thread.start()
+            try:
+                os.remove(header)
+                wait_for(lambda: 'rebuild failed' in errors.getvalue())
+                self.assertTrue(thread.is_alive())
+                write(header, '<header>Back</header>')
+                wait_for(lambda: read(index).startswith('<header>Back</header>'))
+            finally:
+                stop.set()
+                thread.join()
+        self.assertIn(header, errors.getvalue())
+
+    def test_serves_pages_without_extension(self):
+        DevServer(self.content, self.output, self.template).build()
+        handler = functools.partial(SiteRequestHandler, directory=self.output)
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f'http://127.0.0.1:{httpd.server_address[1]}'
+            with urllib.request.urlopen(f'{base}/blog/first') as response:
+                self.assertIn(b'<h1>First</h1>', response.read())
+            with urllib.request.urlopen(f'{base}/index.html') as response:
+                self.assertIn(b'<h1>Home</h1>', response.read())
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
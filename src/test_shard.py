@@ -0,0 +1,205 @@
+#python
+
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+from build import MANIFEST_NAME, PAGE_LIST_NAME, build_site
+from merge import merge_shards
+from shard import parse_shard, shard_of
+from test_build import SiteTestCase, read, write
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+class TestShardOf(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('1/1'), (1, 1))
+        self.assertEqual(parse_shard('3/4'), (3, 4))
+        for text in ('0/4', '5/4', '1', 'a/b', '1/0', ''):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition(self):
+        sources = [f'blog/post{i}.md' for i in range(400)]
+        shards = [shard_of(source, 4) for source in sources]
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertEqual(shards, [shard_of(source, 4) for source in sources])
+        self.assertTrue(all(shard_of(source, 1) == 1 for source in sources))
+
+
+class TestShardedBuild(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        for i in range(12):
+            write(os.path.join(self.content, 'many', f'page{i:02}.md'), f'# Page {i}\n\nBody {i}')
+        self.static = os.path.join(self.root, 'static')
+        write(os.path.join(self.static, 'styles.css'), 'body {}')
+
+    def shard_dir(self, index: int) -> str:
+        return os.path.join(self.root, f'shard{index}')
+
+    def build_shards(self, count: int) -> list[str]:
+        dirs = []
+        for index in range(1, count + 1):
+            build_site(self.content, self.shard_dir(index), self.template,
+                       static_dir=self.static, shard=(index, count))
+            dirs.append(self.shard_dir(index))
+        return dirs
+
+    def read_tree(self, root: str) -> dict[str, bytes]:
+        tree = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename == MANIFEST_NAME:
+                    continue
+                path = os.path.join(directory, filename)
+                with open(path, 'rb') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def whole_site(self) -> dict[str, bytes]:
+        whole = os.path.join(self.root, 'whole')
+        build_site(self.content, whole, self.template, static_dir=self.static)
+        return self.read_tree(whole)
+
+    def whole_site_sources(self) -> list[str]:
+        return ['index.md', 'blog/first.md', 'blog/second.md'] + [f'many/page{i:02}.md' for i in range(12)]
+
+    def test_shards_partition_the_pages(self):
+        rendered = []
+        for index in range(1, 4):
+            report = build_site(self.content, self.shard_dir(index), self.template, shard=(index, 3))
+            rendered.extend(report.rendered)
+        self.assertEqual(sorted(rendered), sorted(self.whole_site_sources()))
+        self.assertFalse(os.path.exists(os.path.join(self.shard_dir(1), PAGE_LIST_NAME)))
+
+    def test_merge_matches_whole_build(self):
+        report = merge_shards(self.build_shards(3), self.output)
+        self.assertEqual(report.conflicts, [])
+        self.assertEqual(report.pages, 15)
+        self.assertEqual(self.read_tree(self.output), self.whole_site())
+        page_list = json.loads(read(os.path.join(self.output, PAGE_LIST_NAME)))
+        self.assertEqual([page['source'] for page in page_list], sorted(self.whole_site_sources()))
+
+    def test_merge_with_gzip_search_and_sitemap(self):
+        options = {'static_dir': self.static, 'gzip_min_size': 0, 'search': True,
+                   'site_url': 'https://example.com/'}
+        dirs = [os.path.join(self.root, f'shard{index}') for index in (1, 2, 3)]
+        for index, directory in enumerate(dirs, 1):
+            build_site(self.content, directory, self.template, shard=(index, 3), **options)
+        self.assertEqual(merge_shards(dirs, self.output).conflicts, [])
+        whole = os.path.join(self.root, 'whole')
+        build_site(self.content, whole, self.template, **options)
+
+        merged_tree = self.read_tree(self.output)
+        whole_tree = self.read_tree(whole)
+        self.assertEqual(sorted(merged_tree), sorted(whole_tree))
+        for name in ('feed.xml.gz', 'pages.json.gz', 'sitemap.xml.gz', os.path.join('search', 'index.json.gz')):
+            self.assertIn(name, merged_tree)
+        for name, data in merged_tree.items():
+            if name.endswith('.gz'):
+                self.assertEqual(gzip.decompress(data), merged_tree[name[:-3]], name)
+            elif not name.endswith(('sitemap.xml', 'feed.xml')):
+                # Those two carry build times, which differ by build.
+                self.assertEqual(data, whole_tree[name], name)
+        manifests = [json.loads(read(os.path.join(directory, MANIFEST_NAME))) for directory in (self.output, whole)]
+        self.assertEqual(sorted(manifests[0]['gzip']), sorted(manifests[1]['gzip']))
+
+        # A second merge keeps the sidecars it wrote, and they stay recorded.
+        report = merge_shards(dirs, self.output)
+        self.assertEqual(report.removed, [])
+        self.assertEqual(self.read_tree(self.output), merged_tree)
+        self.assertEqual(json.loads(read(os.path.join(self.output, MANIFEST_NAME)))['gzip'], manifests[0]['gzip'])
+
+        # Without gzip the merge drops every sidecar, its own included.
+        for index, directory in enumerate(dirs, 1):
+            build_site(self.content, directory, self.template, shard=(index, 3), **dict(options, gzip_min_size=None))
+        merge_shards(dirs, self.output)
+        self.assertEqual([name for name in self.read_tree(self.output) if name.endswith('.gz')], [])
+
+    def test_different_gzip_settings_conflict(self):
+        build_site(self.content, self.shard_dir(1), self.template, shard=(1, 2), gzip_min_size=0)
+        build_site(self.content, self.shard_dir(2), self.template, shard=(2, 2))
+        conflicts = merge_shards([self.shard_dir(1), self.shard_dir(2)], self.output).conflicts
+        self.assertEqual(conflicts, ['shards were built with different gzip settings'])
+
+    def test_merged_output_builds_incrementally(self):
+        merge_shards(self.build_shards(2), self.output)
+        report = self.build(static_dir=self.static)
+        self.assertEqual(report.rendered, [])
+
+    def test_remerge_copies_changes_and_removes_stale_files(self):
+        dirs = self.build_shards(2)
+        merge_shards(dirs, self.output)
+        os.remove(os.path.join(self.content, 'many', 'page03.md'))
+        write(os.path.join(self.content, 'index.md'), '# Home\n\nChanged')
+        self.build_shards(2)
+        report = merge_shards(dirs, self.output)
+        self.assertEqual(report.copied, ['index.html'])
+        self.assertEqual(report.removed, ['many/page03.html'])
+        self.assertEqual(self.read_tree(self.output), self.whole_site())
+
+    def test_resharding_removes_pages_that_moved(self):
+        build_site(self.content, self.shard_dir(1), self.template, shard=(1, 1))
+        report = build_site(self.content, self.shard_dir(1), self.template, shard=(1, 3))
+        moved = [source for source in self.whole_site_sources() if shard_of(source, 3) != 1]
+        self.assertEqual(sorted(report.removed), sorted(moved))
+
+    def test_missing_and_duplicate_shards(self):
+        dirs = self.build_shards(3)
+        self.assertEqual(merge_shards(dirs[:2], self.output).conflicts, ['shard 3/3 is missing'])
+        conflicts = merge_shards(dirs + [dirs[0]], self.output).conflicts
+        self.assertEqual(len(conflicts), 1)
+        self.assertIn('shard 1/3 is also in', conflicts[0])
+        self.assertFalse(os.path.exists(self.output))
+
+    def test_unsharded_output_is_rejected(self):
+        self.build()
+        conflicts = merge_shards([self.output], os.path.join(self.root, 'merged')).conflicts
+        self.assertEqual(conflicts, [f'{self.output}: not the output of a sharded build'])
+
+    def test_page_in_two_shards_conflicts(self):
+        dirs = self.build_shards(2)
+        path = os.path.join(dirs[1], MANIFEST_NAME)
+        manifest = json.loads(read(path))
+        first = json.loads(read(os.path.join(dirs[0], MANIFEST_NAME)))
+        source, entry = next(iter(first['pages'].items()))
+        manifest['pages'][source] = entry
+        shutil.copy(os.path.join(dirs[0], entry['output']), os.path.join(dirs[1], entry['output']))
+        write(path, json.dumps(manifest))
+        conflicts = merge_shards(dirs, self.output).conflicts
+        self.assertEqual(conflicts, [f'{source}: rendered by more than one shard'])
+
+    def test_different_templates_conflict(self):
+        build_site(self.content, self.shard_dir(1), self.template, shard=(1, 2))
+        write(self.template, '<h1>{{ Title }}</h1>{{ Content }}')
+        build_site(self.content, self.shard_dir(2), self.template, shard=(2, 2))
+        conflicts = merge_shards([self.shard_dir(1), self.shard_dir(2)], self.output).conflicts
+        self.assertEqual(conflicts, ['shards were built with different template versions'])
+
+    def test_shards_as_separate_processes(self):
+        count = 3
+        processes = [
+            subprocess.Popen(
+                [sys.executable, MAIN, 'build', '--content', self.content, '--output', self.shard_dir(index),
+                 '--template', self.template, '--static', self.static, '--shard', f'{index}/{count}'],
+                stdout=subprocess.DEVNULL,
+            )
+            for index in range(1, count + 1)
+        ]
+        self.assertEqual([process.wait() for process in processes], [0] * count)
+        subprocess.run(
+            [sys.executable, MAIN, 'merge', '--output', self.output]
+            + [self.shard_dir(index) for index in range(1, count + 1)],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        self.assertEqual(self.read_tree(self.output), self.whole_site())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#python
+
+import json
+import os
+import unittest
+import xml.etree.ElementTree as ET
+
+import sitemap
+from build import MANIFEST_NAME, build_site
+from merge import merge_shards
+from sitemap import FEED_NAME, SITEMAP_NAME, page_url
+from test_build import SiteTestCase, read, write
+
+SITE = 'https://example.com/docs/'
+OLD = '2000-01-01T00:00:00Z'
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+
+class TestPageUrl(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url(SITE, 'index.html'), 'https://example.com/docs/')
+        self.assertEqual(page_url(SITE, 'blog/index.html'), 'https://example.com/docs/blog/')
+        self.assertEqual(page_url('https://example.com', 'blog/a b.html'), 'https://example.com/blog/a%20b.html')
+
+
+class TestSitemapBuild(SiteTestCase):
+    def build(self, **kwargs):
+        return super().build(site_url=SITE, **kwargs)
+
+    def manifest(self) -> dict:
+        return json.loads(read(os.path.join(self.output, MANIFEST_NAME)))
+
+    def age_manifest(self) -> None:
+        """Pretend every page last changed long ago."""
+        manifest = self.manifest()
+        for entry in manifest['pages'].values():
+            entry['modified'] = OLD
+        write(os.path.join(self.output, MANIFEST_NAME), json.dumps(manifest))
+
+    def urls(self, name: str = SITEMAP_NAME) -> dict[str, str]:
+        root = ET.parse(os.path.join(self.output, name)).getroot()
+        return {
+            url.find(f'{SITEMAP_NS}loc').text: url.find(f'{SITEMAP_NS}lastmod').text
+            for url in root
+        }
+
+    def feed_titles(self) -> list[str]:
+        root = ET.parse(os.path.join(self.output, FEED_NAME)).getroot()
+        return [entry.find(f'{ATOM_NS}title').text for entry in root.iter(f'{ATOM_NS}entry')]
+
+    def test_writes_sitemap_and_feed(self):
+        report = self.build()
+        self.assertEqual(report.sitemap.written, [SITEMAP_NAME, FEED_NAME])
+        self.assertEqual(sorted(self.urls()), [
+            'https://example.com/docs/', 'https://example.com/docs/blog/first.html',
+            'https://example.com/docs/blog/second.html',
+        ])
+        self.assertEqual(self.manifest()['pages']['blog/first.md']['title'], 'First')
+        self.assertEqual(sorted(self.feed_titles()), ['First', 'Home', 'Second'])
+
+    def test_unchanged_build_writes_nothing(self):
+        self.build()
+        report = self.build()
+        self.assertEqual(report.sitemap.written, [])
+        self.assertEqual(report.sitemap.unchanged, [SITEMAP_NAME, FEED_NAME])
+
+    def test_edit_updates_only_that_entry(self):
+        self.build()
+        self.age_manifest()
+        self.build()
+        write(os.path.join(self.content, 'blog', 'second.md'), '# Second & last\n\nEdited')
+        report = self.build()
+        self.assertEqual(report.sitemap.written, [SITEMAP_NAME, FEED_NAME])
+        urls = self.urls()
+        self.assertNotEqual(urls['https://example.com/docs/blog/second.html'], OLD)
+        self.assertEqual(urls['https://example.com/docs/blog/first.html'], OLD)
+        self.assertEqual(urls['https://example.com/docs/'], OLD)
+        self.assertEqual(self.feed_titles()[0], 'Second & last')
+
+    def test_same_output_keeps_modified_time(self):
+        write(os.path.join(self.content, 'amp.md'), '# Tom & Jerry')
+        self.build()
+        self.age_manifest()
+        # Every page is rendered again, but only one comes out different.
+        report = self.build(escape_html=True)
+        self.assertEqual(len(report.rendered), 4)
+        modified = {source: entry['modified'] for source, entry in self.manifest()['pages'].items()}
+        self.assertNotEqual(modified.pop('amp.md'), OLD)
+        self.assertEqual(set(modified.values()), {OLD})
+
+    def test_large_site_gets_a_sitemap_index(self):
+        limit = sitemap.SITEMAP_LIMIT
+        sitemap.SITEMAP_LIMIT = 2
+        try:
+            report = self.build()
+            self.assertEqual(report.sitemap.written, ['sitemap-1.xml', 'sitemap-2.xml', SITEMAP_NAME, FEED_NAME])
+            index = self.urls()
+            self.assertEqual(sorted(index), ['https://example.com/docs/sitemap-1.xml',
+                                             'https://example.com/docs/sitemap-2.xml'])
+            self.assertEqual(len(self.urls('sitemap-1.xml')) + len(self.urls('sitemap-2.xml')), 3)
+
+            os.remove(os.path.join(self.content, 'index.md'))
+            report = self.build()
+            self.assertEqual(report.sitemap.removed, ['sitemap-1.xml', 'sitemap-2.xml'])
+            self.assertEqual(len(self.urls()), 2)
+        finally:
+            sitemap.SITEMAP_LIMIT = limit
+
+    def test_no_site_url_removes_files(self):
+        self.build()
+        report = super().build()
+        self.assertEqual(report.sitemap.removed, [FEED_NAME, SITEMAP_NAME])
+        self.assertFalse(os.path.exists(os.path.join(self.output, SITEMAP_NAME)))
+
+    def test_merge_writes_sitemap(self):
+        dirs = []
+        for index in (1, 2):
+            directory = os.path.join(self.root, f'shard{index}')
+            build_site(self.content, directory, self.template, shard=(index, 2), site_url=SITE)
+            self.assertFalse(os.path.exists(os.path.join(directory, SITEMAP_NAME)))
+            dirs.append(directory)
+        self.assertEqual(merge_shards(dirs, os.path.join(self.root, 'merged')).conflicts, [])
+        self.output = os.path.join(self.root, 'merged')
+        self.assertEqual(len(self.urls()), 3)
+
+        build_site(self.content, dirs[1], self.template, shard=(2, 2), site_url='https://other.example/')
+        self.assertEqual(merge_shards(dirs, self.output).conflicts,
+                         ['shards were built with different site URLs or feed titles'])
+
+
+if __name__ == "__main__":
+    unittest.main()
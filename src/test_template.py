@@ -0,0 +1,78 @@
+#python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from template import Template, compile_template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = Template('<title>{{ Title }}</title><body>{{Content}}</body>')
+        self.assertEqual(template.segments, ['<title>', 'Title', '</title><body>', 'Content', '</body>'])
+        self.assertEqual(template.slots, {'Title', 'Content'})
+
+    def test_render(self):
+        template = Template('<title>{{ Title }}</title>{{ Content }}{{ Title }}')
+        self.assertEqual(
+            template.render({'Title': 'Hi', 'Content': '<p>x</p>'}),
+            '<title>Hi</title><p>x</p>Hi',
+        )
+
+    def test_no_slots(self):
+        template = Template('<p>static</p>')
+        self.assertEqual(template.render({}), '<p>static</p>')
+
+    def test_values_are_not_rescanned(self):
+        template = Template('{{ Title }}|{{ Content }}')
+        self.assertEqual(
+            template.render({'Title': '{{ Content }}', 'Content': 'body'}),
+            '{{ Content }}|body',
+        )
+
+    def test_missing_value(self):
+        template = Template('{{ Title }} {{ Author }}')
+        with self.assertRaises(ValueError):
+            template.render({'Title': 'x'})
+
+    def test_render_into(self):
+        template = Template('<h1>{{ Title }}</h1>{{ Content }}.')
+        chunks = []
+        template.render_into(chunks.append, {'Title': 'x', 'Content': lambda write: (write('a'), write('b'))})
+        self.assertEqual(chunks, ['<h1>', 'x', '</h1>', 'a', 'b', '.'])
+
+    def test_render_into_checks_slots_first(self):
+        chunks = []
+        with self.assertRaises(ValueError):
+            Template('{{ Title }} {{ Author }}').render_into(chunks.append, {'Title': 'x'})
+        self.assertEqual(chunks, [])
+
+    def test_compile_template_is_cached(self):
+        self.assertIs(compile_template('{{ A }}'), compile_template('{{ A }}'))
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'template.html')
+        with open(self.path, 'w') as f:
+            f.write('<h1>{{ Title }}</h1>')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def test_cached_until_modified(self):
+        first = load_template(self.path)
+        self.assertIs(load_template(self.path), first)
+        with open(self.path, 'w') as f:
+            f.write('<h2>{{ Title }}</h2>')
+        second = load_template(self.path)
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.digest, first.digest)
+        self.assertEqual(second.render({'Title': 'x'}), '<h2>x</h2>')
+
+
+if __name__ == "__main__":
+    unittest.main()